@@ -1,6 +1,8 @@
 from flask import Flask
+from flask import Response
 from flask import jsonify
 from flask import request
+from flask import stream_with_context
 from flask_cors import CORS
 from raven.contrib.flask import Sentry
 
@@ -33,9 +35,20 @@ def init_app(app):
 
         def handler_wrapper(*args, **kwargs):
             # Provide an abstraction for supplying the handler with request JSON.
-            data = request.get_json(force=True, silent=True) or {}
+            # An empty JSON array is a valid payload, e.g. for an empty batch publish.
+            data = request.get_json(force=True, silent=True)
+            if not isinstance(data, (dict, list)):
+                data = {}
             handler = HandlerClass(ctx, data)
             resp_json, status = handler.run(*args, **kwargs)
+
+            if isinstance(resp_json, Response):
+                # Streamed response bodies are generated after this function returns. Keep the
+                # request context, and with it the database session, alive until then.
+                if resp_json.is_streamed:
+                    resp_json.response = stream_with_context(resp_json.response)
+                return resp_json, status
+
             return jsonify(resp_json), status
 
         return HandlerClass.path, HandlerClass.__name__, handler_wrapper, HandlerClass.methods
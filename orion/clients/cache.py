@@ -1,10 +1,34 @@
+import collections
+import heapq
+import sys
 import threading
 import time
+import uuid
 
 import redis
 from redis.exceptions import ConnectionError
+from redis.exceptions import RedisError
 from redis.exceptions import TimeoutError
 
+from orion.util.circuit_breaker import CircuitBreaker
+from orion.util.circuit_breaker import STATE_CLOSED
+from orion.util.codec import CacheCodec
+from orion.util.codec import DECODE_ERRORS
+from orion.util.hash_ring import HashRing
+
+# Tiers of the Redis proxy from which an operation may be served, reported as a metric tag.
+TIER_NEAR = 'near'
+TIER_REDIS = 'redis'
+TIER_MEMORY = 'memory'
+
+# Deletes a key only if it holds the given value, atomically on the Redis server.
+DELETE_IF_EQUAL_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
 
 class CacheException(Exception):
     """
@@ -16,14 +40,55 @@ class CacheException(Exception):
 class MemoryTTLCache(object):
     """
     MemoryTTLCache is a simple, thread-safe in-memory key-value cache with support for per-key TTLs.
+    The cache may be bounded by a number of entries and/or an approximate size in bytes, beyond
+    which the least recently used entries are evicted. Expired entries are removed when read, and
+    optionally by a background sweeper.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        max_entries=None,
+        max_bytes=None,
+        sweep_interval_ms=None,
+        sweep_chunk_size=100,
+        metrics_gauge=None,
+    ):
         """
         Create a MemoryTTLCache with the default in-memory storage backend.
+
+        :param max_entries: Optional maximum number of entries.
+        :param max_bytes: Optional maximum approximate total size of all keys and values, in bytes.
+        :param sweep_interval_ms: Optional interval, in milliseconds, at which a background thread
+                                  removes expired entries. If not supplied, expired entries are only
+                                  removed when read or evicted.
+        :param sweep_chunk_size: Maximum number of expired entries removed while holding the lock.
+                                 The sweeper releases the lock between chunks, so that it never
+                                 blocks readers and writers for long.
+        :param metrics_gauge: Optional gauge metrics client, to which the cache's size, evictions,
+                              and expirations are reported after every sweep.
         """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.sweep_interval_ms = sweep_interval_ms
+        self.sweep_chunk_size = sweep_chunk_size
+        self.metrics_gauge = metrics_gauge
+
         self.lock = threading.Lock()
-        self.store = {}
+        # Map of key to (absolute expiry, value, approximate size), in least to most recently used
+        # order
+        self.store = collections.OrderedDict()
+        # Min-heap of (absolute expiry, key) pairs, which may refer to entries since overwritten or
+        # removed
+        self.expiries = []
+        self.num_bytes = 0
+        self.num_evictions = 0
+        self.num_expirations = 0
+
+        self.closed = threading.Event()
+        if sweep_interval_ms:
+            self.sweeper = threading.Thread(target=self._sweep_loop)
+            self.sweeper.daemon = True
+            self.sweeper.start()
 
     def get(self, key):
         """
@@ -33,15 +98,18 @@ class MemoryTTLCache(object):
         :return: Associated value, if it exists and is prior to expiry.
         """
         with self.lock:
-            try:
-                expiry, value = self.store[key]
+            return self._get(key)
 
-                if expiry > self._epoch():
-                    return value
+    def get_many(self, keys):
+        """
+        Retrieve the values of many keys at once.
 
-                del self.store[key]
-            except KeyError:
-                return None
+        :param keys: List of raw keys.
+        :return: List of associated values, in the same order as the keys; None for keys that do
+                 not exist or are past expiry.
+        """
+        with self.lock:
+            return [self._get(key) for key in keys]
 
     def set(self, key, value, ttl):
         """
@@ -52,12 +120,38 @@ class MemoryTTLCache(object):
         :param ttl: Time to live, in milliseconds.
         """
         with self.lock:
-            self.store[key] = (
-                # Absolute expiry time, as a Unix timestamp in milliseconds
-                self._epoch() + ttl,
-                # Value itself
-                value,
-            )
+            self._insert(key, value, ttl)
+
+    def set_many(self, mapping, ttl):
+        """
+        Set many key-value pairs with the same TTL at once.
+
+        :param mapping: Dictionary of raw keys to associated values.
+        :param ttl: Time to live, in milliseconds.
+        """
+        with self.lock:
+            for key, value in mapping.iteritems():
+                self._insert(key, value, ttl)
+
+    def add(self, key, value, ttl):
+        """
+        Set a key-value pair with a TTL, only if the key does not already exist.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        :return: True if the key was set; False if it already exists.
+        """
+        with self.lock:
+            try:
+                expiry, _, _ = self.store[key]
+                if expiry > self._epoch():
+                    return False
+            except KeyError:
+                pass
+
+            self._insert(key, value, ttl)
+            return True
 
     def delete(self, key):
         """
@@ -67,7 +161,156 @@ class MemoryTTLCache(object):
         """
         with self.lock:
             if key in self.store:
-                del self.store[key]
+                self._remove(key)
+
+    def delete_many(self, keys):
+        """
+        Delete many keys at once, if they exist.
+
+        :param keys: List of raw keys.
+        """
+        with self.lock:
+            for key in keys:
+                if key in self.store:
+                    self._remove(key)
+
+    def delete_if_equal(self, key, value):
+        """
+        Delete a key only if it holds the given value and has not expired.
+
+        :param key: Raw key.
+        :param value: Value the key must hold to be deleted.
+        :return: True if the key was deleted; False otherwise.
+        """
+        with self.lock:
+            if self._get(key) != value:
+                return False
+
+            self._remove(key)
+            return True
+
+    def clear(self):
+        """
+        Delete all keys.
+        """
+        with self.lock:
+            self.store.clear()
+            self.expiries = []
+            self.num_bytes = 0
+
+    def sweep(self):
+        """
+        Remove all expired entries, in chunks of at most the sweep chunk size. The lock is released
+        between chunks.
+
+        :return: Number of expired entries removed.
+        """
+        num_swept = 0
+
+        while True:
+            with self.lock:
+                now = self._epoch()
+                num_chunk_swept = 0
+
+                while (
+                    self.expiries and
+                    self.expiries[0][0] <= now and
+                    num_chunk_swept < self.sweep_chunk_size
+                ):
+                    expiry, key = heapq.heappop(self.expiries)
+                    entry = self.store.get(key)
+
+                    # Skip heap items left behind by overwritten or removed entries
+                    if entry and entry[0] == expiry:
+                        self._remove(key)
+                        self.num_expirations += 1
+                        num_chunk_swept += 1
+
+                done = not self.expiries or self.expiries[0][0] > now
+
+            num_swept += num_chunk_swept
+            if done:
+                return num_swept
+
+    def close(self):
+        """
+        Stop the background sweeper, if running.
+        """
+        self.closed.set()
+
+    def _get(self, key):
+        """
+        Retrieve a key's value, marking it as most recently used. Must be called with the lock held.
+
+        :param key: Raw key.
+        :return: Associated value, if it exists and is prior to expiry.
+        """
+        try:
+            expiry, value, _ = self.store[key]
+        except KeyError:
+            return None
+
+        if expiry > self._epoch():
+            self.store[key] = self.store.pop(key)
+            return value
+
+        self._remove(key)
+        self.num_expirations += 1
+
+    def _insert(self, key, value, ttl):
+        """
+        Insert or replace an entry as the most recently used, and evict least recently used entries
+        until the cache is within its bounds. Must be called with the lock held.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        """
+        if key in self.store:
+            self._remove(key)
+
+        # Absolute expiry time, as a Unix timestamp in milliseconds
+        expiry = self._epoch() + ttl
+        size = sys.getsizeof(key) + sys.getsizeof(value)
+
+        self.store[key] = (expiry, value, size)
+        self.num_bytes += size
+        heapq.heappush(self.expiries, (expiry, key))
+
+        # Heap items left behind by overwritten or removed entries are only popped once their
+        # expiry passes; rebuild the heap if they accumulate.
+        if len(self.expiries) > 2 * len(self.store) + self.sweep_chunk_size:
+            self.expiries = [
+                (entry_expiry, entry_key)
+                for entry_key, (entry_expiry, _, _) in self.store.iteritems()
+            ]
+            heapq.heapify(self.expiries)
+
+        while len(self.store) > 1 and (
+            (self.max_entries and len(self.store) > self.max_entries) or
+            (self.max_bytes and self.num_bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self.store)))
+            self.num_evictions += 1
+
+    def _remove(self, key):
+        """
+        Remove an existing entry. Must be called with the lock held.
+
+        :param key: Raw key.
+        """
+        _, _, size = self.store.pop(key)
+        self.num_bytes -= size
+
+    def _sweep_loop(self):
+        """
+        Periodically sweep expired entries and report the cache's metrics, until closed.
+        """
+        while not self.closed.wait(self.sweep_interval_ms / 1000.0):
+            self.sweep()
+
+            if self.metrics_gauge:
+                emit_memory_cache_gauges(self.metrics_gauge, [self])
 
     @staticmethod
     def _epoch():
@@ -79,38 +322,376 @@ class MemoryTTLCache(object):
         return 1000 * time.time()
 
 
+class ShardedMemoryTTLCache(object):
+    """
+    Drop-in replacement for MemoryTTLCache that partitions keys across a number of independently
+    locked MemoryTTLCache shards, selected by the hash of the key. Concurrent operations on keys in
+    different shards do not contend on the same lock. Entry and byte bounds are divided evenly
+    among the shards, so LRU eviction is approximate across the cache as a whole.
+    """
+
+    def __init__(
+        self,
+        num_shards=16,
+        max_entries=None,
+        max_bytes=None,
+        sweep_interval_ms=None,
+        sweep_chunk_size=100,
+        metrics_gauge=None,
+    ):
+        """
+        Create a ShardedMemoryTTLCache.
+
+        :param num_shards: Number of shards.
+        :param max_entries: Optional maximum number of entries, across all shards.
+        :param max_bytes: Optional maximum approximate total size of all keys and values, in bytes,
+                          across all shards.
+        :param sweep_interval_ms: Optional interval, in milliseconds, at which a background thread
+                                  removes expired entries from every shard.
+        :param sweep_chunk_size: Maximum number of expired entries removed while holding the lock
+                                 of a shard.
+        :param metrics_gauge: Optional gauge metrics client, to which the cache's size, evictions,
+                              and expirations are reported after every sweep.
+        """
+        self.sweep_interval_ms = sweep_interval_ms
+        self.metrics_gauge = metrics_gauge
+
+        self.shards = [
+            MemoryTTLCache(
+                max_entries=max_entries and max(1, max_entries // num_shards),
+                max_bytes=max_bytes and max(1, max_bytes // num_shards),
+                sweep_chunk_size=sweep_chunk_size,
+            )
+            for _ in range(num_shards)
+        ]
+
+        self.closed = threading.Event()
+        if sweep_interval_ms:
+            self.sweeper = threading.Thread(target=self._sweep_loop)
+            self.sweeper.daemon = True
+            self.sweeper.start()
+
+    def get(self, key):
+        """
+        Retrieve a key's value.
+
+        :param key: Raw key.
+        :return: Associated value, if it exists and is prior to expiry.
+        """
+        return self._shard(key).get(key)
+
+    def get_many(self, keys):
+        """
+        Retrieve the values of many keys at once, acquiring the lock of each shard at most once.
+
+        :param keys: List of raw keys.
+        :return: List of associated values, in the same order as the keys; None for keys that do
+                 not exist or are past expiry.
+        """
+        values = {}
+        for shard, shard_keys in self._group(keys).iteritems():
+            values.update(zip(shard_keys, shard.get_many(shard_keys)))
+
+        return [values[key] for key in keys]
+
+    def set(self, key, value, ttl):
+        """
+        Set a key-value pair with a TTL.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        """
+        return self._shard(key).set(key, value, ttl)
+
+    def set_many(self, mapping, ttl):
+        """
+        Set many key-value pairs with the same TTL at once, acquiring the lock of each shard at most
+        once.
+
+        :param mapping: Dictionary of raw keys to associated values.
+        :param ttl: Time to live, in milliseconds.
+        """
+        for shard, shard_keys in self._group(mapping.keys()).iteritems():
+            shard.set_many({key: mapping[key] for key in shard_keys}, ttl)
+
+    def add(self, key, value, ttl):
+        """
+        Set a key-value pair with a TTL, only if the key does not already exist.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        :return: True if the key was set; False if it already exists.
+        """
+        return self._shard(key).add(key, value, ttl)
+
+    def delete(self, key):
+        """
+        Delete a key, if it exists.
+
+        :param key: Raw key.
+        """
+        return self._shard(key).delete(key)
+
+    def delete_many(self, keys):
+        """
+        Delete many keys at once, if they exist, acquiring the lock of each shard at most once.
+
+        :param keys: List of raw keys.
+        """
+        for shard, shard_keys in self._group(keys).iteritems():
+            shard.delete_many(shard_keys)
+
+    def delete_if_equal(self, key, value):
+        """
+        Delete a key only if it holds the given value and has not expired.
+
+        :param key: Raw key.
+        :param value: Value the key must hold to be deleted.
+        :return: True if the key was deleted; False otherwise.
+        """
+        return self._shard(key).delete_if_equal(key, value)
+
+    def clear(self):
+        """
+        Delete all keys.
+        """
+        for shard in self.shards:
+            shard.clear()
+
+    def sweep(self):
+        """
+        Remove all expired entries from every shard, one shard at a time.
+
+        :return: Number of expired entries removed.
+        """
+        return sum(shard.sweep() for shard in self.shards)
+
+    def close(self):
+        """
+        Stop the background sweeper, if running.
+        """
+        self.closed.set()
+
+    def _shard(self, key):
+        """
+        Select the shard responsible for a key.
+
+        :param key: Raw key.
+        :return: MemoryTTLCache shard.
+        """
+        return self.shards[hash(key) % len(self.shards)]
+
+    def _group(self, keys):
+        """
+        Group keys by the shard responsible for them.
+
+        :param keys: List of raw keys.
+        :return: Dictionary mapping shards to lists of distinct keys.
+        """
+        groups = collections.defaultdict(list)
+        for key in set(keys):
+            groups[self._shard(key)].append(key)
+
+        return groups
+
+    def _sweep_loop(self):
+        """
+        Periodically sweep expired entries and report the cache's metrics, until closed.
+        """
+        while not self.closed.wait(self.sweep_interval_ms / 1000.0):
+            self.sweep()
+
+            if self.metrics_gauge:
+                emit_memory_cache_gauges(self.metrics_gauge, self.shards)
+
+
+def emit_memory_cache_gauges(metrics_gauge, caches):
+    """
+    Report the combined size, evictions, and expirations of one or more in-memory caches.
+
+    :param metrics_gauge: Gauge metrics client.
+    :param caches: List of MemoryTTLCache instances.
+    """
+    metrics_gauge.emit_gauge('cache.memory.size', sum(len(cache.store) for cache in caches))
+    metrics_gauge.emit_gauge('cache.memory.bytes', sum(cache.num_bytes for cache in caches))
+    metrics_gauge.emit_gauge(
+        'cache.memory.evictions',
+        sum(cache.num_evictions for cache in caches),
+    )
+    metrics_gauge.emit_gauge(
+        'cache.memory.expirations',
+        sum(cache.num_expirations for cache in caches),
+    )
+
+
 class RedisProxyClient(object):
     """
     Intermediary proxy client in front of Redis that gracefully falls back to an in-memory cache if
-    Redis fails or is otherwise unavailable, to provide additional resiliency.
+    Redis fails or is otherwise unavailable, to provide additional resiliency. Optionally, a
+    separate in-memory near cache is read through in front of Redis, so that repeated reads of the
+    same key are served without a network round trip. Entries in the near cache are at most as
+    stale as its TTL, and may optionally be invalidated sooner by writes from other processes,
+    broadcast over Redis pub/sub.
     """
 
-    def __init__(self, addr):
+    def __init__(
+        self,
+        addr,
+        memory=None,
+        near_cache=None,
+        near_cache_ttl_ms=1000,
+        invalidation_channel=None,
+        metrics_event=None,
+        metrics_sample_rate=1,
+        connect_timeout_ms=None,
+        socket_timeout_ms=None,
+        breaker_failure_threshold=5,
+        breaker_cooldown_ms=10000,
+        resync_max_keys=0,
+    ):
         """
-        Create a RedisProxyClient.
+        Create a RedisProxyClient. After a number of consecutive Redis failures, all operations are
+        routed directly to the in-memory store for a cooldown window, after which a single probe
+        operation is sent to Redis.
 
         :param addr: Address to the Redis cluster.
+        :param memory: Optional MemoryTTLCache or ShardedMemoryTTLCache used as the fallback store.
+                       If not supplied, an unbounded MemoryTTLCache is used.
+        :param near_cache: Optional MemoryTTLCache or ShardedMemoryTTLCache used as the near cache.
+                           If not supplied, all reads go to Redis.
+        :param near_cache_ttl_ms: Maximum time, in milliseconds, for which a value is served from
+                                  the near cache without being read from Redis.
+        :param invalidation_channel: Optional Redis pub/sub channel over which writes are broadcast
+                                     to, and received from, the near caches of other processes.
+        :param metrics_event: Optional event metrics client, to which hits and misses of the near
+                              cache and of Redis, and circuit breaker transitions, are reported.
+        :param metrics_sample_rate: Probability with which the hits and misses of each lookup are
+                                    reported.
+        :param connect_timeout_ms: Optional timeout for connecting to Redis, in milliseconds.
+        :param socket_timeout_ms: Optional timeout for a Redis operation, in milliseconds.
+        :param breaker_failure_threshold: Number of consecutive failed Redis operations after which
+                                          Redis is bypassed.
+        :param breaker_cooldown_ms: Time, in milliseconds, for which Redis is bypassed once the
+                                    failure threshold is reached.
+        :param resync_max_keys: Maximum number of keys written only to the in-memory store while
+                                Redis was unavailable that are written back to Redis once it
+                                recovers. Zero disables resynchronization.
         """
         ip, port = addr.split(':')
 
-        self.memory = MemoryTTLCache()
+        self.addr = addr
+        self.memory = memory or MemoryTTLCache()
+        self.near_cache = near_cache
+        self.near_cache_ttl_ms = near_cache_ttl_ms
+        self.invalidation_channel = invalidation_channel
+        self.metrics_event = metrics_event
+        self.metrics_sample_rate = metrics_sample_rate
+        self.resync_max_keys = resync_max_keys
         self.redis = redis.Redis(
             host=ip,
             port=port,
+            socket_connect_timeout=connect_timeout_ms and connect_timeout_ms / 1000.0,
+            socket_timeout=socket_timeout_ms and socket_timeout_ms / 1000.0,
         )
+        self.delete_if_equal_script = self.redis.register_script(DELETE_IF_EQUAL_SCRIPT)
+        # The pub/sub connection idles between broadcasts, so it must not time out on reads
+        self.pubsub_redis = redis.Redis(
+            host=ip,
+            port=port,
+            socket_connect_timeout=connect_timeout_ms and connect_timeout_ms / 1000.0,
+        )
+
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker_failure_threshold,
+            cooldown_ms=breaker_cooldown_ms,
+            on_state_change=self._on_breaker_state_change,
+        )
+        # Map of keys written only to the in-memory store to their absolute expiry, or None for
+        # deleted keys, in order of last write
+        self.resync_lock = threading.Lock()
+        self.resync_keys = collections.OrderedDict()
+
+        # Tier from which the calling thread's last operation was served
+        self.local = threading.local()
+
+        # Identifies this process's own broadcasts, which it need not act upon
+        self.origin = uuid.uuid4().hex
+        self.closed = threading.Event()
+        if near_cache and invalidation_channel:
+            self.invalidation_listener = threading.Thread(target=self._listen_invalidations)
+            self.invalidation_listener.daemon = True
+            self.invalidation_listener.start()
 
     def get(self, key):
         """
-        Get the value for a key, prioritizing Redis if available.
+        Get the value for a key, prioritizing the near cache and then Redis if available.
 
         :param key: Raw key.
         :return: Associated value.
         """
+        if self.near_cache:
+            value = self.near_cache.get(key)
+            self._emit_lookup(TIER_NEAR, value)
+            if value is not None:
+                self.local.tier = TIER_NEAR
+                return value
+
+        self.local.tier = TIER_REDIS
         try:
-            return self.redis.get(key)
+            value = self._redis_call(self.redis.get, key)
         except (ConnectionError, TimeoutError):
+            self.local.tier = TIER_MEMORY
             return self.memory.get(key)
 
+        self._emit_lookup(TIER_REDIS, value)
+        if self.near_cache and value is not None:
+            self.near_cache.set(key, value, self.near_cache_ttl_ms)
+
+        return value
+
+    def get_many(self, keys):
+        """
+        Get the values of many keys at once, prioritizing the near cache and then Redis if
+        available. Keys missing from the near cache are read from Redis in a single MGET.
+
+        :param keys: List of raw keys.
+        :return: List of associated values, in the same order as the keys.
+        """
+        values = [None] * len(keys)
+        if self.near_cache:
+            values = self.near_cache.get_many(keys)
+            for value in values:
+                self._emit_lookup(TIER_NEAR, value)
+
+        missing = [idx for idx, value in enumerate(values) if value is None]
+        if not missing:
+            self.local.tier = TIER_NEAR
+            return values
+
+        missing_keys = [keys[idx] for idx in missing]
+        self.local.tier = TIER_REDIS
+        try:
+            missing_values = self._redis_call(self.redis.mget, missing_keys)
+        except (ConnectionError, TimeoutError):
+            self.local.tier = TIER_MEMORY
+            missing_values = self.memory.get_many(missing_keys)
+        else:
+            for value in missing_values:
+                self._emit_lookup(TIER_REDIS, value)
+            if self.near_cache:
+                self.near_cache.set_many({
+                    key: value
+                    for key, value in zip(missing_keys, missing_values)
+                    if value is not None
+                }, self.near_cache_ttl_ms)
+
+        for idx, value in zip(missing, missing_values):
+            values[idx] = value
+
+        return values
+
     def set(self, key, value, ttl):
         """
         Set the value for a key. Dark writes to the backup in-memory store are always performed
@@ -121,13 +702,70 @@ class RedisProxyClient(object):
         :param value: Associated value.
         :param ttl: Time to live, in milliseconds.
         """
+        if self.near_cache:
+            self.near_cache.set(key, value, min(ttl, self.near_cache_ttl_ms))
+
+        self.local.tier = TIER_REDIS
         try:
-            return self.redis.set(key, value, px=ttl)
+            return self._redis_call(self.redis.set, key, value, px=ttl)
         except (ConnectionError, TimeoutError):
-            pass
+            self.local.tier = TIER_MEMORY
+            self._mark_resync(key, MemoryTTLCache._epoch() + ttl)
         finally:
+            self._broadcast_invalidation(key)
             return self.memory.set(key, value, ttl)
 
+    def set_many(self, mapping, ttl):
+        """
+        Set the values of many keys with the same TTL at once, in a single pipelined round trip to
+        Redis. As with set(), dark writes to the backup in-memory store are always performed.
+
+        :param mapping: Dictionary of raw keys to associated values.
+        :param ttl: Time to live, in milliseconds.
+        """
+        if not mapping:
+            return
+
+        if self.near_cache:
+            self.near_cache.set_many(mapping, min(ttl, self.near_cache_ttl_ms))
+
+        def pipelined_set():
+            pipeline = self.redis.pipeline(transaction=False)
+            for key, value in mapping.iteritems():
+                pipeline.set(key, value, px=ttl)
+            return pipeline.execute()
+
+        self.local.tier = TIER_REDIS
+        try:
+            self._redis_call(pipelined_set)
+        except (ConnectionError, TimeoutError):
+            self.local.tier = TIER_MEMORY
+            expiry = MemoryTTLCache._epoch() + ttl
+            for key in mapping:
+                self._mark_resync(key, expiry)
+        finally:
+            self._broadcast_invalidations(mapping.keys())
+            self.memory.set_many(mapping, ttl)
+
+    def add(self, key, value, ttl):
+        """
+        Set the value for a key only if it does not already exist. Unlike set(), this is not dark
+        written to the in-memory store, since the outcome must be decided atomically by a single
+        backend; the in-memory store is used only if Redis is unavailable. For the same reason, the
+        near cache is bypassed.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        :return: True if the key was set; False if it already exists.
+        """
+        self.local.tier = TIER_REDIS
+        try:
+            return bool(self._redis_call(self.redis.set, key, value, px=ttl, nx=True))
+        except (ConnectionError, TimeoutError):
+            self.local.tier = TIER_MEMORY
+            return self.memory.add(key, value, ttl)
+
     def delete(self, key):
         """
         Invalidate a cache entry. Like the other write operation set(), dark writes are always
@@ -135,32 +773,551 @@ class RedisProxyClient(object):
 
         :param key: Raw key.
         """
+        if self.near_cache:
+            self.near_cache.delete(key)
+
+        self.local.tier = TIER_REDIS
         try:
-            return self.redis.delete(key)
+            return self._redis_call(self.redis.delete, key)
         except (ConnectionError, TimeoutError):
-            pass
+            self.local.tier = TIER_MEMORY
+            self._mark_resync(key, None)
         finally:
+            self._broadcast_invalidation(key)
             return self.memory.delete(key)
 
+    def delete_many(self, keys):
+        """
+        Invalidate many cache entries at once, in a single round trip to Redis. As with delete(),
+        dark writes to the backup in-memory store are always performed.
+
+        :param keys: List of raw keys.
+        """
+        if not keys:
+            return
+
+        if self.near_cache:
+            self.near_cache.delete_many(keys)
+
+        self.local.tier = TIER_REDIS
+        try:
+            self._redis_call(self.redis.delete, *keys)
+        except (ConnectionError, TimeoutError):
+            self.local.tier = TIER_MEMORY
+            for key in keys:
+                self._mark_resync(key, None)
+        finally:
+            self._broadcast_invalidations(keys)
+            self.memory.delete_many(keys)
+
+    def delete_if_equal(self, key, value):
+        """
+        Delete a key only if it holds the given value, as decided atomically by Redis. As with
+        add(), the in-memory store is used only if Redis is unavailable, and the near cache is
+        bypassed.
+
+        :param key: Raw key.
+        :param value: Value the key must hold to be deleted.
+        :return: True if the key was deleted; False otherwise.
+        """
+        self.local.tier = TIER_REDIS
+        try:
+            return bool(self._redis_call(self.delete_if_equal_script, keys=[key], args=[value]))
+        except (ConnectionError, TimeoutError):
+            self.local.tier = TIER_MEMORY
+            return self.memory.delete_if_equal(key, value)
+
+    def close(self):
+        """
+        Stop listening for invalidations, if listening.
+        """
+        self.closed.set()
+
+    def last_tier(self):
+        """
+        Identify the tier from which the calling thread's last operation was served. Operations
+        that fell back from Redis to the in-memory store are reported as served by the latter.
+
+        :return: One of TIER_NEAR, TIER_REDIS, or TIER_MEMORY; None if no operation was performed.
+        """
+        return getattr(self.local, 'tier', None)
+
+    def resync(self):
+        """
+        Write keys that were written only to the in-memory store while Redis was unavailable back
+        to Redis. Keys that have since expired from the in-memory store are skipped; keys that fail
+        to be written are retained for the next resynchronization.
+
+        :return: Number of keys written back to Redis.
+        """
+        with self.resync_lock:
+            pending = self.resync_keys.items()
+            self.resync_keys.clear()
+
+        num_resynced = 0
+        for idx, (key, expiry) in enumerate(pending):
+            try:
+                if expiry is None:
+                    self._redis_call(self.redis.delete, key)
+                else:
+                    value = self.memory.get(key)
+                    ttl = int(expiry - MemoryTTLCache._epoch())
+                    if value is None or ttl <= 0:
+                        continue
+
+                    self._redis_call(self.redis.set, key, value, px=ttl)
+
+                num_resynced += 1
+            except (ConnectionError, TimeoutError):
+                # Retain the remaining keys, unless they have been written again in the meantime
+                with self.resync_lock:
+                    for key, expiry in pending[idx:]:
+                        self.resync_keys.setdefault(key, expiry)
+                break
+
+        if self.metrics_event:
+            self.metrics_event.emit_event('cache.redis.resync')
+
+        return num_resynced
+
+    def _redis_call(self, func, *args, **kwargs):
+        """
+        Perform a Redis operation through the circuit breaker. Every Redis error counts as a
+        failure, including error replies such as LOADING, READONLY, or OOM, which are reported as
+        connection errors so that callers fall back to the in-memory store.
+
+        :param func: Redis client method.
+        :param args: Positional arguments to the method.
+        :param kwargs: Keyword arguments to the method.
+        :return: Return value of the method.
+        :raises ConnectionError: If the circuit breaker is open, or the operation failed.
+        :raises TimeoutError: If the operation timed out.
+        """
+        if not self.breaker.allow():
+            raise ConnectionError('Circuit breaker is open')
+
+        try:
+            result = func(*args, **kwargs)
+        except (ConnectionError, TimeoutError):
+            self.breaker.record_failure()
+            raise
+        except RedisError as e:
+            self.breaker.record_failure()
+            raise ConnectionError('Redis operation failed: {}'.format(e))
+
+        self.breaker.record_success()
+        return result
+
+    def _mark_resync(self, key, expiry):
+        """
+        Record a key written only to the in-memory store, if resynchronization is enabled. The
+        oldest keys are dropped beyond the maximum.
+
+        :param key: Raw key.
+        :param expiry: Absolute expiry of the written value, as a Unix timestamp in milliseconds,
+                       or None if the key was deleted.
+        """
+        if not self.resync_max_keys:
+            return
+
+        with self.resync_lock:
+            self.resync_keys.pop(key, None)
+            self.resync_keys[key] = expiry
+
+            while len(self.resync_keys) > self.resync_max_keys:
+                self.resync_keys.popitem(last=False)
+
+    def _on_breaker_state_change(self, state):
+        """
+        Report a circuit breaker state transition, and resynchronize keys in the background once
+        Redis recovers.
+
+        :param state: New breaker state.
+        """
+        if self.metrics_event:
+            self.metrics_event.emit_event('cache.redis.breaker_transition', {
+                'state': state,
+                'node': self.addr,
+            })
+
+        if state == STATE_CLOSED and self.resync_keys:
+            resyncer = threading.Thread(target=self.resync)
+            resyncer.daemon = True
+            resyncer.start()
+
+    def _emit_lookup(self, tier, value):
+        """
+        Report the outcome of a lookup in a single tier.
+
+        :param tier: Name of the tier.
+        :param value: Value read from the tier, or None on a miss.
+        """
+        if self.metrics_event:
+            self.metrics_event.emit_event(
+                'cache.lookup',
+                {'tier': tier, 'result': 'miss' if value is None else 'hit'},
+                sample_rate=self.metrics_sample_rate,
+            )
+
+    def _broadcast_invalidation(self, key):
+        """
+        Broadcast a write to a key to the near caches of other processes, if enabled.
+
+        :param key: Raw key.
+        """
+        if not self.near_cache or not self.invalidation_channel:
+            return
+
+        try:
+            self._redis_call(
+                self.redis.publish,
+                self.invalidation_channel,
+                '{}:{}'.format(self.origin, key),
+            )
+        except (ConnectionError, TimeoutError):
+            pass
+
+    def _broadcast_invalidations(self, keys):
+        """
+        Broadcast writes to many keys to the near caches of other processes, if enabled, in a
+        single pipelined round trip.
+
+        :param keys: List of raw keys.
+        """
+        if not self.near_cache or not self.invalidation_channel:
+            return
+
+        def pipelined_publish():
+            pipeline = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipeline.publish(self.invalidation_channel, '{}:{}'.format(self.origin, key))
+            return pipeline.execute()
+
+        try:
+            self._redis_call(pipelined_publish)
+        except (ConnectionError, TimeoutError):
+            pass
+
+    def _listen_invalidations(self):
+        """
+        Evict keys written by other processes from the near cache, until closed. The subscription
+        is re-established if the connection to Redis is lost. Since broadcasts may have been missed
+        in the meantime, the near cache is cleared on every (re)subscription.
+        """
+        while not self.closed.is_set():
+            try:
+                pubsub = self.pubsub_redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.invalidation_channel)
+                self.near_cache.clear()
+
+                for message in pubsub.listen():
+                    self._handle_invalidation(message)
+                    if self.closed.is_set():
+                        break
+            except (ConnectionError, TimeoutError):
+                pass
+
+            self.closed.wait(1)
+
+    def _handle_invalidation(self, message):
+        """
+        Evict the key of a broadcast from the near cache, unless it originated from this process.
+
+        :param message: Redis pub/sub message.
+        """
+        if message.get('type') != 'message':
+            return
+
+        origin, key = message['data'].split(':', 1)
+        if origin != self.origin:
+            self.near_cache.delete(key)
+
+
+def _most_degraded_tier(tiers):
+    """
+    Summarize the tiers from which the parts of a multi-node operation were served.
+
+    :param tiers: List of tiers.
+    :return: The most degraded of the tiers, or None if there are none.
+    """
+    for tier in (TIER_MEMORY, TIER_REDIS, TIER_NEAR):
+        if tier in tiers:
+            return tier
+
+    return None
+
+
+class ShardedRedisProxyClient(object):
+    """
+    Spreads keys across several Redis nodes with consistent hashing, each node fronted by its own
+    RedisProxyClient. Since every node has its own circuit breaker, the loss of a single node only
+    fails over that node's share of the keys to the in-memory store.
+    """
+
+    def __init__(self, backends, virtual_nodes=160):
+        """
+        Create a ShardedRedisProxyClient.
+
+        :param backends: Dictionary of Redis node addresses to the RedisProxyClient of each node.
+        :param virtual_nodes: Number of points on the hash ring per node.
+        """
+        self.backends = backends
+        self.ring = HashRing(sorted(backends.keys()), virtual_nodes=virtual_nodes)
+
+        # Tier from which the calling thread's last operation was served
+        self.local = threading.local()
+
+    def get(self, key):
+        """
+        Get the value for a key from the node owning it.
+
+        :param key: Raw key.
+        :return: Associated value.
+        """
+        return self._call(key, 'get', key)
+
+    def get_many(self, keys):
+        """
+        Get the values of many keys at once, with a single batch read per node.
+
+        :param keys: List of raw keys.
+        :return: List of associated values, in the same order as the keys.
+        """
+        values = {}
+        tiers = []
+        for backend, backend_keys in self._group(keys).iteritems():
+            values.update(zip(backend_keys, backend.get_many(backend_keys)))
+            tiers.append(backend.last_tier())
+
+        self.local.tier = _most_degraded_tier(tiers)
+        return [values[key] for key in keys]
+
+    def set(self, key, value, ttl):
+        """
+        Set the value for a key on the node owning it.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        """
+        return self._call(key, 'set', key, value, ttl)
+
+    def set_many(self, mapping, ttl):
+        """
+        Set the values of many keys with the same TTL at once, with a single batch write per node.
+
+        :param mapping: Dictionary of raw keys to associated values.
+        :param ttl: Time to live, in milliseconds.
+        """
+        tiers = []
+        for backend, backend_keys in self._group(mapping.keys()).iteritems():
+            backend.set_many({key: mapping[key] for key in backend_keys}, ttl)
+            tiers.append(backend.last_tier())
+
+        self.local.tier = _most_degraded_tier(tiers)
+
+    def add(self, key, value, ttl):
+        """
+        Set the value for a key on the node owning it, only if it does not already exist.
+
+        :param key: Raw key.
+        :param value: Associated value.
+        :param ttl: Time to live, in milliseconds.
+        :return: True if the key was set; False if it already exists.
+        """
+        return self._call(key, 'add', key, value, ttl)
+
+    def delete(self, key):
+        """
+        Invalidate a cache entry on the node owning it.
+
+        :param key: Raw key.
+        """
+        return self._call(key, 'delete', key)
+
+    def delete_if_equal(self, key, value):
+        """
+        Delete a key on the node owning it, only if it holds the given value.
+
+        :param key: Raw key.
+        :param value: Value the key must hold to be deleted.
+        :return: True if the key was deleted; False otherwise.
+        """
+        return self._call(key, 'delete_if_equal', key, value)
+
+    def delete_many(self, keys):
+        """
+        Invalidate many cache entries at once, with a single batch delete per node.
+
+        :param keys: List of raw keys.
+        """
+        tiers = []
+        for backend, backend_keys in self._group(keys).iteritems():
+            backend.delete_many(backend_keys)
+            tiers.append(backend.last_tier())
+
+        self.local.tier = _most_degraded_tier(tiers)
+
+    def close(self):
+        """
+        Stop listening for invalidations on all nodes.
+        """
+        for backend in self.backends.values():
+            backend.close()
+
+    def resync(self):
+        """
+        Write keys that were written only to the in-memory store back to their nodes.
+
+        :return: Number of keys written back to Redis, across all nodes.
+        """
+        return sum(backend.resync() for backend in self.backends.values())
+
+    def last_tier(self):
+        """
+        Identify the tier from which the calling thread's last operation was served. For operations
+        on keys owned by several nodes, this is the most degraded tier of any of the nodes.
+
+        :return: One of TIER_NEAR, TIER_REDIS, or TIER_MEMORY; None if no operation was performed.
+        """
+        return getattr(self.local, 'tier', None)
+
+    def _call(self, key, method, *args):
+        """
+        Perform a single-key operation on the node owning the key.
+
+        :param key: Raw key.
+        :param method: Name of the RedisProxyClient method.
+        :param args: Arguments to the method.
+        :return: Return value of the method.
+        """
+        backend = self._backend(key)
+        try:
+            return getattr(backend, method)(*args)
+        finally:
+            self.local.tier = backend.last_tier()
+
+    def _backend(self, key):
+        """
+        Find the RedisProxyClient of the node owning a key.
+
+        :param key: Raw key.
+        :return: RedisProxyClient instance.
+        """
+        return self.backends[self.ring.get_node(key)]
+
+    def _group(self, keys):
+        """
+        Group keys by the node owning them.
+
+        :param keys: Iterable of raw keys.
+        :return: Dictionary of RedisProxyClient instances to the list of distinct keys they own.
+        """
+        groups = collections.defaultdict(list)
+        for key in collections.OrderedDict.fromkeys(keys):
+            groups[self._backend(key)].append(key)
+
+        return groups
+
 
 class CacheClient(object):
     """
     Caching abstractions on top of a key value storage system.
     """
 
-    def __init__(self, addr, prefix):
+    def __init__(
+        self,
+        addr,
+        prefix,
+        memory=None,
+        near_cache=None,
+        near_cache_ttl_ms=1000,
+        near_cache_invalidation=False,
+        metrics_event=None,
+        metrics_latency=None,
+        metrics_sample_rate=1,
+        redis_connect_timeout_ms=None,
+        redis_socket_timeout_ms=None,
+        redis_breaker_failure_threshold=5,
+        redis_breaker_cooldown_ms=10000,
+        redis_resync_max_keys=0,
+        redis_virtual_nodes=160,
+        codec=None,
+    ):
         """
         Create a cache client with a Redis backend.
 
-        :param addr: Address of the Redis cluster.
+        :param addr: Address of the Redis cluster, or list of addresses of Redis nodes across which
+                     keys are sharded with consistent hashing.
         :param prefix: String prefix for all inserted cache keys.
+        :param memory: Optional MemoryTTLCache or ShardedMemoryTTLCache used as the backend if no
+                       Redis address is supplied, and as the fallback store otherwise.
+        :param near_cache: Optional MemoryTTLCache or ShardedMemoryTTLCache read through in front
+                           of Redis. Unused if no Redis address is supplied.
+        :param near_cache_ttl_ms: Maximum staleness of values served from the near cache, in
+                                  milliseconds.
+        :param near_cache_invalidation: True to broadcast writes to, and receive writes from, the
+                                        near caches of other processes over Redis pub/sub.
+        :param metrics_event: Optional event metrics client, to which the hits, misses, and value
+                              sizes of each operation, by namespace and by the backend that served
+                              it, and the hits and misses of each cache tier, are reported.
+        :param metrics_latency: Optional latency metrics client, to which the latency of each
+                                operation, by namespace, is reported.
+        :param metrics_sample_rate: Probability with which each operation is reported. Lower rates
+                                    reduce the overhead of reporting on busy caches.
+        :param redis_connect_timeout_ms: Optional timeout for connecting to Redis, in milliseconds.
+        :param redis_socket_timeout_ms: Optional timeout for a Redis operation, in milliseconds.
+        :param redis_breaker_failure_threshold: Number of consecutive failed Redis operations after
+                                                which Redis is bypassed.
+        :param redis_breaker_cooldown_ms: Time, in milliseconds, for which Redis is bypassed once
+                                          the failure threshold is reached.
+        :param redis_resync_max_keys: Maximum number of keys written back to Redis once it
+                                      recovers. Zero disables resynchronization.
+        :param redis_virtual_nodes: Number of points on the hash ring per Redis node, if keys are
+                                    sharded across several nodes.
+        :param codec: Optional CacheCodec with which values are encoded before they are stored.
+                      Values are stored as-is if not supplied. Encoded values are always decoded
+                      on reads, regardless of whether a codec is supplied.
         """
         self.prefix = prefix
+        self.codec = codec
+        self.metrics_event = metrics_event
+        self.metrics_latency = metrics_latency
+        self.metrics_sample_rate = metrics_sample_rate
 
-        if addr:
-            self.backend = RedisProxyClient(addr)
+        addrs = [addr] if isinstance(addr, basestring) else list(addr or [])
+        # The nodes share a single in-memory store, since each key is only ever owned by one node
+        memory = memory or MemoryTTLCache()
+
+        def redis_proxy_client(node_addr):
+            return RedisProxyClient(
+                node_addr,
+                memory=memory,
+                near_cache=near_cache,
+                near_cache_ttl_ms=near_cache_ttl_ms,
+                invalidation_channel=(
+                    '{}:near-cache-invalidation'.format(prefix)
+                    if near_cache_invalidation else None
+                ),
+                metrics_event=metrics_event,
+                metrics_sample_rate=metrics_sample_rate,
+                connect_timeout_ms=redis_connect_timeout_ms,
+                socket_timeout_ms=redis_socket_timeout_ms,
+                breaker_failure_threshold=redis_breaker_failure_threshold,
+                breaker_cooldown_ms=redis_breaker_cooldown_ms,
+                resync_max_keys=redis_resync_max_keys,
+            )
+
+        self.redis_backed = bool(addrs)
+        if len(addrs) > 1:
+            self.backend = ShardedRedisProxyClient(
+                backends={node_addr: redis_proxy_client(node_addr) for node_addr in addrs},
+                virtual_nodes=redis_virtual_nodes,
+            )
+        elif addrs:
+            self.backend = redis_proxy_client(addrs[0])
         else:
-            self.backend = MemoryTTLCache()
+            self.backend = memory
 
     def rw_client(self, namespace, key, tags={}):
         """
@@ -180,7 +1337,38 @@ class CacheClient(object):
         def delete_proxy():
             return self.delete(namespace, key, tags)
 
-        return CacheKeyRWClient(set_proxy, get_proxy, delete_proxy)
+        def add_proxy(value, ttl):
+            return self.add(namespace, key, tags, value, ttl)
+
+        def delete_if_equal_proxy(value):
+            return self.delete_if_equal(namespace, key, tags, value)
+
+        return CacheKeyRWClient(
+            set_proxy,
+            get_proxy,
+            delete_proxy,
+            add_proxy,
+            delete_if_equal_proxy,
+        )
+
+    def rw_batch_client(self, entries):
+        """
+        Factory for a cache read/write client for many keys at once.
+
+        :param entries: List of (namespace, key, tags) triples identifying each key.
+        :return: A client with get, set, and delete methods operating on all keys, within this
+                 client's closure.
+        """
+        def set_proxy(values, ttl):
+            return self.set_many(zip(entries, values), ttl)
+
+        def get_proxy():
+            return self.get_many(entries)
+
+        def delete_proxy():
+            return self.delete_many(entries)
+
+        return CacheBatchRWClient(set_proxy, get_proxy, delete_proxy)
 
     def get(self, namespace, key, tags={}):
         """
@@ -191,9 +1379,29 @@ class CacheClient(object):
         :param tags: Optional dictionary of tags to qualify the key.
         :return: The cached value, if available; None otherwise.
         """
-        return self.backend.get(
+        start = time.time()
+        value = self.backend.get(
             key=self._format_key(namespace, key, tags),
         )
+        self._emit_operation('get', start, [namespace], [value])
+
+        return self._decode(value)
+
+    def get_many(self, entries):
+        """
+        Get many cached values at once.
+
+        :param entries: List of (namespace, key, tags) triples identifying each key.
+        :return: List of cached values, in the same order as the entries; None for keys that are
+                 not cached.
+        """
+        start = time.time()
+        values = self.backend.get_many(
+            keys=[self._format_key(*entry) for entry in entries],
+        )
+        self._emit_operation('get_many', start, [entry[0] for entry in entries], values)
+
+        return [self._decode(value) for value in values]
 
     def set(self, namespace, key, tags, value, ttl):
         """
@@ -206,11 +1414,55 @@ class CacheClient(object):
         :param value: Value to set.
         :param ttl: Time to live (expiry) for the entry, in milliseconds.
         """
+        start = time.time()
+        encoded = self._encode(value)
         self.backend.set(
             key=self._format_key(namespace, key, tags),
-            value=value,
+            value=encoded,
+            ttl=ttl,
+        )
+        self._emit_operation('set', start, [namespace], [encoded])
+
+    def set_many(self, items, ttl):
+        """
+        Cache many values with the same TTL at once.
+
+        :param items: List of ((namespace, key, tags), value) pairs.
+        :param ttl: Time to live (expiry) for the entries, in milliseconds.
+        """
+        start = time.time()
+        encoded = [self._encode(value) for _, value in items]
+        self.backend.set_many(
+            mapping={
+                self._format_key(*entry): value
+                for (entry, _), value in zip(items, encoded)
+            },
+            ttl=ttl,
+        )
+        self._emit_operation('set_many', start, [entry[0] for entry, _ in items], encoded)
+
+    def add(self, namespace, key, tags, value, ttl):
+        """
+        Cache a value only if no entry exists for the key. This is suitable for use as a
+        short-lived lock.
+
+        :param namespace: Namespace of the key.
+        :param key: The key itself.
+        :param tags: Optional dictionary of tags to qualify the key.
+        :param value: Value to set.
+        :param ttl: Time to live (expiry) for the entry, in milliseconds.
+        :return: True if the value was set; False if an entry already exists.
+        """
+        start = time.time()
+        encoded = self._encode(value)
+        added = self.backend.add(
+            key=self._format_key(namespace, key, tags),
+            value=encoded,
             ttl=ttl,
         )
+        self._emit_operation('add', start, [namespace], [encoded])
+
+        return added
 
     def delete(self, namespace, key, tags):
         """
@@ -220,9 +1472,136 @@ class CacheClient(object):
         :param key: The key itself.
         :param tags: Optional dictionary of tags to qualify the key.
         """
+        start = time.time()
         self.backend.delete(
             key=self._format_key(namespace, key, tags),
         )
+        self._emit_operation('delete', start, [namespace], [None])
+
+    def delete_if_equal(self, namespace, key, tags, value):
+        """
+        Invalidate a cache entry only if it holds the given value. This is suitable for releasing a
+        lock taken with add(), without releasing a lock that has since expired and been taken by
+        another holder.
+
+        :param namespace: Namespace of the key.
+        :param key: The key itself.
+        :param tags: Optional dictionary of tags to qualify the key.
+        :param value: Value the entry must hold to be invalidated.
+        :return: True if the entry was invalidated; False otherwise.
+        """
+        start = time.time()
+        encoded = self._encode(value)
+        deleted = self.backend.delete_if_equal(
+            key=self._format_key(namespace, key, tags),
+            value=encoded,
+        )
+        self._emit_operation('delete_if_equal', start, [namespace], [encoded])
+
+        return deleted
+
+    def delete_many(self, entries):
+        """
+        Invalidate many cache entries at once.
+
+        :param entries: List of (namespace, key, tags) triples identifying each key.
+        """
+        start = time.time()
+        self.backend.delete_many(
+            keys=[self._format_key(*entry) for entry in entries],
+        )
+        self._emit_operation(
+            'delete_many',
+            start,
+            [entry[0] for entry in entries],
+            [None] * len(entries),
+        )
+
+    def _emit_operation(self, operation, start, namespaces, values):
+        """
+        Report a cache operation, subject to sampling: its latency, the backend that served it, the
+        number of hits and misses of reads, and the total size of the values read or written. Each
+        namespace involved in the operation is reported separately.
+
+        :param operation: Name of the operation.
+        :param start: Unix timestamp at which the operation started.
+        :param namespaces: List of the namespace of each key involved in the operation.
+        :param values: List of the value of each key read or written by the operation, in the same
+                       order as the namespaces. For reads, None denotes a miss.
+        """
+        if not self.metrics_event or not namespaces:
+            return
+
+        duration = 1000.0 * (time.time() - start)
+        backend = self.backend.last_tier() if self.redis_backed else TIER_MEMORY
+        is_read = operation.startswith('get')
+
+        # Map of (namespace, result) to number of keys
+        results = collections.Counter()
+        # Map of namespace to total value size, in bytes
+        sizes = collections.Counter()
+        for namespace, value in zip(namespaces, values):
+            if is_read:
+                results[(namespace, 'miss' if value is None else 'hit')] += 1
+            else:
+                results[(namespace, 'write')] += 1
+            if isinstance(value, basestring):
+                sizes[namespace] += len(value)
+
+        for (namespace, result), count in results.iteritems():
+            self.metrics_event.emit_event(
+                'cache.operation',
+                {
+                    'namespace': namespace,
+                    'operation': operation,
+                    'backend': backend,
+                    'result': result,
+                },
+                count=count,
+                sample_rate=self.metrics_sample_rate,
+            )
+
+        for namespace, size in sizes.iteritems():
+            self.metrics_event.emit_event(
+                'cache.bytes',
+                {'namespace': namespace, 'operation': operation},
+                count=size,
+                sample_rate=self.metrics_sample_rate,
+            )
+
+        if self.metrics_latency:
+            for namespace in set(namespaces):
+                self.metrics_latency.emit_timing(
+                    'cache.operation',
+                    duration,
+                    {'namespace': namespace, 'operation': operation, 'backend': backend},
+                    sample_rate=self.metrics_sample_rate,
+                )
+
+    def _encode(self, value):
+        """
+        Encode a value for storage with the configured codec, if any.
+
+        :param value: Value to encode.
+        :return: The encoded value.
+        """
+        if self.codec is None:
+            return value
+
+        return self.codec.encode(value)
+
+    @staticmethod
+    def _decode(value):
+        """
+        Decode a stored value. Values that cannot be decoded are treated as absent.
+
+        :param value: Stored value.
+        :return: The decoded value, or None if it could not be decoded.
+        """
+        try:
+            return CacheCodec.decode(value)
+        except DECODE_ERRORS:
+            return None
 
     def _format_key(self, namespace, key, tags, delimiter=':'):
         """
@@ -263,13 +1642,37 @@ class CacheKeyRWClient:
     repeating the same key qualification arguments.
     """
 
-    def __init__(self, set_proxy, get_proxy, delete_proxy):
+    def __init__(self, set_proxy, get_proxy, delete_proxy, add_proxy, delete_if_equal_proxy):
         """
         Create a CacheKeyRWClient.
 
         :param set_proxy: Function that proxies the host set() method.
         :param get_proxy: Function that proxies the host get() method.
         :param delete_proxy: Function that proxies the host delete() method.
+        :param add_proxy: Function that proxies the host add() method.
+        :param delete_if_equal_proxy: Function that proxies the host delete_if_equal() method.
+        """
+        self.set = set_proxy
+        self.get = get_proxy
+        self.delete = delete_proxy
+        self.add = add_proxy
+        self.delete_if_equal = delete_if_equal_proxy
+
+
+class CacheBatchRWClient:
+    """
+    Simple object container that proxies batch read/write methods within the closure of the cache
+    client, analogous to CacheKeyRWClient for many keys at once.
+    """
+
+    def __init__(self, set_proxy, get_proxy, delete_proxy):
+        """
+        Create a CacheBatchRWClient.
+
+        :param set_proxy: Function that proxies the host set_many() method, taking a list of values
+                          in the same order as the keys, and a TTL.
+        :param get_proxy: Function that proxies the host get_many() method.
+        :param delete_proxy: Function that proxies the host delete_many() method.
         """
         self.set = set_proxy
         self.get = get_proxy
@@ -0,0 +1,289 @@
+import atexit
+import collections
+import json
+import os
+import threading
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+from orion.models.location import Location
+from orion.util.geocode import reverse_geocode_cache_entry
+
+# Sources from which the geocode cache is warmed, reported as a metric tag.
+SOURCE_SNAPSHOT = 'snapshot'
+SOURCE_DATABASE = 'database'
+
+
+class CacheWarmerClient(object):
+    """
+    Fills the reverse geocode cache at startup, so that a restart with an empty cache does not
+    translate into a burst of geocoding API calls. Addresses are loaded in the background, either
+    from a snapshot file of recently resolved addresses or from the most recently published
+    locations with a known address, in batches separated by a pause so that the database is not
+    overwhelmed. Recently resolved addresses are tracked so that they can be dumped to the snapshot
+    file periodically and on shutdown.
+    """
+
+    def __init__(
+        self,
+        cache,
+        db,
+        metrics_event,
+        metrics_gauge,
+        max_entries=0,
+        ttl_ms=24 * 60 * 60 * 1000,
+        batch_size=1000,
+        batch_interval_ms=100,
+        snapshot_path=None,
+        snapshot_interval_ms=5 * 60 * 1000,
+    ):
+        """
+        Create a cache warmer. If enabled, the cache is warmed in a background thread.
+
+        :param cache: CacheClient instance to warm.
+        :param db: SQLAlchemy database client from which addresses are loaded.
+        :param metrics_event: Event metrics client.
+        :param metrics_gauge: Gauge metrics client.
+        :param max_entries: Maximum number of distinct cache entries loaded at startup, and of
+                            recently resolved addresses dumped to the snapshot file. Zero disables
+                            the warmer.
+        :param ttl_ms: Time to live of loaded cache entries, in milliseconds.
+        :param batch_size: Number of addresses read and written to the cache at a time.
+        :param batch_interval_ms: Pause between batches, in milliseconds.
+        :param snapshot_path: Optional path to a snapshot file from which the cache is warmed in
+                              place of the database, if the file exists, and to which recently
+                              resolved addresses are dumped.
+        :param snapshot_interval_ms: Interval, in milliseconds, at which the snapshot file is
+                                     dumped. Zero dumps the snapshot file only on shutdown.
+        """
+        self.cache = cache
+        self.db = db
+        self.metrics_event = metrics_event
+        self.metrics_gauge = metrics_gauge
+        self.max_entries = max_entries
+        self.ttl_ms = ttl_ms
+        self.batch_size = batch_size
+        self.batch_interval_ms = batch_interval_ms
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval_ms = snapshot_interval_ms
+
+        # Map of geocode cache cells to the (lat, lon, address) most recently cached in them
+        self.lock = threading.Lock()
+        self.recent = collections.OrderedDict()
+        self.shutdown = threading.Event()
+
+        if self.enabled:
+            warmer = threading.Thread(target=self.warm, name='orion-cache-warmer')
+            warmer.daemon = True
+            warmer.start()
+
+            if snapshot_path:
+                if snapshot_interval_ms:
+                    dumper = threading.Thread(target=self._dump_loop, name='orion-cache-snapshot')
+                    dumper.daemon = True
+                    dumper.start()
+
+                atexit.register(self.close)
+
+    @property
+    def enabled(self):
+        """
+        Whether the cache warmer is enabled.
+
+        :return: True if a positive number of entries is configured; False otherwise.
+        """
+        return self.max_entries > 0
+
+    def warm(self):
+        """
+        Load addresses into the cache from the snapshot file, if it exists, or otherwise from the
+        database. Cache entries that already exist are left untouched.
+
+        :return: Number of cache entries written.
+        """
+        if self.snapshot_path and os.path.exists(self.snapshot_path):
+            source, batches = SOURCE_SNAPSHOT, self._read_snapshot()
+        else:
+            source, batches = SOURCE_DATABASE, self._read_db()
+
+        seen = set()
+        num_loaded = 0
+        num_written = 0
+
+        try:
+            for batch in batches:
+                entries = []
+                for lat, lon, address in batch:
+                    entry = reverse_geocode_cache_entry(lat, lon)
+                    cell = self._cell(entry)
+                    if cell not in seen and len(seen) < self.max_entries:
+                        seen.add(cell)
+                        entries.append((entry, (lat, lon, address)))
+
+                num_loaded += len(entries)
+                num_written += self._fill(entries)
+                self.metrics_gauge.emit_gauge('cache.warmup.loaded', num_loaded, {'source': source})
+
+                if len(seen) >= self.max_entries or self.shutdown.wait(
+                    self.batch_interval_ms / 1000.0,
+                ):
+                    break
+        except (SQLAlchemyError, IOError, ValueError):
+            self.metrics_event.emit_event('cache.warmup', {'source': source, 'outcome': 'error'})
+            return num_written
+
+        self.metrics_event.emit_event('cache.warmup', {'source': source, 'outcome': 'success'})
+        self.metrics_gauge.emit_gauge('cache.warmup.written', num_written, {'source': source})
+
+        return num_written
+
+    def record(self, lat, lon, address):
+        """
+        Track a newly resolved address, for inclusion in the next snapshot.
+
+        :param lat: Latitude of the coordinate.
+        :param lon: Longitude of the coordinate.
+        :param address: Resolved address of the coordinate.
+        """
+        cell = self._cell(reverse_geocode_cache_entry(lat, lon))
+
+        with self.lock:
+            self.recent.pop(cell, None)
+            self.recent[cell] = (lat, lon, address)
+
+            while len(self.recent) > self.max_entries:
+                self.recent.popitem(last=False)
+
+    def save_snapshot(self, path=None):
+        """
+        Dump recently resolved addresses to a snapshot file, most recent first. The file is
+        replaced atomically, so that a concurrent or interrupted dump never leaves it truncated.
+
+        :param path: Path of the snapshot file. Defaults to the configured snapshot path.
+        """
+        path = path or self.snapshot_path
+
+        with self.lock:
+            entries = list(reversed(self.recent.values()))
+
+        with open(path + '.tmp', 'w') as snapshot:
+            for entry in entries:
+                snapshot.write(json.dumps(entry) + '\n')
+
+        os.rename(path + '.tmp', path)
+        self.metrics_gauge.emit_gauge('cache.warmup.snapshot_size', len(entries))
+
+    def close(self):
+        """
+        Stop warming the cache and dump the snapshot file one last time.
+        """
+        if self.shutdown.is_set():
+            return
+
+        self.shutdown.set()
+        self.save_snapshot()
+
+    def _fill(self, entries):
+        """
+        Write a batch of addresses to the cache, skipping cache entries that already exist.
+
+        :param entries: List of ((namespace, key, tags), (lat, lon, address)) pairs.
+        :return: Number of cache entries written.
+        """
+        if not entries:
+            return 0
+
+        cache = self.cache.rw_batch_client([entry for entry, _ in entries])
+        missing = [
+            (entry, point)
+            for (entry, point), cached_value in zip(entries, cache.get())
+            if cached_value is None
+        ]
+
+        if missing:
+            self.cache.set_many(
+                [(entry, address) for entry, (_, _, address) in missing],
+                ttl=self.ttl_ms,
+            )
+
+        for _, (lat, lon, address) in entries:
+            self.record(lat, lon, address)
+
+        return len(missing)
+
+    def _read_snapshot(self):
+        """
+        Read addresses from the snapshot file, in batches.
+
+        :return: Generator of lists of (lat, lon, address) tuples.
+        """
+        with open(self.snapshot_path) as snapshot:
+            batch = []
+            for line in snapshot:
+                if line.strip():
+                    batch.append(tuple(json.loads(line)))
+                if len(batch) >= self.batch_size:
+                    yield batch
+                    batch = []
+
+            if batch:
+                yield batch
+
+    def _read_db(self):
+        """
+        Read the most recently published locations with a known address from the database, in
+        batches, most recent first. Each batch is a separate keyset-paginated query, so that no
+        long-running query or transaction is held open between batches.
+
+        :return: Generator of lists of (lat, lon, address) tuples.
+        """
+        last_location_id = None
+
+        while True:
+            query = select([
+                Location.location_id,
+                Location.latitude,
+                Location.longitude,
+                Location.address,
+            ]).where(
+                Location.address.isnot(None),
+            ).order_by(
+                Location.location_id.desc(),
+            ).limit(
+                self.batch_size,
+            )
+
+            if last_location_id is not None:
+                query = query.where(Location.location_id < last_location_id)
+
+            with self.db.engine.connect() as conn:
+                rows = conn.execute(query).fetchall()
+
+            if not rows:
+                return
+
+            yield [(lat, lon, address) for _, lat, lon, address in rows]
+            last_location_id = rows[-1][0]
+
+    def _dump_loop(self):
+        """
+        Dump the snapshot file at the configured interval, until shut down.
+        """
+        while not self.shutdown.wait(self.snapshot_interval_ms / 1000.0):
+            try:
+                self.save_snapshot()
+            except (IOError, OSError):
+                self.metrics_event.emit_event('cache.warmup.snapshot_error')
+
+    @staticmethod
+    def _cell(entry):
+        """
+        Identify the geocode cache cell of a cache entry.
+
+        :param entry: Tuple of (namespace, key, tags) qualifying the cache key.
+        :return: Hashable tuple of the cell's approximate (lat, lon).
+        """
+        _, _, tags = entry
+
+        return tags['lat'], tags['lon']
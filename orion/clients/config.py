@@ -15,6 +15,34 @@ def _get_recursive_config_key(config, key):
     return _get_recursive_config_key((config or {}).get(key[0]), key[1:]) if len(key) else config
 
 
+def _parse_bool(value):
+    """
+    Interpret a configuration value as a boolean. Environment variables are always strings, so
+    common truthy string representations are recognized explicitly.
+
+    :param value: Raw configuration value.
+    :return: The boolean interpretation of the value.
+    """
+    if isinstance(value, basestring):
+        return value.lower() in ('1', 'true', 'yes')
+
+    return bool(value)
+
+
+def _parse_list(value):
+    """
+    Interpret a configuration value as a list of strings. Environment variables are always strings,
+    so a comma-separated string is split into its elements.
+
+    :param value: Raw configuration value.
+    :return: List of non-empty string elements.
+    """
+    if isinstance(value, basestring):
+        value = value.split(',')
+
+    return [str(element).strip() for element in value if str(element).strip()]
+
+
 def _parse_config_json(path):
     """
     Parse the config file JSON into a Python dictionary.
@@ -76,13 +104,390 @@ class ConfigClient(object):
         'database.name': ConfigParam('DATABASE_NAME', required=True, transform=str),
         'database.user': ConfigParam('DATABASE_USER', required=True, transform=str),
         'database.password': ConfigParam('DATABASE_PASSWORD', required=True, transform=str),
+        'database.stream_batch_size': ConfigParam(
+            'DATABASE_STREAM_BATCH_SIZE',
+            default=1000,
+            required=False,
+            transform=int,
+        ),
         'kafka.addr': ConfigParam('KAFKA_ADDR', required=False, transform=str),
         'kafka.topic': ConfigParam('KAFKA_TOPIC', default='orion', required=False, transform=str),
-        'redis.addr': ConfigParam('REDIS_ADDR', required=False, transform=str),
+        'redis.addr': ConfigParam('REDIS_ADDR', required=False, transform=_parse_list),
         'statsd.addr': ConfigParam('STATSD_ADDR', required=False, transform=str),
         'frontend_url': ConfigParam('FRONTEND_URL', default='*', required=False, transform=str),
         'mapbox_access_token': ConfigParam('MAPBOX_ACCESS_TOKEN', required=False, transform=str),
         'sentry_dsn': ConfigParam('SENTRY_DSN', required=False, transform=str),
+        'redis.connect_timeout_ms': ConfigParam(
+            'REDIS_CONNECT_TIMEOUT_MS',
+            default=250,
+            required=False,
+            transform=int,
+        ),
+        'redis.socket_timeout_ms': ConfigParam(
+            'REDIS_SOCKET_TIMEOUT_MS',
+            default=250,
+            required=False,
+            transform=int,
+        ),
+        'redis.breaker_failure_threshold': ConfigParam(
+            'REDIS_BREAKER_FAILURE_THRESHOLD',
+            default=5,
+            required=False,
+            transform=int,
+        ),
+        'redis.breaker_cooldown_ms': ConfigParam(
+            'REDIS_BREAKER_COOLDOWN_MS',
+            default=10000,
+            required=False,
+            transform=int,
+        ),
+        'redis.resync_max_keys': ConfigParam(
+            'REDIS_RESYNC_MAX_KEYS',
+            default=0,
+            required=False,
+            transform=int,
+        ),
+        'redis.virtual_nodes': ConfigParam(
+            'REDIS_VIRTUAL_NODES',
+            default=160,
+            required=False,
+            transform=int,
+        ),
+        'cache.memory.num_shards': ConfigParam(
+            'CACHE_MEMORY_NUM_SHARDS',
+            default=16,
+            required=False,
+            transform=int,
+        ),
+        'cache.memory.max_entries': ConfigParam(
+            'CACHE_MEMORY_MAX_ENTRIES',
+            default=100000,
+            required=False,
+            transform=int,
+        ),
+        'cache.memory.max_bytes': ConfigParam(
+            'CACHE_MEMORY_MAX_BYTES',
+            default=None,
+            required=False,
+            transform=int,
+        ),
+        'cache.memory.sweep_interval_ms': ConfigParam(
+            'CACHE_MEMORY_SWEEP_INTERVAL_MS',
+            default=1000,
+            required=False,
+            transform=int,
+        ),
+        'cache.memory.sweep_chunk_size': ConfigParam(
+            'CACHE_MEMORY_SWEEP_CHUNK_SIZE',
+            default=100,
+            required=False,
+            transform=int,
+        ),
+        'cache.codec.format': ConfigParam('CACHE_CODEC_FORMAT', required=False, transform=str),
+        'cache.codec.compression': ConfigParam(
+            'CACHE_CODEC_COMPRESSION',
+            default='none',
+            required=False,
+            transform=str,
+        ),
+        'cache.codec.compression_threshold': ConfigParam(
+            'CACHE_CODEC_COMPRESSION_THRESHOLD',
+            default=256,
+            required=False,
+            transform=int,
+        ),
+        'cache.near.ttl_ms': ConfigParam(
+            'CACHE_NEAR_TTL_MS',
+            default=0,
+            required=False,
+            transform=int,
+        ),
+        'cache.near.max_entries': ConfigParam(
+            'CACHE_NEAR_MAX_ENTRIES',
+            default=10000,
+            required=False,
+            transform=int,
+        ),
+        'cache.near.invalidation': ConfigParam(
+            'CACHE_NEAR_INVALIDATION',
+            default=False,
+            required=False,
+            transform=_parse_bool,
+        ),
+        'cache.metrics.sample_rate': ConfigParam(
+            'CACHE_METRICS_SAMPLE_RATE',
+            default=1.0,
+            required=False,
+            transform=float,
+        ),
+        'cache.warmup.max_entries': ConfigParam(
+            'CACHE_WARMUP_MAX_ENTRIES',
+            default=0,
+            required=False,
+            transform=int,
+        ),
+        'cache.warmup.batch_size': ConfigParam(
+            'CACHE_WARMUP_BATCH_SIZE',
+            default=1000,
+            required=False,
+            transform=int,
+        ),
+        'cache.warmup.batch_interval_ms': ConfigParam(
+            'CACHE_WARMUP_BATCH_INTERVAL_MS',
+            default=100,
+            required=False,
+            transform=int,
+        ),
+        'cache.warmup.snapshot_path': ConfigParam(
+            'CACHE_WARMUP_SNAPSHOT_PATH',
+            required=False,
+            transform=str,
+        ),
+        'cache.warmup.snapshot_interval_ms': ConfigParam(
+            'CACHE_WARMUP_SNAPSHOT_INTERVAL_MS',
+            default=5 * 60 * 1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.pool_size': ConfigParam(
+            'GEOCODE_POOL_SIZE',
+            default=10,
+            required=False,
+            transform=int,
+        ),
+        'geocode.connect_timeout_ms': ConfigParam(
+            'GEOCODE_CONNECT_TIMEOUT_MS',
+            default=1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.read_timeout_ms': ConfigParam(
+            'GEOCODE_READ_TIMEOUT_MS',
+            default=2000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.max_retries': ConfigParam(
+            'GEOCODE_MAX_RETRIES',
+            default=2,
+            required=False,
+            transform=int,
+        ),
+        'geocode.retry_backoff_ms': ConfigParam(
+            'GEOCODE_RETRY_BACKOFF_MS',
+            default=100,
+            required=False,
+            transform=int,
+        ),
+        'geocode.rate_limit.qps': ConfigParam(
+            'GEOCODE_RATE_LIMIT_QPS',
+            default=0,
+            required=False,
+            transform=float,
+        ),
+        'geocode.rate_limit.burst': ConfigParam(
+            'GEOCODE_RATE_LIMIT_BURST',
+            default=0,
+            required=False,
+            transform=int,
+        ),
+        'geocode.rate_limit.live_reserve': ConfigParam(
+            'GEOCODE_RATE_LIMIT_LIVE_RESERVE',
+            default=0.5,
+            required=False,
+            transform=float,
+        ),
+        'geocode.rate_limit.bulk_wait_ms': ConfigParam(
+            'GEOCODE_RATE_LIMIT_BULK_WAIT_MS',
+            default=1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.rate_limit.shared': ConfigParam(
+            'GEOCODE_RATE_LIMIT_SHARED',
+            default=False,
+            required=False,
+            transform=_parse_bool,
+        ),
+        'geocode.breaker_failure_threshold': ConfigParam(
+            'GEOCODE_BREAKER_FAILURE_THRESHOLD',
+            default=5,
+            required=False,
+            transform=int,
+        ),
+        'geocode.breaker_cooldown_ms': ConfigParam(
+            'GEOCODE_BREAKER_COOLDOWN_MS',
+            default=30000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.cache_ttl_ms': ConfigParam(
+            'GEOCODE_CACHE_TTL_MS',
+            default=24 * 60 * 60 * 1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.not_found_ttl_ms': ConfigParam(
+            'GEOCODE_NOT_FOUND_TTL_MS',
+            default=60 * 60 * 1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.failure_ttl_ms': ConfigParam(
+            'GEOCODE_FAILURE_TTL_MS',
+            default=60 * 1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.local.radius_m': ConfigParam(
+            'GEOCODE_LOCAL_RADIUS_M',
+            default=0,
+            required=False,
+            transform=float,
+        ),
+        'geocode.local.snapshot_path': ConfigParam(
+            'GEOCODE_LOCAL_SNAPSHOT_PATH',
+            default=None,
+            required=False,
+        ),
+        'geocode.local.rebuild_threshold': ConfigParam(
+            'GEOCODE_LOCAL_REBUILD_THRESHOLD',
+            default=10000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.spatial_cache.radius_m': ConfigParam(
+            'GEOCODE_SPATIAL_CACHE_RADIUS_M',
+            default=0,
+            required=False,
+            transform=float,
+        ),
+        'geocode.spatial_cache.max_cell_entries': ConfigParam(
+            'GEOCODE_SPATIAL_CACHE_MAX_CELL_ENTRIES',
+            default=64,
+            required=False,
+            transform=int,
+        ),
+        'geocode.suppression.distance_m': ConfigParam(
+            'GEOCODE_SUPPRESSION_DISTANCE_M',
+            default=0,
+            required=False,
+            transform=float,
+        ),
+        'geocode.suppression.shared': ConfigParam(
+            'GEOCODE_SUPPRESSION_SHARED',
+            default=False,
+            required=False,
+            transform=_parse_bool,
+        ),
+        'geocode.suppression.ttl_ms': ConfigParam(
+            'GEOCODE_SUPPRESSION_TTL_MS',
+            default=60 * 60 * 1000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.singleflight.distributed': ConfigParam(
+            'GEOCODE_SINGLEFLIGHT_DISTRIBUTED',
+            default=False,
+            required=False,
+            transform=_parse_bool,
+        ),
+        'geocode.singleflight.lock_ttl_ms': ConfigParam(
+            'GEOCODE_SINGLEFLIGHT_LOCK_TTL_MS',
+            default=5000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.singleflight.poll_interval_ms': ConfigParam(
+            'GEOCODE_SINGLEFLIGHT_POLL_INTERVAL_MS',
+            default=50,
+            required=False,
+            transform=int,
+        ),
+        'geocode.async.enabled': ConfigParam(
+            'GEOCODE_ASYNC_ENABLED',
+            default=False,
+            required=False,
+            transform=_parse_bool,
+        ),
+        'geocode.async.num_workers': ConfigParam(
+            'GEOCODE_ASYNC_NUM_WORKERS',
+            default=4,
+            required=False,
+            transform=int,
+        ),
+        'geocode.async.queue_size': ConfigParam(
+            'GEOCODE_ASYNC_QUEUE_SIZE',
+            default=10000,
+            required=False,
+            transform=int,
+        ),
+        'geocode.async.batch_size': ConfigParam(
+            'GEOCODE_ASYNC_BATCH_SIZE',
+            default=100,
+            required=False,
+            transform=int,
+        ),
+        'geocode.async.flush_interval_ms': ConfigParam(
+            'GEOCODE_ASYNC_FLUSH_INTERVAL_MS',
+            default=1000,
+            required=False,
+            transform=int,
+        ),
+        'write_behind.enabled': ConfigParam(
+            'WRITE_BEHIND_ENABLED',
+            default=False,
+            required=False,
+            transform=_parse_bool,
+        ),
+        'write_behind.durability': ConfigParam(
+            'WRITE_BEHIND_DURABILITY',
+            default='enqueue',
+            required=False,
+            transform=str,
+        ),
+        'write_behind.batch_size': ConfigParam(
+            'WRITE_BEHIND_BATCH_SIZE',
+            default=500,
+            required=False,
+            transform=int,
+        ),
+        'write_behind.flush_interval_ms': ConfigParam(
+            'WRITE_BEHIND_FLUSH_INTERVAL_MS',
+            default=50,
+            required=False,
+            transform=int,
+        ),
+        'write_behind.queue_size': ConfigParam(
+            'WRITE_BEHIND_QUEUE_SIZE',
+            default=10000,
+            required=False,
+            transform=int,
+        ),
+        'write_behind.enqueue_timeout_ms': ConfigParam(
+            'WRITE_BEHIND_ENQUEUE_TIMEOUT_MS',
+            default=100,
+            required=False,
+            transform=int,
+        ),
+        'write_behind.flush_timeout_ms': ConfigParam(
+            'WRITE_BEHIND_FLUSH_TIMEOUT_MS',
+            default=5000,
+            required=False,
+            transform=int,
+        ),
+        'response_cache.ttl_ms': ConfigParam(
+            'RESPONSE_CACHE_TTL_MS',
+            default=0,
+            required=False,
+            transform=int,
+        ),
+        'response_cache.historical_ttl_ms': ConfigParam(
+            'RESPONSE_CACHE_HISTORICAL_TTL_MS',
+            default=24 * 60 * 60 * 1000,
+            required=False,
+            transform=int,
+        ),
     }
 
     def __init__(self, path=DEFAULT_CONFIG_PATH):
@@ -1,6 +1,40 @@
+import random
+import time
 import urllib
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from orion.clients.metrics import EventMetricsClient
+from orion.clients.metrics import GaugeMetricsClient
+from orion.clients.metrics import LatencyMetricsClient
+from orion.clients.rate_limit import PRIORITY_LIVE
+from orion.util.circuit_breaker import CircuitBreaker
+from orion.util.circuit_breaker import STATE_CLOSED
+from orion.util.circuit_breaker import STATE_HALF_OPEN
+from orion.util.circuit_breaker import STATE_OPEN
+
+# Numerical gauge values describing each circuit breaker state.
+BREAKER_STATE_GAUGE_VALUES = {
+    STATE_CLOSED: 0,
+    STATE_HALF_OPEN: 1,
+    STATE_OPEN: 2,
+}
+
+
+class ReverseGeocodingException(Exception):
+    """
+    Exception raised when a reverse geocoding lookup fails, as opposed to succeeding with no result.
+    """
+    pass
+
+
+class RateLimitBudgetExhaustedException(ReverseGeocodingException):
+    """
+    Exception raised when a reverse geocoding lookup is rejected by the rate limiter before any
+    request is made. This says nothing about the coordinate or the health of the API.
+    """
+    pass
 
 
 class ReverseGeocodingClient(object):
@@ -8,14 +42,60 @@ class ReverseGeocodingClient(object):
     Client for looking up the address of a coordinate using the Mapbox API.
     """
 
-    def __init__(self, mapbox_access_token=None):
+    def __init__(
+        self,
+        mapbox_access_token=None,
+        metrics_event=None,
+        metrics_gauge=None,
+        metrics_latency=None,
+        rate_limiter=None,
+        pool_size=10,
+        connect_timeout_ms=1000,
+        read_timeout_ms=2000,
+        max_retries=2,
+        retry_backoff_ms=100,
+        breaker_failure_threshold=5,
+        breaker_cooldown_ms=30000,
+    ):
         """
-        Create a reverse geocoding client instance.
+        Create a reverse geocoding client instance. All requests share a pooled keep-alive HTTP
+        session, so that the TCP and TLS handshakes with the API are amortized across lookups.
 
         :param mapbox_access_token: Mapbox access token. If not supplied, all reverse geocoding
                                     calls will skip the API call and return None.
+        :param metrics_event: Optional event metrics client.
+        :param metrics_gauge: Optional gauge metrics client.
+        :param metrics_latency: Optional latency metrics client.
+        :param rate_limiter: Optional RateLimiterClient budgeting requests to the API.
+        :param pool_size: Maximum number of keep-alive connections to the API.
+        :param connect_timeout_ms: Timeout for establishing a connection, in milliseconds.
+        :param read_timeout_ms: Timeout for reading the response, in milliseconds.
+        :param max_retries: Maximum number of retries for a request that fails with a connection
+                            error, a timeout, or a server error.
+        :param retry_backoff_ms: Base exponential backoff between retries, in milliseconds. The
+                                 actual delay is chosen uniformly at random up to the backoff.
+        :param breaker_failure_threshold: Number of consecutive failed or rate-limited requests
+                                          after which API calls are suspended.
+        :param breaker_cooldown_ms: Time, in milliseconds, for which API calls are suspended once
+                                    the failure threshold is reached.
         """
         self.mapbox_access_token = mapbox_access_token
+        self.metrics_event = metrics_event or EventMetricsClient(addr=None, prefix=None)
+        self.metrics_gauge = metrics_gauge or GaugeMetricsClient(addr=None, prefix=None)
+        self.metrics_latency = metrics_latency or LatencyMetricsClient(addr=None, prefix=None)
+        self.rate_limiter = rate_limiter
+        self.timeout = (connect_timeout_ms / 1000.0, read_timeout_ms / 1000.0)
+        self.max_retries = max_retries
+        self.retry_backoff_ms = retry_backoff_ms
+
+        self.session = requests.Session()
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+        self.breaker = CircuitBreaker(
+            failure_threshold=breaker_failure_threshold,
+            cooldown_ms=breaker_cooldown_ms,
+            on_state_change=self._emit_breaker_state,
+        )
 
     @property
     def _default_params(self):
@@ -23,19 +103,22 @@ class ReverseGeocodingClient(object):
             'access_token': self.mapbox_access_token,
         }
 
-    def reverse_geocode(self, lat, lon):
+    def reverse_geocode(self, lat, lon, priority=PRIORITY_LIVE):
         """
         Look up the formatted address of a coordinate expressed as a latitude and longitude.
 
         :param lat: Latitude of the coordinate to reverse geocode.
         :param lon: Longitude of the coordinate to reverse geocode.
+        :param priority: Priority class of the lookup, with respect to the rate limiter.
         :return: Dictionary describing reverse geocode metadata for this coordinate if available;
                  None otherwise.
+        :raises ReverseGeocodingException: If the lookup could not be completed.
         """
         data = self._geocode(
             mode='mapbox.places',
             query='{},{}'.format(lon, lat),
             params={'types': 'address'},
+            priority=priority,
         )
 
         if not data or not data['features']:
@@ -43,25 +126,105 @@ class ReverseGeocodingClient(object):
 
         return data['features'][0]
 
-    def _geocode(self, mode, query, params={}):
+    def _geocode(self, mode, query, params={}, priority=PRIORITY_LIVE):
         """
-        Execute a blocking request to the Mapbox geocoding API.
+        Execute a blocking request to the Mapbox geocoding API. Requests that fail with a connection
+        error, a timeout, another transport error, or a server error are retried with jittered
+        exponential backoff. No request is made while the circuit breaker is open, or once the rate
+        limiter's budget for the request's priority class is exhausted.
 
         :param mode: Geocoding mode/endpoint; for V5, one of 'mapbox.places' or
                      'mapbox.places-permanent'.
         :param query: Geocoding query to perform, as a string.
         :param params: Dictionary of parameters to the endpoint.
+        :param priority: Priority class of the request, with respect to the rate limiter.
+        :return: Parsed JSON response, or None if no access token is configured.
+        :raises RateLimitBudgetExhaustedException: If the request is rejected by the rate limiter.
+        :raises ReverseGeocodingException: If the request is rejected by the circuit breaker, fails
+                                           after all retries, or is otherwise unsuccessful.
         """
         if not self.mapbox_access_token:
             return
 
-        resp = requests.get(
-            url='https://api.mapbox.com/geocoding/v5/{mode}/{query}.json?{qs}'.format(
-                mode=mode,
-                query=query,
-                qs=urllib.urlencode(dict(self._default_params, **params)),
-            ),
+        url = 'https://api.mapbox.com/geocoding/v5/{mode}/{query}.json?{qs}'.format(
+            mode=mode,
+            query=query,
+            qs=urllib.urlencode(dict(self._default_params, **params)),
         )
 
-        if resp.status_code == 200:
-            return resp.json()
+        for attempt in range(self.max_retries + 1):
+            # The rate limiter is consulted first, so that a half-open breaker's probe is only
+            # permitted once the request is certain to be made.
+            if self.rate_limiter and not self.rate_limiter.acquire(priority):
+                raise RateLimitBudgetExhaustedException('Rate limit budget exhausted')
+
+            if not self.breaker.allow():
+                self.metrics_event.emit_event('geocode.breaker_rejected')
+                raise ReverseGeocodingException('Circuit breaker is open')
+
+            if attempt:
+                self.metrics_event.emit_event('geocode.api_retry')
+
+            try:
+                with self.metrics_latency.profile('geocode.api_call_ms'):
+                    resp = self.session.get(url=url, timeout=self.timeout)
+            except requests.RequestException:
+                # Besides connection errors and timeouts, this includes errors such as a truncated
+                # response, which must still be recorded so that a half-open probe is resolved.
+                self.breaker.record_failure()
+                self._backoff(attempt)
+                continue
+
+            if resp.status_code == 200:
+                try:
+                    data = resp.json()
+                except ValueError:
+                    # A successful status with a body that is not JSON, e.g. an error page served
+                    # by a proxy, is no more usable than a server error, and is not retried.
+                    self.metrics_event.emit_event('geocode.api_malformed_response')
+                    self.breaker.record_failure()
+                    raise ReverseGeocodingException('Malformed response body')
+
+                self.breaker.record_success()
+                return data
+
+            if resp.status_code == 429:
+                # Retrying a rate-limited request immediately only makes the problem worse; count it
+                # towards suspending API calls instead.
+                self.metrics_event.emit_event('geocode.api_rate_limited')
+                self.breaker.record_failure()
+                raise ReverseGeocodingException('Rate limited')
+
+            if resp.status_code >= 500:
+                self.breaker.record_failure()
+                self._backoff(attempt)
+                continue
+
+            # Other client errors (e.g. an invalid access token) will not succeed on retry, and do
+            # not indicate that the API itself is unhealthy.
+            self.breaker.record_success()
+            raise ReverseGeocodingException('Request failed with status {}'.format(
+                resp.status_code,
+            ))
+
+        raise ReverseGeocodingException('Request failed after {} attempts'.format(
+            self.max_retries + 1,
+        ))
+
+    def _backoff(self, attempt):
+        """
+        Sleep before retrying a failed request, unless no retries remain.
+
+        :param attempt: Zero-indexed number of the attempt that failed.
+        """
+        if attempt < self.max_retries:
+            time.sleep(random.uniform(0, self.retry_backoff_ms * 2 ** attempt) / 1000.0)
+
+    def _emit_breaker_state(self, state):
+        """
+        Report a circuit breaker state transition.
+
+        :param state: New breaker state.
+        """
+        self.metrics_event.emit_event('geocode.breaker_transition', {'state': state})
+        self.metrics_gauge.emit_gauge('geocode.breaker_state', BREAKER_STATE_GAUGE_VALUES[state])
@@ -0,0 +1,209 @@
+import Queue
+import atexit
+import threading
+
+from sqlalchemy import and_
+from sqlalchemy import bindparam
+
+from orion.models.location import Location
+from orion.util.batch import collect_batch
+
+
+class GeocodeWorkerPool(object):
+    """
+    Pool of background workers that reverse geocode already-persisted locations off the request
+    path. Worker threads resolve queued coordinates, and a single updater thread writes the resolved
+    addresses back to the database in batched UPDATE statements.
+    """
+
+    def __init__(
+        self,
+        db,
+        resolver,
+        metrics_event,
+        metrics_gauge,
+        metrics_latency,
+        enabled=False,
+        num_workers=4,
+        queue_size=10000,
+        batch_size=100,
+        flush_interval_ms=1000,
+        response_cache=None,
+    ):
+        """
+        Create a geocoding worker pool. The background threads are only started if enabled.
+
+        :param db: SQLAlchemy database client.
+        :param resolver: AddressResolver used to resolve coordinates through the geocode cache.
+        :param metrics_event: Event metrics client.
+        :param metrics_gauge: Gauge metrics client.
+        :param metrics_latency: Latency metrics client.
+        :param enabled: True to enable asynchronous geocoding.
+        :param num_workers: Number of concurrent geocoding worker threads.
+        :param queue_size: Maximum number of locations awaiting geocoding.
+        :param batch_size: Maximum number of addresses written in a single UPDATE batch.
+        :param flush_interval_ms: Maximum time, in milliseconds, that a resolved address waits for
+                                  its batch to fill before it is written.
+        :param response_cache: Optional ResponseCacheClient, whose cached responses for the devices
+                               of updated locations are invalidated after every batch.
+        """
+        self.db = db
+        self.resolver = resolver
+        self.metrics_event = metrics_event
+        self.metrics_gauge = metrics_gauge
+        self.metrics_latency = metrics_latency
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.response_cache = response_cache
+
+        self.pending = Queue.Queue(maxsize=queue_size)
+        self.resolved = Queue.Queue()
+        self.shutdown = threading.Event()
+        self.workers = [
+            threading.Thread(target=self._run_worker, name='orion-geocode-{}'.format(idx))
+            for idx in range(num_workers)
+        ]
+        self.updater = threading.Thread(target=self._run_updater, name='orion-geocode-updater')
+
+        if enabled:
+            for thread in self.workers + [self.updater]:
+                thread.daemon = True
+                thread.start()
+
+            atexit.register(self.close)
+
+    def submit(self, location):
+        """
+        Queue a persisted location for reverse geocoding. This never blocks; if the queue is full,
+        the location is dropped and keeps a null address.
+
+        :param location: Location model instance that has already been committed.
+        :return: True if the location was queued; False otherwise.
+        """
+        try:
+            self.pending.put_nowait(location)
+        except Queue.Full:
+            self.metrics_event.emit_event('geocode_worker.rejected')
+            return False
+
+        self.metrics_gauge.emit_gauge('geocode_worker.queue_depth', self.pending.qsize())
+        return True
+
+    def close(self):
+        """
+        Stop the worker threads and write all addresses that have already been resolved. Locations
+        still awaiting geocoding are abandoned with a null address.
+        """
+        if self.shutdown.is_set():
+            return
+
+        self.shutdown.set()
+
+        for thread in self.workers + [self.updater]:
+            if thread.is_alive():
+                thread.join()
+
+        self._drain()
+
+    def _run_worker(self):
+        """
+        Worker loop: resolve queued locations through the geocode cache until shut down.
+        """
+        while not self.shutdown.is_set():
+            try:
+                location = self.pending.get(timeout=self.flush_interval_ms / 1000.0)
+            except Queue.Empty:
+                continue
+
+            try:
+                address = self.resolver.resolve(location.latitude, location.longitude)
+            except Exception:
+                self.metrics_event.emit_event('geocode_worker.resolve_failure')
+                continue
+
+            if address is not None:
+                self.resolved.put((location, address))
+
+    def _run_updater(self):
+        """
+        Updater loop: write resolved addresses in batches until shut down.
+        """
+        while not self.shutdown.is_set():
+            batch = collect_batch(self.resolved, self.batch_size, self.flush_interval_ms)
+            if batch:
+                self._update(batch)
+
+    def _drain(self):
+        """
+        Synchronously write all resolved addresses remaining in the queue.
+        """
+        while True:
+            batch = collect_batch(
+                self.resolved,
+                self.batch_size,
+                self.flush_interval_ms,
+                block=False,
+            )
+            if not batch:
+                return
+
+            self._update(batch)
+
+    def _update(self, batch):
+        """
+        Write a batch of resolved addresses in a single transaction. Locations committed
+        synchronously are matched by primary key; locations committed through the write-behind
+        buffer have no known primary key and are matched by user, device, and timestamp instead.
+        Only rows whose address is still null are updated.
+
+        :param batch: List of (location, address) tuples.
+        """
+        self.metrics_gauge.emit_gauge('geocode_worker.queue_depth', self.pending.qsize())
+        self.metrics_gauge.emit_gauge('geocode_worker.update_batch_size', len(batch))
+
+        table = Location.__table__
+        by_id = [
+            {'_location_id': location.location_id, '_address': address}
+            for location, address in batch
+            if location.location_id is not None
+        ]
+        by_key = [
+            {
+                '_user': location.user,
+                '_device': location.device,
+                '_timestamp': location.timestamp,
+                '_address': address,
+            }
+            for location, address in batch
+            if location.location_id is None
+        ]
+
+        try:
+            with self.metrics_latency.profile('db.address_update_ms'):
+                with self.db.engine.begin() as conn:
+                    if by_id:
+                        conn.execute(
+                            table.update().where(and_(
+                                table.c.location_id == bindparam('_location_id'),
+                                table.c.address.is_(None),
+                            )).values(address=bindparam('_address')),
+                            by_id,
+                        )
+
+                    if by_key:
+                        conn.execute(
+                            table.update().where(and_(
+                                table.c.user == bindparam('_user'),
+                                table.c.device == bindparam('_device'),
+                                table.c.timestamp == bindparam('_timestamp'),
+                                table.c.address.is_(None),
+                            )).values(address=bindparam('_address')),
+                            by_key,
+                        )
+        except Exception:
+            self.metrics_event.emit_event('geocode_worker.update_failure')
+        else:
+            if self.response_cache and self.response_cache.enabled:
+                for user, device in set((loc.user, loc.device) for loc, _ in batch):
+                    self.response_cache.invalidate(user, device)
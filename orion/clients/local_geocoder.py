@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+
+from sqlalchemy import select
+
+from orion.models.location import Location
+from orion.util.geo import chord_to_m
+from orion.util.geo import m_to_chord
+from orion.util.geo import unit_vector
+from orion.util.kdtree import KDTree
+
+
+class LocalGeocoderClient(object):
+    """
+    Offline reverse geocoder answering nearest known address queries from an in-memory spatial
+    index of previously geocoded coordinates. The index is built in the background at startup,
+    either from a snapshot file or from all locations with a known address, and is refreshed
+    incrementally as new addresses are resolved.
+    """
+
+    def __init__(
+        self,
+        db,
+        metrics_event,
+        metrics_gauge,
+        radius_m=0,
+        snapshot_path=None,
+        rebuild_threshold=10000,
+    ):
+        """
+        Create a local geocoder. If enabled, the index is loaded in a background thread.
+
+        :param db: SQLAlchemy database client from which the index is loaded.
+        :param metrics_event: Event metrics client.
+        :param metrics_gauge: Gauge metrics client.
+        :param radius_m: Maximum distance, in meters, between a query coordinate and a known
+                         coordinate for the known address to be served. Zero disables the geocoder.
+        :param snapshot_path: Optional path to a snapshot file from which the index is loaded in
+                              place of the database, if the file exists.
+        :param rebuild_threshold: Number of incrementally added addresses after which the index is
+                                  rebuilt to include them. Until then, they are searched linearly.
+        """
+        self.db = db
+        self.metrics_event = metrics_event
+        self.metrics_gauge = metrics_gauge
+        self.radius_m = radius_m
+        self.snapshot_path = snapshot_path
+        self.rebuild_threshold = rebuild_threshold
+
+        self.lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        self.tree = KDTree([], [])
+        self.pending = []
+        self.rebuilding = False
+
+        if self.enabled:
+            loader = threading.Thread(target=self.load)
+            loader.daemon = True
+            loader.start()
+
+    @property
+    def enabled(self):
+        """
+        Whether local lookups are enabled.
+
+        :return: True if a positive radius is configured; False otherwise.
+        """
+        return self.radius_m > 0
+
+    def nearest(self, lat, lon):
+        """
+        Find the known address nearest to a coordinate, within the configured radius.
+
+        :param lat: Latitude of the query coordinate.
+        :param lon: Longitude of the query coordinate.
+        :return: Tuple of (address, distance in meters) for the nearest known coordinate, or None
+                 if no known coordinate lies within the radius.
+        """
+        point = unit_vector(lat, lon)
+        max_chord = m_to_chord(self.radius_m)
+
+        with self.lock:
+            tree = self.tree
+            pending = list(self.pending)
+
+        nearest = tree.nearest(point, max_chord)
+        for entry_point, entry in pending:
+            chord = sum((point[dim] - entry_point[dim]) ** 2 for dim in range(3)) ** 0.5
+            if chord <= max_chord and (nearest is None or chord < nearest[1]):
+                nearest = (entry, chord)
+
+        if nearest is None:
+            return None
+
+        (_, _, address), chord = nearest
+        return address, chord_to_m(chord)
+
+    def add(self, lat, lon, address):
+        """
+        Add a newly resolved address to the index. The index is rebuilt in the background once
+        enough addresses have been added.
+
+        :param lat: Latitude of the coordinate.
+        :param lon: Longitude of the coordinate.
+        :param address: Address of the coordinate.
+        """
+        with self.lock:
+            self.pending.append((unit_vector(lat, lon), (lat, lon, address)))
+            should_rebuild = len(self.pending) >= self.rebuild_threshold and not self.rebuilding
+            if should_rebuild:
+                self.rebuilding = True
+
+        if should_rebuild:
+            rebuilder = threading.Thread(target=self.rebuild)
+            rebuilder.daemon = True
+            rebuilder.start()
+
+    def load(self):
+        """
+        Replace the index with the contents of the snapshot file, if it exists, or otherwise with
+        all locations in the database that have a known address. Addresses added since startup are
+        retained.
+        """
+        with self.build_lock:
+            if self.snapshot_path and os.path.exists(self.snapshot_path):
+                entries = self._read_snapshot()
+            else:
+                entries = self._read_db()
+
+            tree = self._build(entries)
+
+            with self.lock:
+                self.tree = tree
+
+        self.metrics_event.emit_event('local_geocoder.load')
+        self.metrics_gauge.emit_gauge('local_geocoder.size', len(tree))
+
+    def rebuild(self):
+        """
+        Rebuild the index to include all incrementally added addresses.
+        """
+        with self.build_lock:
+            with self.lock:
+                entries = self.tree.values + [entry for _, entry in self.pending]
+                num_pending = len(self.pending)
+
+            tree = self._build(entries)
+
+            with self.lock:
+                self.tree = tree
+                self.pending = self.pending[num_pending:]
+                self.rebuilding = False
+
+        self.metrics_event.emit_event('local_geocoder.rebuild')
+        self.metrics_gauge.emit_gauge('local_geocoder.size', len(tree))
+
+    def save_snapshot(self, path):
+        """
+        Write all indexed addresses, including those not yet rebuilt into the index, to a snapshot
+        file.
+
+        :param path: Path of the snapshot file.
+        """
+        with self.lock:
+            entries = self.tree.values + [entry for _, entry in self.pending]
+
+        with open(path, 'w') as snapshot:
+            for entry in entries:
+                snapshot.write(json.dumps(entry) + '\n')
+
+    def _read_snapshot(self):
+        """
+        Read indexed addresses from the snapshot file.
+
+        :return: List of (lat, lon, address) tuples.
+        """
+        with open(self.snapshot_path) as snapshot:
+            return [tuple(json.loads(line)) for line in snapshot if line.strip()]
+
+    def _read_db(self):
+        """
+        Read all locations with a known address from the database.
+
+        :return: List of (lat, lon, address) tuples.
+        """
+        query = select([
+            Location.latitude,
+            Location.longitude,
+            Location.address,
+        ]).where(
+            Location.address.isnot(None),
+        )
+
+        with self.db.engine.connect() as conn:
+            result = conn.execution_options(stream_results=True).execute(query)
+            return [(lat, lon, address) for lat, lon, address in result]
+
+    @staticmethod
+    def _build(entries):
+        """
+        Build an index over a list of addresses. Where a coordinate appears more than once, its
+        last address is kept.
+
+        :param entries: List of (lat, lon, address) tuples.
+        :return: KDTree instance whose values are (lat, lon, address) tuples.
+        """
+        deduplicated = {(lat, lon): (lat, lon, address) for lat, lon, address in entries}.values()
+
+        return KDTree(
+            points=[unit_vector(lat, lon) for lat, lon, _ in deduplicated],
+            values=deduplicated,
+        )
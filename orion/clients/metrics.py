@@ -77,18 +77,48 @@ class EventMetricsClient(MetricsClient):
     Metrics client that provides imperative APIs for emitting metrics when events occur.
     """
 
-    def emit_event(self, metric, tags={}):
+    def emit_event(self, metric, tags={}, count=1, sample_rate=1):
         """
         Emit a record of an event occurrence. Semantically, the value of this event is monotonically
         increasing.
 
         :param metric: Metric name.
         :param tags: Dictionary of additional tags to include.
+        :param count: Number of occurrences of the event.
+        :param sample_rate: Probability with which the emission is sent. The statsd server scales
+                            sampled counts back up accordingly.
         """
-        self.backend.incr(self._format_metric(
-            metric='event.{}'.format(metric),
-            tags=dict(self._default_tags, **tags),
-        ))
+        self.backend.incr(
+            self._format_metric(
+                metric='event.{}'.format(metric),
+                tags=dict(self._default_tags, **tags),
+            ),
+            count,
+            rate=sample_rate,
+        )
+
+
+class GaugeMetricsClient(MetricsClient):
+    """
+    Metrics client that provides APIs for reporting the instantaneous value of a quantity.
+    """
+
+    def emit_gauge(self, metric, value, tags={}):
+        """
+        Emit the current value of a gauge. Semantically, the value of this gauge is an absolute
+        measurement that may increase or decrease over time.
+
+        :param metric: Metric name.
+        :param value: Numerical value of the gauge.
+        :param tags: Dictionary of additional tags to include.
+        """
+        self.backend.gauge(
+            self._format_metric(
+                metric='gauge.{}'.format(metric),
+                tags=dict(self._default_tags, **tags),
+            ),
+            value,
+        )
 
 
 class LatencyMetricsClient(MetricsClient):
@@ -106,16 +136,28 @@ class LatencyMetricsClient(MetricsClient):
         :return: Context manager for measuring execution duration and emitting metrics.
         """
         def emission_proxy(duration):
-            self.backend.timing(
-                stat=self._format_metric(
-                    metric='latency.{}'.format(metric),
-                    tags=dict(self._default_tags, **tags),
-                ),
-                delta=duration,
-            )
+            self.emit_timing(metric, duration, tags)
 
         return ExecutionTimer(emission_proxy)
 
+    def emit_timing(self, metric, duration, tags={}, sample_rate=1):
+        """
+        Emit a timing metric describing the latency of an already completed operation.
+
+        :param metric: Metric name.
+        :param duration: Duration of the operation, in milliseconds.
+        :param tags: Dictionary of additional tags to include.
+        :param sample_rate: Probability with which the emission is sent.
+        """
+        self.backend.timing(
+            stat=self._format_metric(
+                metric='latency.{}'.format(metric),
+                tags=dict(self._default_tags, **tags),
+            ),
+            delta=duration,
+            rate=sample_rate,
+        )
+
 
 class ExecutionTimer(object):
     """
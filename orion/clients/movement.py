@@ -0,0 +1,145 @@
+import json
+
+from orion.clients.cache import CacheException
+from orion.clients.cache import MemoryTTLCache
+from orion.util.geo import haversine_m
+
+# Outcomes of a suppression check, reported as a metric tag.
+OUTCOME_SUPPRESSED = 'suppressed'
+OUTCOME_NO_STATE = 'no_state'
+OUTCOME_MOVED = 'moved'
+OUTCOME_OUTSIDE_ACCURACY = 'outside_accuracy'
+
+
+class MovementSuppressionClient(object):
+    """
+    Tracks the last reverse geocoded point of every device, so that the address of a device that
+    has not meaningfully moved since can be reused without a geocoding lookup. State is kept in
+    memory, and is optionally backed by the shared cache so that it survives restarts and is shared
+    across server processes.
+    """
+
+    def __init__(self, cache, metrics_event, distance_m=0, shared=False, ttl_ms=60 * 60 * 1000):
+        """
+        Create a movement suppression client.
+
+        :param cache: CacheClient instance backing the in-memory state, if shared.
+        :param metrics_event: Event metrics client.
+        :param distance_m: Maximum distance, in meters, that a device may move from its last
+                           geocoded point for the point's address to be reused. Zero disables
+                           suppression.
+        :param shared: True to back the in-memory state with the shared cache.
+        :param ttl_ms: Time to live of a device's last geocoded point, in milliseconds.
+        """
+        self.cache = cache
+        self.metrics_event = metrics_event
+        self.distance_m = distance_m
+        self.shared = shared
+        self.ttl_ms = ttl_ms
+
+        self.local = MemoryTTLCache()
+
+    @property
+    def enabled(self):
+        """
+        Whether suppression is enabled.
+
+        :return: True if a positive distance is configured; False otherwise.
+        """
+        return self.distance_m > 0
+
+    def last_address(self, user, device, lat, lon, accuracy=None):
+        """
+        Retrieve the address of a device's last geocoded point, if the device's new point is close
+        enough to it. The new point must be within the configured distance of the last point and,
+        if the device reports its accuracy, also within the accuracy radius.
+
+        :param user: Associated username.
+        :param device: User's device name.
+        :param lat: Latitude of the new point.
+        :param lon: Longitude of the new point.
+        :param accuracy: Optional device-reported accuracy of the new point, in meters.
+        :return: The address of the last geocoded point if it can be reused; None otherwise.
+        """
+        state = self._get_state(user, device)
+        if state is None:
+            return self._outcome(OUTCOME_NO_STATE)
+
+        last_lat, last_lon, address = state
+        distance = haversine_m(lat, lon, last_lat, last_lon)
+
+        if distance > self.distance_m:
+            return self._outcome(OUTCOME_MOVED)
+
+        if accuracy is not None and distance > accuracy:
+            return self._outcome(OUTCOME_OUTSIDE_ACCURACY)
+
+        return self._outcome(OUTCOME_SUPPRESSED, address)
+
+    def record(self, user, device, lat, lon, address):
+        """
+        Record a device's last geocoded point.
+
+        :param user: Associated username.
+        :param device: User's device name.
+        :param lat: Latitude of the geocoded point.
+        :param lon: Longitude of the geocoded point.
+        :param address: Resolved address of the point.
+        """
+        if user is None or device is None:
+            return
+
+        state = json.dumps([lat, lon, address])
+        self.local.set((user, device), state, self.ttl_ms)
+
+        if self.shared:
+            try:
+                self.cache.set(
+                    namespace='movement',
+                    key='last-geocoded-point',
+                    tags={'user': user, 'device': device},
+                    value=state,
+                    ttl=self.ttl_ms,
+                )
+            except CacheException:
+                pass
+
+    def _get_state(self, user, device):
+        """
+        Read a device's last geocoded point, preferring the in-memory state.
+
+        :param user: Associated username.
+        :param device: User's device name.
+        :return: Tuple of (lat, lon, address) for the last geocoded point, or None if unknown.
+        """
+        if user is None or device is None:
+            return None
+
+        state = self.local.get((user, device))
+
+        if state is None and self.shared:
+            try:
+                state = self.cache.get(
+                    namespace='movement',
+                    key='last-geocoded-point',
+                    tags={'user': user, 'device': device},
+                )
+            except CacheException:
+                pass
+
+        if not state:
+            return None
+
+        return tuple(json.loads(state))
+
+    def _outcome(self, outcome, address=None):
+        """
+        Report the outcome of a suppression check.
+
+        :param outcome: Outcome of the check.
+        :param address: Reused address, if the lookup was suppressed.
+        :return: The reused address, if any.
+        """
+        self.metrics_event.emit_event('geocode.suppression', {'outcome': outcome})
+
+        return address
@@ -0,0 +1,260 @@
+import threading
+import time
+
+import redis
+from redis.exceptions import RedisError
+
+from orion.util.hash_ring import HashRing
+
+# Requests serving a live publish, which are granted the budget first.
+PRIORITY_LIVE = 'live'
+# Requests serving a batch publish or a backfill, which may only use the budget not reserved for
+# live requests.
+PRIORITY_BULK = 'bulk'
+
+# Atomically refill a token bucket stored in a Redis hash and take a token from it, if at least the
+# required number of tokens is available. Returns whether a token was taken, and the number of
+# tokens remaining, as a string to avoid truncation to an integer.
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local required = tonumber(ARGV[4])
+local ttl = tonumber(ARGV[5])
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= required then
+    tokens = tokens - 1
+    allowed = 1
+end
+
+redis.call('HMSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(math.max(ts, now)))
+redis.call('PEXPIRE', KEYS[1], ttl)
+
+return {allowed, tostring(tokens)}
+"""
+
+
+class LocalTokenBucket(object):
+    """
+    Thread-safe token bucket local to the process.
+    """
+
+    def __init__(self, capacity, rate):
+        """
+        Create a full token bucket.
+
+        :param capacity: Maximum number of tokens in the bucket.
+        :param rate: Number of tokens added to the bucket per millisecond.
+        """
+        self.capacity = capacity
+        self.rate = rate
+
+        self.lock = threading.Lock()
+        self.tokens = capacity
+        self.ts = self._epoch()
+
+    def take(self, required):
+        """
+        Refill the bucket and take a token from it, if at least the required number of tokens is
+        available.
+
+        :param required: Minimum number of tokens that must be available.
+        :return: Tuple of (whether a token was taken, number of tokens remaining).
+        """
+        with self.lock:
+            now = self._epoch()
+            self.tokens = min(self.capacity, self.tokens + max(0, now - self.ts) * self.rate)
+            self.ts = max(self.ts, now)
+
+            if self.tokens < required:
+                return False, self.tokens
+
+            self.tokens -= 1
+            return True, self.tokens
+
+    @staticmethod
+    def _epoch():
+        """
+        Retrieve the current Unix timestamp in milliseconds.
+
+        :return: Epoch time as a float, in milliseconds.
+        """
+        return 1000 * time.time()
+
+
+class RedisTokenBucket(object):
+    """
+    Token bucket stored in Redis, shared by all processes using the same key. Falls back to a local
+    token bucket if Redis fails, replies with an error, or is otherwise unavailable.
+    """
+
+    def __init__(
+        self,
+        addr,
+        key,
+        capacity,
+        rate,
+        connect_timeout_ms=None,
+        socket_timeout_ms=None,
+    ):
+        """
+        Create a token bucket in Redis.
+
+        :param addr: Address of the Redis cluster.
+        :param key: Raw key of the bucket.
+        :param capacity: Maximum number of tokens in the bucket.
+        :param rate: Number of tokens added to the bucket per millisecond.
+        :param connect_timeout_ms: Optional timeout for connecting to Redis, in milliseconds.
+        :param socket_timeout_ms: Optional timeout for a Redis operation, in milliseconds.
+        """
+        ip, port = addr.split(':')
+
+        self.key = key
+        self.capacity = capacity
+        self.rate = rate
+
+        self.local = LocalTokenBucket(capacity, rate)
+        self.redis = redis.Redis(
+            host=ip,
+            port=port,
+            socket_connect_timeout=connect_timeout_ms and connect_timeout_ms / 1000.0,
+            socket_timeout=socket_timeout_ms and socket_timeout_ms / 1000.0,
+        )
+        self.script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+
+    def take(self, required):
+        """
+        Refill the bucket and take a token from it, if at least the required number of tokens is
+        available.
+
+        :param required: Minimum number of tokens that must be available.
+        :return: Tuple of (whether a token was taken, number of tokens remaining).
+        """
+        # The bucket expires once it would have been refilled completely anyway
+        ttl = int(self.capacity / self.rate) + 1000
+
+        try:
+            allowed, tokens = self.script(
+                keys=[self.key],
+                args=[self.capacity, self.rate, LocalTokenBucket._epoch(), required, ttl],
+            )
+            return bool(allowed), float(tokens)
+        except RedisError:
+            return self.local.take(required)
+
+
+class RateLimiterClient(object):
+    """
+    Token bucket rate limiter with two priority classes. A fraction of the bucket's capacity is
+    reserved for live requests: bulk requests are only granted a token while the bucket holds more
+    than the reserve, and otherwise wait for it to refill, up to a deadline.
+    """
+
+    def __init__(
+        self,
+        addr,
+        prefix,
+        metrics_event,
+        metrics_gauge,
+        qps=0,
+        burst=0,
+        live_reserve=0.5,
+        bulk_wait_ms=1000,
+        shared=False,
+        redis_connect_timeout_ms=None,
+        redis_socket_timeout_ms=None,
+    ):
+        """
+        Create a rate limiter client.
+
+        :param addr: Address of the Redis cluster holding the shared bucket, if any, or list of
+                     addresses of Redis nodes, of which the node owning the bucket's key is used.
+        :param prefix: String prefix for the key of the shared bucket.
+        :param metrics_event: Event metrics client.
+        :param metrics_gauge: Gauge metrics client.
+        :param qps: Sustained number of requests permitted per second. Zero disables rate limiting.
+        :param burst: Capacity of the bucket, i.e. the maximum number of requests permitted in a
+                      burst. Defaults to one second's worth of requests.
+        :param live_reserve: Fraction of the bucket's capacity reserved for live requests.
+        :param bulk_wait_ms: Maximum time, in milliseconds, that a bulk request waits for a token.
+        :param shared: True to share the bucket across processes through Redis; False to use a
+                       separate bucket for each process.
+        :param redis_connect_timeout_ms: Optional timeout for connecting to Redis, in milliseconds.
+        :param redis_socket_timeout_ms: Optional timeout for a Redis operation, in milliseconds.
+        """
+        self.metrics_event = metrics_event
+        self.metrics_gauge = metrics_gauge
+        self.qps = qps
+        self.bulk_wait_ms = bulk_wait_ms
+
+        # Bulk requests must leave the reserve in the bucket, but are always able to take a token
+        # from a full bucket.
+        capacity = burst or max(1, qps)
+        self.required = {
+            PRIORITY_LIVE: 1,
+            PRIORITY_BULK: max(1, min(capacity, 1 + capacity * live_reserve)),
+        }
+
+        if addr and shared:
+            key = '{}:rate-limit:geocode'.format(prefix)
+            self.bucket = RedisTokenBucket(
+                addr=addr if isinstance(addr, basestring) else HashRing(addr).get_node(key),
+                key=key,
+                capacity=capacity,
+                rate=qps / 1000.0,
+                connect_timeout_ms=redis_connect_timeout_ms,
+                socket_timeout_ms=redis_socket_timeout_ms,
+            )
+        else:
+            self.bucket = LocalTokenBucket(capacity=capacity, rate=qps / 1000.0)
+
+    @property
+    def enabled(self):
+        """
+        Whether rate limiting is enabled.
+
+        :return: True if a positive QPS budget is configured; False otherwise.
+        """
+        return self.qps > 0
+
+    def acquire(self, priority=PRIORITY_LIVE):
+        """
+        Acquire a token for a single request. Live requests never wait; bulk requests wait for a
+        token up to the configured deadline.
+
+        :param priority: Priority class of the request.
+        :return: True if the request is permitted; False if it should be rejected.
+        """
+        if not self.enabled:
+            return True
+
+        deadline = time.time() + self.bulk_wait_ms / 1000.0
+        queued = False
+
+        while True:
+            allowed, tokens = self.bucket.take(self.required[priority])
+            self.metrics_gauge.emit_gauge('geocode.rate_limit.tokens', tokens)
+
+            if allowed:
+                outcome = 'queued' if queued else 'allowed'
+                break
+
+            if priority == PRIORITY_LIVE or time.time() >= deadline:
+                outcome = 'rejected'
+                break
+
+            queued = True
+            time.sleep(max(0, min(1.0 / self.qps, deadline - time.time())))
+
+        self.metrics_event.emit_event('geocode.rate_limit', {
+            'priority': priority,
+            'outcome': outcome,
+        })
+
+        return allowed
@@ -0,0 +1,127 @@
+import hashlib
+import json
+import uuid
+
+# Namespaces of the per-device version tokens, and of the cached responses.
+VERSION_NAMESPACE = 'response-version'
+RESPONSE_NAMESPACE = 'response'
+
+
+class ResponseCacheClient(object):
+    """
+    Cache of location query responses, keyed by the query's parameters and by a version token of
+    the queried user's device. Every write of the device's locations replaces the version token,
+    so that all responses cached for the device become unreachable at once, without scanning for
+    or deleting them; they are left to expire.
+    """
+
+    def __init__(self, cache, ttl_ms=0, historical_ttl_ms=24 * 60 * 60 * 1000):
+        """
+        Create a response cache client.
+
+        :param cache: CacheClient instance in which version tokens and responses are stored.
+        :param ttl_ms: Time to live of a cached response, in milliseconds. Zero disables the cache.
+        :param historical_ttl_ms: Time to live, in milliseconds, of a cached response to a query
+                                  whose time range lies entirely in the past.
+        """
+        self.cache = cache
+        self.ttl_ms = ttl_ms
+        self.historical_ttl_ms = historical_ttl_ms
+
+    @property
+    def enabled(self):
+        """
+        Whether the response cache is enabled.
+
+        :return: True if a positive TTL is configured; False otherwise.
+        """
+        return self.ttl_ms > 0
+
+    def version(self, user, device):
+        """
+        Read the current version token of a device, creating one if none exists. The version must be
+        read before querying the database, so that a response is never cached under a version
+        created by a write that the response does not reflect.
+
+        :param user: Associated username.
+        :param device: User's device name.
+        :return: Version token string.
+        """
+        version = self.cache.get(
+            namespace=VERSION_NAMESPACE,
+            key='device',
+            tags={'device': self._digest([user, device])},
+        )
+
+        return version or self.invalidate(user, device)
+
+    def invalidate(self, user, device):
+        """
+        Replace the version token of a device, invalidating all responses cached for it.
+
+        :param user: Associated username.
+        :param device: User's device name.
+        :return: New version token string.
+        """
+        version = uuid.uuid4().hex
+
+        # The token outlives every response cached under it
+        self.cache.set(
+            namespace=VERSION_NAMESPACE,
+            key='device',
+            tags={'device': self._digest([user, device])},
+            value=version,
+            ttl=max(self.ttl_ms, self.historical_ttl_ms),
+        )
+
+        return version
+
+    def get(self, version, params):
+        """
+        Read a cached response.
+
+        :param version: Version token of the queried device.
+        :param params: Dictionary of the query's resolved parameters.
+        :return: The cached response data, or None if the response is not cached.
+        """
+        serialized = self.cache.get(
+            namespace=RESPONSE_NAMESPACE,
+            key='locations',
+            tags={'version': version, 'params': self._digest(params)},
+        )
+
+        if not serialized:
+            return None
+
+        try:
+            return json.loads(serialized)
+        except ValueError:
+            return None
+
+    def set(self, version, params, data, historical=False):
+        """
+        Cache a response.
+
+        :param version: Version token of the queried device, read before the query.
+        :param params: Dictionary of the query's resolved parameters.
+        :param data: JSON-serializable response data.
+        :param historical: True if the query's time range lies entirely in the past.
+        """
+        self.cache.set(
+            namespace=RESPONSE_NAMESPACE,
+            key='locations',
+            tags={'version': version, 'params': self._digest(params)},
+            value=json.dumps(data),
+            ttl=self.historical_ttl_ms if historical else self.ttl_ms,
+        )
+
+    @staticmethod
+    def _digest(value):
+        """
+        Hash a JSON-serializable value into a string that is safe to use as a cache tag. Equal
+        dictionaries hash identically regardless of key order.
+
+        :param value: JSON-serializable value.
+        :return: Hex digest of the value.
+        """
+        return hashlib.md5(json.dumps(value, sort_keys=True)).hexdigest()
@@ -0,0 +1,140 @@
+import threading
+import time
+import uuid
+
+
+class SingleFlightCall(object):
+    """
+    State of a single in-flight call, shared between the caller performing it and any callers
+    waiting on its result.
+    """
+
+    def __init__(self):
+        """
+        Create an in-flight call.
+        """
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlightClient(object):
+    """
+    Coalesces concurrent computations of the same cache entry, so that only one caller performs an
+    expensive lookup while the others wait on its result. Calls are always coalesced within the
+    process; optionally, they are also coalesced across processes and hosts with a short-lived lock
+    held in the cache backend.
+    """
+
+    def __init__(
+        self,
+        cache,
+        metrics_event,
+        distributed=False,
+        lock_ttl_ms=5000,
+        poll_interval_ms=50,
+    ):
+        """
+        Create a single-flight client.
+
+        :param cache: CacheClient instance holding the results of coalesced calls.
+        :param metrics_event: Event metrics client.
+        :param distributed: True to also coalesce calls across processes with a cache lock.
+        :param lock_ttl_ms: Time to live of the cross-process lock, in milliseconds. This bounds
+                            how long other processes wait if the lock holder dies.
+        :param poll_interval_ms: Interval at which processes waiting on another process's lock
+                                 poll the cache for its result, in milliseconds.
+        """
+        self.cache = cache
+        self.metrics_event = metrics_event
+        self.distributed = distributed
+        self.lock_ttl_ms = lock_ttl_ms
+        self.poll_interval_ms = poll_interval_ms
+
+        self.lock = threading.Lock()
+        self.calls = {}
+
+    def do(self, namespace, key, tags, func):
+        """
+        Compute the value for a cache key, coalescing concurrent calls for the same key. The
+        function is responsible for caching its own result; callers coalesced across processes read
+        the result from the cache once the lock holder completes.
+
+        :param namespace: Namespace of the cache key.
+        :param key: The cache key itself.
+        :param tags: Dictionary of tags qualifying the cache key.
+        :param func: Nullary function that computes and caches the value.
+        :return: The value computed by this caller or by the coalesced caller.
+        """
+        flight_key = (namespace, key, tuple(sorted(tags.iteritems())))
+
+        with self.lock:
+            call = self.calls.get(flight_key)
+            is_leader = call is None
+            if is_leader:
+                call = self.calls[flight_key] = SingleFlightCall()
+
+        if not is_leader:
+            self.metrics_event.emit_event('singleflight.coalesced', {
+                'namespace': namespace,
+                'scope': 'local',
+            })
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.value
+
+        try:
+            if self.distributed:
+                call.value = self._do_distributed(namespace, key, tags, func)
+            else:
+                call.value = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.calls[flight_key]
+            call.done.set()
+
+        return call.value
+
+    def _do_distributed(self, namespace, key, tags, func):
+        """
+        Compute the value for a cache key while holding a cross-process lock. If another process
+        holds the lock, wait for it to release the lock or for the lock to expire, and use its
+        cached result if available. The lock holds a token unique to this call, and is released only
+        if it still holds that token.
+
+        :param namespace: Namespace of the cache key.
+        :param key: The cache key itself.
+        :param tags: Dictionary of tags qualifying the cache key.
+        :param func: Nullary function that computes and caches the value.
+        :return: The computed or cached value.
+        """
+        lock = self.cache.rw_client('{}-lock'.format(namespace), key, tags)
+        result = self.cache.rw_client(namespace, key, tags)
+        deadline = time.time() + self.lock_ttl_ms / 1000.0
+        token = uuid.uuid4().hex
+
+        while not lock.add(token, self.lock_ttl_ms):
+            time.sleep(self.poll_interval_ms / 1000.0)
+
+            value = result.get()
+            if value is not None:
+                self.metrics_event.emit_event('singleflight.coalesced', {
+                    'namespace': namespace,
+                    'scope': 'remote',
+                })
+                return value
+
+            if time.time() > deadline:
+                # The lock holder is taking too long; compute the value without the lock.
+                return func()
+
+        try:
+            return func()
+        finally:
+            # Release the lock only if it is still ours; if it expired while computing the value,
+            # it may since have been taken by another process
+            lock.delete_if_equal(token)
@@ -0,0 +1,142 @@
+import json
+import time
+import uuid
+
+from orion.util.geo import geohash_encode
+from orion.util.geo import geohash_neighbors
+from orion.util.geo import geohash_precision
+from orion.util.geo import haversine_m
+
+# Time to live of the lock serializing insertions into a cell, in milliseconds. This bounds how long
+# an insertion waits if the lock holder dies.
+CELL_LOCK_TTL_MS = 1000
+# Interval at which an insertion retries taking a cell's lock held by another writer, in
+# milliseconds.
+CELL_LOCK_RETRY_INTERVAL_MS = 5
+
+
+class SpatialCacheClient(object):
+    """
+    Spatial cache of values keyed by coordinate, supporting nearest-neighbor lookups within a
+    radius. Entries are bucketed by geohash cell, with the cell precision chosen so that every point
+    within the radius of a coordinate falls in the coordinate's cell or one of its neighbors. Each
+    bucket is stored as a single entry in the underlying cache, so this works identically on all
+    cache backends. Insertions into a bucket are serialized across processes by a short-lived lock
+    per cell, so that concurrent writers do not drop each other's entries.
+    """
+
+    def __init__(self, cache, radius_m=0, ttl_ms=24 * 60 * 60 * 1000, max_cell_entries=64):
+        """
+        Create a spatial cache client.
+
+        :param cache: CacheClient instance in which buckets are stored.
+        :param radius_m: Maximum distance, in meters, between a query coordinate and a cached
+                         coordinate for the cached value to be served. Zero disables the cache.
+        :param ttl_ms: Time to live of a bucket, in milliseconds, renewed on every insertion.
+        :param max_cell_entries: Maximum number of entries retained per bucket; the oldest entries
+                                 are evicted first.
+        """
+        self.cache = cache
+        self.radius_m = radius_m
+        self.ttl_ms = ttl_ms
+        self.max_cell_entries = max_cell_entries
+
+    @property
+    def enabled(self):
+        """
+        Whether spatial lookups are enabled.
+
+        :return: True if a positive radius is configured; False otherwise.
+        """
+        return self.radius_m > 0
+
+    def nearest(self, namespace, lat, lon):
+        """
+        Find the cached value nearest to a coordinate, within the configured radius.
+
+        :param namespace: Namespace of the spatial cache.
+        :param lat: Latitude of the query coordinate.
+        :param lon: Longitude of the query coordinate.
+        :return: Tuple of (value, distance in meters) for the nearest entry, or None if no entry
+                 lies within the radius.
+        """
+        geohash = geohash_encode(lat, lon, geohash_precision(lat, self.radius_m))
+        cells = self.cache.get_many([
+            self._cell_entry(namespace, cell)
+            for cell in geohash_neighbors(geohash)
+        ])
+        nearest = None
+
+        for serialized in cells:
+            for entry_lat, entry_lon, value in self._parse_bucket(serialized):
+                distance = haversine_m(lat, lon, entry_lat, entry_lon)
+                if distance <= self.radius_m and (nearest is None or distance < nearest[1]):
+                    nearest = (value, distance)
+
+        return nearest
+
+    def add(self, namespace, lat, lon, value):
+        """
+        Insert a value for a coordinate. An existing entry for the same coordinate is replaced. The
+        cell's bucket is read and rewritten while holding the cell's lock; if the lock cannot be
+        taken before it would have expired, the insertion is skipped.
+
+        :param namespace: Namespace of the spatial cache.
+        :param lat: Latitude of the coordinate.
+        :param lon: Longitude of the coordinate.
+        :param value: JSON-serializable value to cache.
+        :return: True if the value was inserted; False if the insertion was skipped.
+        """
+        geohash = geohash_encode(lat, lon, geohash_precision(lat, self.radius_m))
+        _, key, tags = self._cell_entry(namespace, geohash)
+        cell = self.cache.rw_client(namespace, key, tags)
+        lock = self.cache.rw_client('{}-lock'.format(namespace), key, tags)
+        token = uuid.uuid4().hex
+        deadline = time.time() + CELL_LOCK_TTL_MS / 1000.0
+
+        while not lock.add(token, CELL_LOCK_TTL_MS):
+            if time.time() > deadline:
+                return False
+
+            time.sleep(CELL_LOCK_RETRY_INTERVAL_MS / 1000.0)
+
+        try:
+            bucket = [
+                entry
+                for entry in self._parse_bucket(cell.get())
+                if (entry[0], entry[1]) != (lat, lon)
+            ]
+            bucket.append([lat, lon, value])
+
+            cell.set(json.dumps(bucket[-self.max_cell_entries:]), ttl=self.ttl_ms)
+        finally:
+            lock.delete_if_equal(token)
+
+        return True
+
+    @staticmethod
+    def _cell_entry(namespace, geohash):
+        """
+        Identify the cache key holding the bucket of a single geohash cell.
+
+        :param namespace: Namespace of the spatial cache.
+        :param geohash: Geohash of the cell.
+        :return: Tuple of (namespace, key, tags) qualifying the cache key.
+        """
+        return namespace, 'geohash-cell', {'geohash': geohash}
+
+    @staticmethod
+    def _parse_bucket(serialized):
+        """
+        Parse the entries cached in a single geohash cell.
+
+        :param serialized: Serialized bucket read from the cache, or None if the cell is empty.
+        :return: List of [lat, lon, value] entries, ordered from oldest to newest.
+        """
+        if not serialized:
+            return []
+
+        try:
+            return json.loads(serialized)
+        except ValueError:
+            return []
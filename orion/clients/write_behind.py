@@ -0,0 +1,217 @@
+import Queue
+import atexit
+import threading
+
+from orion.models.location import Location
+from orion.util.batch import collect_batch
+
+# Acknowledge a write as soon as it is accepted into the in-process queue.
+DURABILITY_ENQUEUE = 'enqueue'
+# Acknowledge a write only after the batch containing it has been committed to the database.
+DURABILITY_FLUSH = 'flush'
+
+
+class WriteBehindException(Exception):
+    """
+    Exception raised when a write cannot be accepted or persisted by the write-behind buffer.
+    """
+    pass
+
+
+class WriteBehindEntry(object):
+    """
+    A single location queued for writing, along with the state needed to notify a writer waiting on
+    its durability.
+    """
+
+    def __init__(self, location, on_commit=None):
+        """
+        Create a queue entry.
+
+        :param location: Unpersisted Location model instance.
+        :param on_commit: Optional unary function invoked with the location after it is committed.
+        """
+        self.location = location
+        self.on_commit = on_commit
+        self.done = threading.Event()
+        self.error = None
+
+
+class WriteBehindClient(object):
+    """
+    Bounded in-process buffer that group-commits queued locations to the database from a background
+    writer thread. A batch is flushed with one multi-row insert when either the batch size or the
+    flush interval threshold is reached, amortizing the cost of a commit over many writes.
+    """
+
+    def __init__(
+        self,
+        db,
+        metrics_event,
+        metrics_gauge,
+        metrics_latency,
+        enabled=False,
+        durability=DURABILITY_ENQUEUE,
+        batch_size=500,
+        flush_interval_ms=50,
+        queue_size=10000,
+        enqueue_timeout_ms=100,
+        flush_timeout_ms=5000,
+        response_cache=None,
+    ):
+        """
+        Create a write-behind client. The background writer is only started if enabled.
+
+        :param db: SQLAlchemy database client.
+        :param metrics_event: Event metrics client.
+        :param metrics_gauge: Gauge metrics client.
+        :param metrics_latency: Latency metrics client.
+        :param enabled: True to enable the write-behind buffer.
+        :param durability: One of DURABILITY_ENQUEUE or DURABILITY_FLUSH.
+        :param batch_size: Maximum number of locations written in a single batch.
+        :param flush_interval_ms: Maximum time, in milliseconds, that a queued location waits for
+                                  its batch to fill before it is flushed.
+        :param queue_size: Maximum number of locations buffered in memory.
+        :param enqueue_timeout_ms: Time, in milliseconds, that a writer blocks on a full queue
+                                   before the write is rejected.
+        :param flush_timeout_ms: Time, in milliseconds, that a writer waits for its batch to be
+                                 committed in DURABILITY_FLUSH mode before the write is failed.
+        :param response_cache: Optional ResponseCacheClient, whose cached responses for the devices
+                               of written locations are invalidated after every batch.
+        """
+        if durability not in (DURABILITY_ENQUEUE, DURABILITY_FLUSH):
+            raise ValueError('Unrecognized write-behind durability `{}`'.format(durability))
+
+        self.db = db
+        self.metrics_event = metrics_event
+        self.metrics_gauge = metrics_gauge
+        self.metrics_latency = metrics_latency
+        self.enabled = enabled
+        self.durability = durability
+        self.batch_size = batch_size
+        self.flush_interval_ms = flush_interval_ms
+        self.enqueue_timeout_ms = enqueue_timeout_ms
+        self.flush_timeout_ms = flush_timeout_ms
+        self.response_cache = response_cache
+
+        self.queue = Queue.Queue(maxsize=queue_size)
+        self.shutdown = threading.Event()
+        self.stopped = threading.Event()
+        self.writer = threading.Thread(target=self._run, name='orion-write-behind')
+        self.writer.daemon = True
+
+        if enabled:
+            self.writer.start()
+            atexit.register(self.close)
+
+    def write(self, location, on_commit=None):
+        """
+        Queue a location for writing. In DURABILITY_FLUSH mode, this blocks until the batch
+        containing the location has been committed.
+
+        :param location: Unpersisted Location model instance.
+        :param on_commit: Optional unary function invoked with the location from the background
+                          writer thread once it is committed.
+        :raises WriteBehindException: If the queue remains full for the enqueue timeout, or if the
+                                      location's batch failed to commit, or was not committed
+                                      within the flush timeout, in DURABILITY_FLUSH mode. A batch
+                                      that times out may still be committed later.
+        """
+        if self.shutdown.is_set():
+            raise WriteBehindException('Write-behind buffer is shut down')
+
+        entry = WriteBehindEntry(location, on_commit)
+
+        try:
+            self.queue.put(entry, timeout=self.enqueue_timeout_ms / 1000.0)
+        except Queue.Full:
+            self.metrics_event.emit_event('write_behind.rejected')
+            raise WriteBehindException('Write-behind queue is full')
+
+        # An entry queued while the buffer was shutting down may have missed the background
+        # writer's final drain. Once the writer has stopped, it is flushed synchronously instead.
+        if self.stopped.is_set():
+            self._drain()
+
+        if self.durability == DURABILITY_FLUSH:
+            if not entry.done.wait(self.flush_timeout_ms / 1000.0):
+                self.metrics_event.emit_event('write_behind.flush_timeout')
+                raise WriteBehindException('Timed out waiting for batch to commit')
+            if entry.error:
+                raise WriteBehindException('Failed to commit batch: {}'.format(entry.error))
+
+    def close(self):
+        """
+        Stop accepting writes, flush all queued locations, and stop the background writer.
+        """
+        if self.shutdown.is_set():
+            return
+
+        self.shutdown.set()
+
+        if self.writer.is_alive():
+            self.writer.join()
+
+        # Writers that did not observe the stop flush their own entries. Entries queued before
+        # they could observe it are flushed here.
+        self.stopped.set()
+        self._drain()
+
+    def _run(self):
+        """
+        Background writer loop: collect and flush batches until shut down, then drain the queue.
+        """
+        while not self.shutdown.is_set():
+            batch = collect_batch(self.queue, self.batch_size, self.flush_interval_ms)
+            if batch:
+                self._flush(batch)
+
+        self._drain()
+
+    def _drain(self):
+        """
+        Synchronously flush all locations remaining in the queue.
+        """
+        while True:
+            batch = collect_batch(
+                self.queue,
+                self.batch_size,
+                self.flush_interval_ms,
+                block=False,
+            )
+            if not batch:
+                return
+
+            self._flush(batch)
+
+    def _flush(self, batch):
+        """
+        Commit a batch of entries with a single multi-row insert and notify any waiting writers.
+
+        :param batch: List of queued entries.
+        """
+        self.metrics_gauge.emit_gauge('write_behind.queue_depth', self.queue.qsize())
+        self.metrics_gauge.emit_gauge('write_behind.batch_size', len(batch))
+
+        try:
+            with self.metrics_latency.profile('db.write_ms', {'mode': 'write_behind'}):
+                with self.db.engine.begin() as conn:
+                    conn.execute(
+                        Location.__table__.insert(),
+                        [entry.location.column_values() for entry in batch],
+                    )
+        except Exception as e:
+            self.metrics_event.emit_event('write_behind.flush_failure')
+            for entry in batch:
+                entry.error = e
+        else:
+            if self.response_cache and self.response_cache.enabled:
+                for user, device in set((e.location.user, e.location.device) for e in batch):
+                    self.response_cache.invalidate(user, device)
+
+            for entry in batch:
+                if entry.on_commit:
+                    entry.on_commit(entry.location)
+        finally:
+            for entry in batch:
+                entry.done.set()
@@ -1,10 +1,23 @@
 from orion.clients.cache import CacheClient
+from orion.clients.cache import ShardedMemoryTTLCache
+from orion.clients.cache_warmer import CacheWarmerClient
 from orion.clients.config import ConfigClient
 from orion.clients.db import DbClient
 from orion.clients.geocode import ReverseGeocodingClient
+from orion.clients.geocode_worker import GeocodeWorkerPool
+from orion.clients.local_geocoder import LocalGeocoderClient
 from orion.clients.metrics import EventMetricsClient
+from orion.clients.metrics import GaugeMetricsClient
 from orion.clients.metrics import LatencyMetricsClient
+from orion.clients.movement import MovementSuppressionClient
+from orion.clients.rate_limit import RateLimiterClient
+from orion.clients.response_cache import ResponseCacheClient
+from orion.clients.singleflight import SingleFlightClient
+from orion.clients.spatial_cache import SpatialCacheClient
 from orion.clients.stream import StreamClient
+from orion.clients.write_behind import WriteBehindClient
+from orion.util.codec import CacheCodec
+from orion.util.geocode import AddressResolver
 
 
 class Context(object):
@@ -19,10 +32,6 @@ class Context(object):
         :param app: Flask application instance.
         """
         self.config = ConfigClient()
-        self.cache = CacheClient(
-            addr=self.config.get_value('redis.addr'),
-            prefix='orion',
-        )
         self.db = DbClient(
             app,
             user=self.config.get_value('database.user'),
@@ -31,18 +40,160 @@ class Context(object):
             port=self.config.get_value('database.port'),
             name=self.config.get_value('database.name'),
         )
-        self.geocode = ReverseGeocodingClient(
-            mapbox_access_token=self.config.get_value('mapbox_access_token'),
-        )
         self.metrics_event = EventMetricsClient(
             addr=self.config.get_value('statsd.addr'),
             prefix='orion',
         )
+        self.metrics_gauge = GaugeMetricsClient(
+            addr=self.config.get_value('statsd.addr'),
+            prefix='orion',
+        )
         self.metrics_latency = LatencyMetricsClient(
             addr=self.config.get_value('statsd.addr'),
             prefix='orion',
         )
+        self.cache = CacheClient(
+            addr=self.config.get_value('redis.addr'),
+            prefix='orion',
+            memory=ShardedMemoryTTLCache(
+                num_shards=self.config.get_value('cache.memory.num_shards'),
+                max_entries=self.config.get_value('cache.memory.max_entries'),
+                max_bytes=self.config.get_value('cache.memory.max_bytes'),
+                sweep_interval_ms=self.config.get_value('cache.memory.sweep_interval_ms'),
+                sweep_chunk_size=self.config.get_value('cache.memory.sweep_chunk_size'),
+                metrics_gauge=self.metrics_gauge,
+            ),
+            near_cache=ShardedMemoryTTLCache(
+                num_shards=self.config.get_value('cache.memory.num_shards'),
+                max_entries=self.config.get_value('cache.near.max_entries'),
+                sweep_interval_ms=self.config.get_value('cache.memory.sweep_interval_ms'),
+                sweep_chunk_size=self.config.get_value('cache.memory.sweep_chunk_size'),
+            ) if self.config.get_value('cache.near.ttl_ms') else None,
+            near_cache_ttl_ms=self.config.get_value('cache.near.ttl_ms'),
+            near_cache_invalidation=self.config.get_value('cache.near.invalidation'),
+            metrics_event=self.metrics_event,
+            metrics_latency=self.metrics_latency,
+            metrics_sample_rate=self.config.get_value('cache.metrics.sample_rate'),
+            redis_connect_timeout_ms=self.config.get_value('redis.connect_timeout_ms'),
+            redis_socket_timeout_ms=self.config.get_value('redis.socket_timeout_ms'),
+            redis_breaker_failure_threshold=self.config.get_value(
+                'redis.breaker_failure_threshold',
+            ),
+            redis_breaker_cooldown_ms=self.config.get_value('redis.breaker_cooldown_ms'),
+            redis_resync_max_keys=self.config.get_value('redis.resync_max_keys'),
+            redis_virtual_nodes=self.config.get_value('redis.virtual_nodes'),
+            codec=CacheCodec(
+                fmt=self.config.get_value('cache.codec.format'),
+                compression=self.config.get_value('cache.codec.compression'),
+                compression_threshold=self.config.get_value('cache.codec.compression_threshold'),
+            ) if self.config.get_value('cache.codec.format') else None,
+        )
+        self.rate_limiter = RateLimiterClient(
+            addr=self.config.get_value('redis.addr'),
+            prefix='orion',
+            metrics_event=self.metrics_event,
+            metrics_gauge=self.metrics_gauge,
+            qps=self.config.get_value('geocode.rate_limit.qps'),
+            burst=self.config.get_value('geocode.rate_limit.burst'),
+            live_reserve=self.config.get_value('geocode.rate_limit.live_reserve'),
+            bulk_wait_ms=self.config.get_value('geocode.rate_limit.bulk_wait_ms'),
+            shared=self.config.get_value('geocode.rate_limit.shared'),
+            redis_connect_timeout_ms=self.config.get_value('redis.connect_timeout_ms'),
+            redis_socket_timeout_ms=self.config.get_value('redis.socket_timeout_ms'),
+        )
+        self.geocode = ReverseGeocodingClient(
+            mapbox_access_token=self.config.get_value('mapbox_access_token'),
+            metrics_event=self.metrics_event,
+            metrics_gauge=self.metrics_gauge,
+            metrics_latency=self.metrics_latency,
+            rate_limiter=self.rate_limiter,
+            pool_size=self.config.get_value('geocode.pool_size'),
+            connect_timeout_ms=self.config.get_value('geocode.connect_timeout_ms'),
+            read_timeout_ms=self.config.get_value('geocode.read_timeout_ms'),
+            max_retries=self.config.get_value('geocode.max_retries'),
+            retry_backoff_ms=self.config.get_value('geocode.retry_backoff_ms'),
+            breaker_failure_threshold=self.config.get_value('geocode.breaker_failure_threshold'),
+            breaker_cooldown_ms=self.config.get_value('geocode.breaker_cooldown_ms'),
+        )
+        self.singleflight = SingleFlightClient(
+            cache=self.cache,
+            metrics_event=self.metrics_event,
+            distributed=self.config.get_value('geocode.singleflight.distributed'),
+            lock_ttl_ms=self.config.get_value('geocode.singleflight.lock_ttl_ms'),
+            poll_interval_ms=self.config.get_value('geocode.singleflight.poll_interval_ms'),
+        )
+        self.local_geocoder = LocalGeocoderClient(
+            db=self.db,
+            metrics_event=self.metrics_event,
+            metrics_gauge=self.metrics_gauge,
+            radius_m=self.config.get_value('geocode.local.radius_m'),
+            snapshot_path=self.config.get_value('geocode.local.snapshot_path'),
+            rebuild_threshold=self.config.get_value('geocode.local.rebuild_threshold'),
+        )
+        self.spatial_cache = SpatialCacheClient(
+            cache=self.cache,
+            radius_m=self.config.get_value('geocode.spatial_cache.radius_m'),
+            ttl_ms=self.config.get_value('geocode.cache_ttl_ms'),
+            max_cell_entries=self.config.get_value('geocode.spatial_cache.max_cell_entries'),
+        )
+        self.movement = MovementSuppressionClient(
+            cache=self.cache,
+            metrics_event=self.metrics_event,
+            distance_m=self.config.get_value('geocode.suppression.distance_m'),
+            shared=self.config.get_value('geocode.suppression.shared'),
+            ttl_ms=self.config.get_value('geocode.suppression.ttl_ms'),
+        )
         self.stream = StreamClient(
             kafka_addr=self.config.get_value('kafka.addr'),
             kafka_topic=self.config.get_value('kafka.topic'),
         )
+        self.response_cache = ResponseCacheClient(
+            cache=self.cache,
+            ttl_ms=self.config.get_value('response_cache.ttl_ms'),
+            historical_ttl_ms=self.config.get_value('response_cache.historical_ttl_ms'),
+        )
+        self.write_behind = WriteBehindClient(
+            db=self.db,
+            metrics_event=self.metrics_event,
+            metrics_gauge=self.metrics_gauge,
+            metrics_latency=self.metrics_latency,
+            enabled=self.config.get_value('write_behind.enabled'),
+            durability=self.config.get_value('write_behind.durability'),
+            batch_size=self.config.get_value('write_behind.batch_size'),
+            flush_interval_ms=self.config.get_value('write_behind.flush_interval_ms'),
+            queue_size=self.config.get_value('write_behind.queue_size'),
+            enqueue_timeout_ms=self.config.get_value('write_behind.enqueue_timeout_ms'),
+            flush_timeout_ms=self.config.get_value('write_behind.flush_timeout_ms'),
+            response_cache=self.response_cache,
+        )
+        self.address_resolver = AddressResolver(
+            self,
+            ttl_ms=self.config.get_value('geocode.cache_ttl_ms'),
+            not_found_ttl_ms=self.config.get_value('geocode.not_found_ttl_ms'),
+            failure_ttl_ms=self.config.get_value('geocode.failure_ttl_ms'),
+        )
+        self.geocode_worker = GeocodeWorkerPool(
+            db=self.db,
+            resolver=self.address_resolver,
+            metrics_event=self.metrics_event,
+            metrics_gauge=self.metrics_gauge,
+            metrics_latency=self.metrics_latency,
+            enabled=self.config.get_value('geocode.async.enabled'),
+            num_workers=self.config.get_value('geocode.async.num_workers'),
+            queue_size=self.config.get_value('geocode.async.queue_size'),
+            batch_size=self.config.get_value('geocode.async.batch_size'),
+            flush_interval_ms=self.config.get_value('geocode.async.flush_interval_ms'),
+            response_cache=self.response_cache,
+        )
+        self.cache_warmer = CacheWarmerClient(
+            cache=self.cache,
+            db=self.db,
+            metrics_event=self.metrics_event,
+            metrics_gauge=self.metrics_gauge,
+            max_entries=self.config.get_value('cache.warmup.max_entries'),
+            ttl_ms=self.config.get_value('geocode.cache_ttl_ms'),
+            batch_size=self.config.get_value('cache.warmup.batch_size'),
+            batch_interval_ms=self.config.get_value('cache.warmup.batch_interval_ms'),
+            snapshot_path=self.config.get_value('cache.warmup.snapshot_path'),
+            snapshot_interval_ms=self.config.get_value('cache.warmup.snapshot_interval_ms'),
+        )
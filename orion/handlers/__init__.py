@@ -1,3 +1,4 @@
+from orion.handlers.batch_publish_handler import BatchPublishHandler
 from orion.handlers.locations_handler import LocationsHandler
 from orion.handlers.publish_handler import PublishHandler
 from orion.handlers.users_handler import UsersHandler
@@ -5,6 +6,7 @@ from orion.handlers.users_handler import UsersHandler
 
 # List of all handler classes to add to the server's route/endpoint definitions.
 handler_classes = [
+    BatchPublishHandler,
     LocationsHandler,
     PublishHandler,
     UsersHandler,
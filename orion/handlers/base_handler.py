@@ -1,3 +1,6 @@
+from flask import Response
+
+
 class BaseHandler(object):
     """
     Base endpoint logic handler.
@@ -47,6 +50,29 @@ class BaseHandler(object):
             'data': data,
         }, status
 
+    def stream(self, chunks, mimetype, status=200):
+        """
+        Return to the client with a response whose body is streamed as it is generated, rather than
+        serialized as JSON in its entirety up front.
+
+        :param chunks: Iterable of string chunks of the response body.
+        :param mimetype: MIME type of the response body.
+        :param status: Optional HTTP status code to attach to the response.
+        :return: A tuple of (streaming response, status code).
+        """
+        return Response(chunks, mimetype=mimetype), status
+
+    def raw(self, body, mimetype, status=200):
+        """
+        Return to the client with a response body already encoded in a format other than JSON.
+
+        :param body: Encoded response body string.
+        :param mimetype: MIME type of the response body.
+        :param status: Optional HTTP status code to attach to the response.
+        :return: A tuple of (response, status code).
+        """
+        return Response(body, mimetype=mimetype), status
+
     def run(self, *args, **kwargs):
         """
         Run the handler's core logic routine.
@@ -0,0 +1,148 @@
+from orion.clients.rate_limit import PRIORITY_BULK
+from orion.handlers.publish_handler import PublishHandler
+from orion.models.location import Location
+
+# Maximum number of location payloads accepted in a single batch request.
+MAX_BATCH_SIZE = 1000
+
+
+class BatchPublishHandler(PublishHandler):
+    """
+    Add entries to the database for many reported locations in a single request. This is intended
+    for clients flushing a backlog of queued locations, e.g. after a period without connectivity.
+
+    The client must supply a JSON array of payloads, each of which is in the same format accepted by
+    PublishHandler and is validated with the same rules, and must additionally carry numeric
+    coordinates. All valid locations are written in a single transaction with one multi-row insert.
+    The response data is a list of per-item statuses, in the same order as the input payloads.
+    """
+
+    methods = ['POST']
+    path = '/api/publish/batch'
+
+    def run(self, *args, **kwargs):
+        if not isinstance(self.data, list):
+            return self.error(status=400, message='Batch publish payload must be a JSON array.')
+
+        if len(self.data) > MAX_BATCH_SIZE:
+            return self.error(
+                status=413,
+                message='Batch publish payload may contain at most {} items.'.format(
+                    MAX_BATCH_SIZE,
+                ),
+            )
+
+        statuses = []
+        locations = []
+
+        for payload in self.data:
+            status, message, location = self._validate_item(payload)
+            statuses.append({'status': status, 'message': message})
+            if location:
+                locations.append(location)
+
+        # Defer geocoding to the background workers when asynchronous geocoding is enabled.
+        defer_geocode = self.ctx.geocode_worker.enabled
+        if not defer_geocode:
+            addresses = self._extract_addresses(
+                (location.latitude, location.longitude)
+                for location in locations
+            )
+            for location in locations:
+                location.address = addresses[(location.latitude, location.longitude)]
+
+        if locations:
+            with self.ctx.metrics_latency.profile('db.write_ms'):
+                result = self.ctx.db.session.execute(
+                    Location.__table__.insert().values([
+                        location.column_values()
+                        for location in locations
+                    ]),
+                )
+                self.ctx.db.session.commit()
+
+            self._assign_location_ids(locations, result.lastrowid)
+
+            if self.ctx.response_cache.enabled:
+                for user, device in set((loc.user, loc.device) for loc in locations):
+                    self.ctx.response_cache.invalidate(user, device)
+
+        for location in locations:
+            if defer_geocode:
+                self.ctx.geocode_worker.submit(location)
+
+            self.ctx.stream.emit_location(location)
+            self.ctx.metrics_event.emit_event('publish_location', {
+                'user': location.user,
+                'device': location.device,
+            })
+
+        self.ctx.metrics_event.emit_event('publish_location_batch')
+
+        return self.success(data=statuses, status=200)
+
+    def _validate_item(self, payload):
+        """
+        Validate a single payload in the batch with the same rules applied by PublishHandler.
+
+        :param payload: Client JSON payload.
+        :return: Tuple of (status, message, location) describing the outcome for this item. The
+                 location is None if the payload should not be persisted.
+        """
+        if not isinstance(payload, dict):
+            return 400, 'Not a location publish.', None
+
+        if self._is_report_location_cmd(payload):
+            return 200, None, None
+
+        if payload.get('_type') != 'location':
+            return 400, 'Not a location publish.', None
+
+        try:
+            location = self._parse_location(payload)
+        except ValueError:
+            return 400, 'Malformed location topic.', None
+
+        if not all(self._is_coordinate(coord) for coord in (location.latitude, location.longitude)):
+            return 400, 'Malformed location coordinates.', None
+
+        return 201, None, location
+
+    @staticmethod
+    def _is_coordinate(value):
+        """
+        Check whether a payload value is usable as a coordinate.
+
+        :param value: Latitude or longitude read from the payload.
+        :return: True if the value is a number; False otherwise.
+        """
+        return isinstance(value, (int, long, float)) and not isinstance(value, bool)
+
+    @staticmethod
+    def _assign_location_ids(locations, first_location_id):
+        """
+        Populate the primary keys of committed locations. MySQL reports the key generated for the
+        first row of a multi-row insert, and with InnoDB's traditional or consecutive
+        auto-increment lock modes, the keys of the remaining rows follow it consecutively, in
+        insertion order.
+
+        :param locations: List of committed Location model instances, in insertion order.
+        :param first_location_id: Key generated for the first inserted row, or None if unknown.
+        """
+        if not first_location_id:
+            return
+
+        for idx, location in enumerate(locations):
+            location.location_id = first_location_id + idx
+
+    def _extract_addresses(self, coords):
+        """
+        Reverse geocode a group of coordinates. Each distinct coordinate is resolved only once, so
+        repeated points in the batch (e.g. from a stationary device) cost a single lookup, and the
+        cache is read for all coordinates in a single round trip. Lookups are made at bulk
+        priority, so that batches do not exhaust the API budget of live publishes.
+
+        :param coords: Iterable of (latitude, longitude) tuples.
+        :return: Dictionary mapping each distinct (latitude, longitude) tuple to its address.
+        """
+        return self.ctx.address_resolver.resolve_many(list(set(coords)), priority=PRIORITY_BULK)
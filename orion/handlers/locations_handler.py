@@ -1,14 +1,71 @@
+import base64
+import json
 import time
 
+import msgpack
+from flask import has_request_context
+from flask import request
 from sqlalchemy import and_
+from sqlalchemy import or_
 
 from orion.handlers.base_handler import BaseHandler
 from orion.models.location import Location
+from orion.util.geo import polyline_encode
+from orion.util.geo import simplify_track
 from orion.util.request import require_params
 
 # Number of seconds in a month.
 NUM_SEC_MONTH = 31 * 24 * 3600
 
+# Response formats. JSON responses are serialized in their entirety; NDJSON responses are streamed
+# as newline-delimited JSON, one location per line. Columnar responses hold one array per field;
+# polyline responses additionally encode coordinates as a polyline and timestamps as deltas.
+# msgpack responses hold the same data as JSON responses, encoded with msgpack.
+FORMAT_JSON = 'json'
+FORMAT_NDJSON = 'ndjson'
+FORMAT_COLUMNAR = 'columnar'
+FORMAT_POLYLINE = 'polyline'
+FORMAT_MSGPACK = 'msgpack'
+RESPONSE_FORMATS = (FORMAT_JSON, FORMAT_NDJSON, FORMAT_COLUMNAR, FORMAT_POLYLINE, FORMAT_MSGPACK)
+
+# Map of the media types negotiable through the Accept header to their response formats, in order
+# of preference. Columnar and polyline responses are JSON, and can only be requested by name.
+ACCEPT_FORMATS = (
+    ('application/json', FORMAT_JSON),
+    ('application/x-msgpack', FORMAT_MSGPACK),
+    ('application/x-ndjson', FORMAT_NDJSON),
+)
+
+
+def encode_cursor(location):
+    """
+    Encode the position of a location in the (timestamp, location_id) ordering as an opaque
+    pagination cursor.
+
+    :param location: Last Location, or row with timestamp and location_id columns, of a page.
+    :return: URL-safe cursor string.
+    """
+    return base64.urlsafe_b64encode(json.dumps([location.timestamp, location.location_id]))
+
+
+def decode_cursor(cursor):
+    """
+    Decode a pagination cursor.
+
+    :param cursor: Cursor string previously returned by encode_cursor().
+    :return: Tuple of (timestamp, location_id) of the last location of the previous page.
+    :raises ValueError: If the cursor is malformed.
+    """
+    try:
+        timestamp, location_id = json.loads(base64.urlsafe_b64decode(str(cursor)))
+    except (TypeError, ValueError):
+        raise ValueError('Malformed pagination cursor `{}`'.format(cursor))
+
+    if not isinstance(timestamp, (int, long)) or not isinstance(location_id, (int, long)):
+        raise ValueError('Malformed pagination cursor `{}`'.format(cursor))
+
+    return timestamp, location_id
+
 
 class LocationsHandler(BaseHandler):
     """
@@ -23,6 +80,36 @@ class LocationsHandler(BaseHandler):
         limit -- A limit of entries to return (default 10)
         timestamp_start -- The starting Unix timestamp for fetched entries (default a month ago)
         timestamp_end -- The ending Unix timestamp for fetched entries (default now)
+        cursor -- Opt into keyset pagination, in place of the offset. Entries are ordered by
+                  timestamp, and the response is an object containing the page of `locations`
+                  and a `next_cursor` with which to request the next page, or null if there are
+                  no more entries. Specify null to request the first page. The limit must be a
+                  positive integer.
+        format -- Encoding of the entries, one of:
+                  `json` (default) -- A list of entries.
+                  `ndjson` -- Stream the entries as newline-delimited JSON, with constant memory
+                              regardless of the number of entries. Specify a null limit to stream
+                              all entries in the time range. Streaming cannot be combined with a
+                              cursor.
+                  `columnar` -- An object mapping each field to the array of its values.
+                  `polyline` -- Like `columnar`, except that the coordinates are encoded as a
+                                `polyline` string, with the Google encoded polyline algorithm, and
+                                the timestamps as `timestamp_deltas`, holding the first timestamp
+                                followed by the difference of each from the previous one.
+                                Entries without coordinates, or without a timestamp if requested,
+                                are omitted.
+                  `msgpack` -- The same response as `json`, encoded with msgpack.
+                  If omitted, the format is negotiated with the request's Accept header among
+                  `application/json`, `application/x-msgpack`, and `application/x-ndjson`.
+        max_points -- Downsample the selected entries, in timestamp order, to at most this many
+                      points (at least 3) that preserve the shape of the track, for display on a
+                      map. Specify a null limit to downsample all entries in the time range.
+                      Downsampling cannot be combined with a cursor or with streaming.
+
+    When the response cache is enabled, responses in all formats but `ndjson` are cached by their
+    resolved parameters until a location is written for the device. Requests that omit
+    `timestamp_start` or `timestamp_end` query a window relative to the current time, and are not
+    cached.
     """
 
     methods = ['POST']
@@ -37,28 +124,311 @@ class LocationsHandler(BaseHandler):
         timestamp_start = self.data.get('timestamp_start', int(time.time()) - NUM_SEC_MONTH)
         timestamp_end = self.data.get('timestamp_end', int(time.time()))
         fields = self.data.get('fields', [])
+        response_format = self.response_format = self._negotiate_format()
+        max_points = self.data.get('max_points')
 
-        with self.ctx.metrics_latency.profile('db.read_ms'):
-            locations = self.ctx.db.session.query(Location).filter_by(
-                user=user,
-                device=device,
-            ).filter(
-                # Only enforce filtering parameters if explicitly specified by the client.
-                and_(
-                    not timestamp_start or Location.timestamp > timestamp_start,
-                    not timestamp_end or Location.timestamp < timestamp_end,
+        if response_format not in RESPONSE_FORMATS:
+            return self.error(status=400, message='Unknown response format.')
+        if response_format == FORMAT_NDJSON and 'cursor' in self.data:
+            return self.error(status=400, message='Streaming does not support pagination cursors.')
+        if 'cursor' in self.data and (not isinstance(limit, (int, long)) or limit < 1):
+            return self.error(
+                status=400,
+                message='Pagination cursors require a limit that is a positive integer.',
+            )
+        if max_points is not None:
+            if not isinstance(max_points, (int, long)) or max_points < 3:
+                return self.error(status=400, message='max_points must be an integer, at least 3.')
+            if response_format == FORMAT_NDJSON or 'cursor' in self.data:
+                return self.error(
+                    status=400,
+                    message='Downsampling does not support streaming or pagination cursors.',
                 )
-            ).offset(
+
+        # Select only the requested columns, and serialize straight from the result rows rather
+        # than hydrating full ORM instances. Keyset pagination always needs the columns of the
+        # cursor, and downsampling the coordinates, which are selected after the requested columns
+        # and dropped from the output. At least one column must be selected, even if none of the
+        # requested fields is recognized.
+        projected_fields = Location.projected_fields(fields)
+
+        # The device's version is read before the query, so that a response is never cached under
+        # the version of a write that it does not reflect. Omitted time bounds default to a window
+        # that slides with the current time, so its response cannot be reused.
+        self.cache_version = None
+        self.cache_params = None
+        is_sliding = 'timestamp_start' not in self.data or 'timestamp_end' not in self.data
+        if self.ctx.response_cache.enabled and response_format != FORMAT_NDJSON and not is_sliding:
+            self.cache_params = {
+                'user': user,
+                'device': device,
+                'offset': offset,
+                'limit': limit,
+                'timestamp_start': timestamp_start,
+                'timestamp_end': timestamp_end,
+                'fields': projected_fields,
+                'format': response_format,
+                'max_points': max_points,
+            }
+            if 'cursor' in self.data:
+                self.cache_params['cursor'] = self.data['cursor']
+
+            self.cache_version = self.ctx.response_cache.version(user, device)
+            cached = self.ctx.response_cache.get(self.cache_version, self.cache_params)
+
+            if cached is not None:
+                self.ctx.metrics_event.emit_event('query_locations', {
+                    'user': user,
+                    'device': device,
+                })
+                return self._respond(cached, cache=False)
+
+        required_fields = []
+        if 'cursor' in self.data:
+            required_fields += ['timestamp', 'location_id']
+        if max_points is not None or response_format == FORMAT_POLYLINE:
+            required_fields += ['latitude', 'longitude']
+        columns = projected_fields + [
+            field
+            for field in required_fields
+            if field not in projected_fields
+        ] or ['location_id']
+
+        query = self.ctx.db.session.query(
+            *[getattr(Location, column) for column in columns]
+        ).filter_by(
+            user=user,
+            device=device,
+        ).filter(
+            # Only enforce filtering parameters if explicitly specified by the client.
+            and_(
+                not timestamp_start or Location.timestamp > timestamp_start,
+                not timestamp_end or Location.timestamp < timestamp_end,
+            )
+        )
+
+        if 'cursor' in self.data:
+            return self._run_keyset(query, user, device, limit, columns, projected_fields)
+
+        if response_format == FORMAT_NDJSON:
+            return self._run_stream(
+                query.offset(offset).limit(limit),
+                user,
+                device,
+                projected_fields,
+            )
+
+        if max_points is not None:
+            query = query.order_by(Location.timestamp, Location.location_id)
+
+        with self.ctx.metrics_latency.profile('db.read_ms'):
+            rows = query.offset(
                 offset
             ).limit(
                 limit
             ).all()
 
-        serialized_locations = [
-            location.serialize(fields)
-            for location in locations
-        ]
+        if max_points is not None:
+            lat_idx = columns.index('latitude')
+            lon_idx = columns.index('longitude')
+            # Locations without coordinates cannot be placed on the track
+            rows = [
+                row
+                for row in rows
+                if row[lat_idx] is not None and row[lon_idx] is not None
+            ]
+
+            with self.ctx.metrics_latency.profile('locations.simplify_ms'):
+                kept = simplify_track([(row[lat_idx], row[lon_idx]) for row in rows], max_points)
+            rows = [rows[idx] for idx in kept]
+
+        serialized_locations = self._serialize(rows, columns, projected_fields)
 
         self.ctx.metrics_event.emit_event('query_locations', {'user': user, 'device': device})
 
-        return self.success(data=serialized_locations, status=200)
+        return self._respond(serialized_locations)
+
+    def _run_keyset(self, query, user, device, limit, columns, projected_fields):
+        """
+        Serve a page of locations with keyset pagination. Rather than skipping an offset, the query
+        seeks directly past the last location of the previous page in the (timestamp, location_id)
+        ordering, which the user_device_timestamp_idx index serves without scanning earlier rows,
+        so that every page costs the same.
+
+        :param query: Query of the user's and device's locations within the requested time range.
+        :param user: Associated username.
+        :param device: User's device name.
+        :param limit: Maximum number of locations in the page.
+        :param columns: List of the query's columns.
+        :param projected_fields: List of fields to include in each serialized location, in the
+                                 order of the query's leading columns.
+        :return: A tuple of (response JSON, status code).
+        """
+        cursor = self.data['cursor']
+
+        if cursor:
+            try:
+                last_timestamp, last_location_id = decode_cursor(cursor)
+            except ValueError:
+                return self.error(status=400, message='Malformed pagination cursor.')
+
+            query = query.filter(
+                or_(
+                    Location.timestamp > last_timestamp,
+                    and_(
+                        Location.timestamp == last_timestamp,
+                        Location.location_id > last_location_id,
+                    ),
+                )
+            )
+
+        # Fetch one extra location to determine whether there is a next page
+        with self.ctx.metrics_latency.profile('db.read_ms'):
+            rows = query.order_by(
+                Location.timestamp,
+                Location.location_id,
+            ).limit(
+                limit + 1
+            ).all()
+
+        page = rows[:limit]
+        next_cursor = encode_cursor(page[-1]) if page and len(rows) > limit else None
+
+        self.ctx.metrics_event.emit_event('query_locations', {'user': user, 'device': device})
+
+        return self._respond({
+            'locations': self._serialize(page, columns, projected_fields),
+            'next_cursor': next_cursor,
+        })
+
+    def _run_stream(self, query, user, device, projected_fields):
+        """
+        Stream locations as newline-delimited JSON. Rows are fetched from a server-side cursor in
+        batches, and each batch is serialized and written to the client before the next is fetched,
+        so that memory use is bounded by the batch size rather than by the number of locations.
+
+        :param query: Query of the user's and device's locations to stream.
+        :param user: Associated username.
+        :param device: User's device name.
+        :param projected_fields: List of fields to include in each serialized location, in the
+                                 order of the query's columns.
+        :return: A tuple of (streaming response, status code).
+        """
+        batch_size = self.ctx.config.get_value('database.stream_batch_size')
+
+        def generate_chunks():
+            lines = []
+
+            with self.ctx.metrics_latency.profile('db.stream_ms'):
+                for row in query.yield_per(batch_size):
+                    lines.append(json.dumps(dict(zip(projected_fields, row))))
+
+                    if len(lines) >= batch_size:
+                        yield '\n'.join(lines) + '\n'
+                        lines = []
+
+                if lines:
+                    yield '\n'.join(lines) + '\n'
+
+        self.ctx.metrics_event.emit_event('query_locations', {'user': user, 'device': device})
+
+        return self.stream(generate_chunks(), mimetype='application/x-ndjson')
+
+    def _serialize(self, rows, columns, projected_fields):
+        """
+        Serialize result rows in the requested response format.
+
+        :param rows: List of result rows.
+        :param columns: List of the query's columns.
+        :param projected_fields: List of fields to include in the serialization, in the order of
+                                 the query's leading columns.
+        :return: List of serialized locations, or object of serialized fields for columnar formats.
+        """
+        response_format = self.response_format
+
+        if response_format not in (FORMAT_COLUMNAR, FORMAT_POLYLINE):
+            return [dict(zip(projected_fields, row)) for row in rows]
+
+        if response_format == FORMAT_POLYLINE:
+            # Locations with a NULL coordinate or timestamp cannot be encoded, so they are omitted
+            # from every field to keep the arrays aligned
+            encoded_idxs = [
+                columns.index(field)
+                for field in ('latitude', 'longitude', 'timestamp')
+                if field in columns
+            ]
+            rows = [
+                row
+                for row in rows
+                if all(row[idx] is not None for idx in encoded_idxs)
+            ]
+
+        serialized = {
+            field: [row[idx] for row in rows]
+            for idx, field in enumerate(projected_fields)
+        }
+
+        if response_format == FORMAT_POLYLINE:
+            lat_idx = columns.index('latitude')
+            lon_idx = columns.index('longitude')
+            serialized.pop('latitude', None)
+            serialized.pop('longitude', None)
+            serialized['polyline'] = polyline_encode(
+                (row[lat_idx], row[lon_idx])
+                for row in rows
+            )
+
+            timestamps = serialized.pop('timestamp', None)
+            if timestamps is not None:
+                serialized['timestamp_deltas'] = [
+                    timestamp - prev_timestamp
+                    for prev_timestamp, timestamp in zip([0] + timestamps, timestamps)
+                ]
+
+        return serialized
+
+    def _respond(self, data, cache=True):
+        """
+        Return to the client with a success response in the requested response format.
+
+        :param data: Data payload to send to the client.
+        :param cache: True to store the data in the response cache, if enabled.
+        :return: A tuple of (response JSON or encoded response, status code).
+        """
+        if cache and self.cache_version:
+            # Locations are rarely written with timestamps far in the past, so a response for a
+            # time range that has already ended is expected to stay valid for much longer.
+            timestamp_end = self.cache_params['timestamp_end']
+            self.ctx.response_cache.set(
+                self.cache_version,
+                self.cache_params,
+                data,
+                historical=bool(timestamp_end) and timestamp_end < time.time(),
+            )
+
+        resp, status = self.success(data=data, status=200)
+
+        if self.response_format == FORMAT_MSGPACK:
+            return self.raw(msgpack.packb(resp, use_bin_type=True), 'application/x-msgpack', status)
+
+        return resp, status
+
+    def _negotiate_format(self):
+        """
+        Resolve the response format. A format named in the request takes precedence; otherwise, the
+        most preferred media type of the Accept header that has a corresponding format is chosen.
+
+        :return: Name of the response format, which may be unknown if named in the request.
+        """
+        if 'format' in self.data:
+            return self.data['format']
+
+        if not has_request_context():
+            return FORMAT_JSON
+
+        media_type = request.accept_mimetypes.best_match([
+            accept_media_type
+            for accept_media_type, _ in ACCEPT_FORMATS
+        ])
+
+        return dict(ACCEPT_FORMATS).get(media_type, FORMAT_JSON)
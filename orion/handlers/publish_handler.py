@@ -1,54 +1,11 @@
-import functools
-
 from flask import request
 
+from orion.clients.rate_limit import PRIORITY_LIVE
+from orion.clients.write_behind import WriteBehindException
 from orion.handlers.base_handler import BaseHandler
 from orion.models.location import Location
 
 
-def cached_reverse_geocode(func):
-    """
-    Decorator abstracting cache read and write semantics for the reverse geocoding method. The
-    wrapper function serves the cached value if available, but otherwise calls the wrapped function
-    and sets its return value in the cache.
-
-    :param func: Reverse geocoding method to wrap. Takes three arguments: self, lat, lon.
-    :return: Wrapper function with the same API.
-    """
-    @functools.wraps(func)
-    def cache_frontend_func(self, lat, lon):
-        def approx_coord(coord):
-            # Reduce the precision of the coordinate for purposes of the cache key, in an effort to
-            # approximately cluster coordinates within a small area to the same reverse-geocoded
-            # address. This helps reduce API QPS to Mapbox, since coordinates within a few meters
-            # of one another will likely resolve to the same address anyway.
-            return int(round(coord / 10e-6))
-
-        cache = self.ctx.cache.rw_client(
-            namespace='reverse-geocode',
-            key='feature-place-name',
-            tags={'lat': approx_coord(lat), 'lon': approx_coord(lon)},
-        )
-
-        self.ctx.metrics_event.emit_event('geocode.attempt')
-
-        # Cache hit; bypass the wrapped function and return the cached value as-is
-        cached_value = cache.get()
-        if cached_value is not None:
-            self.ctx.metrics_event.emit_event('geocode.cache_hit')
-            return cached_value
-
-        # Cache miss; invoke the wrapped function and cache its return value if non-null
-        self.ctx.metrics_event.emit_event('geocode.cache_miss')
-        value = func(self, lat, lon)
-        if value is not None:
-            cache.set(value, ttl=24 * 60 * 60 * 1000)  # 24 hour cache TTL
-
-        return value
-
-    return cache_frontend_func
-
-
 class PublishHandler(BaseHandler):
     """
     Add an entry to the database for every reported location. This API is compliant with the JSON
@@ -68,60 +25,137 @@ class PublishHandler(BaseHandler):
         # Sometimes the client tries to send a reportLocation cmd. If server
         # responds with non-200, all further location updates get backed up behind it.
         # Handle with empty 200 response
-        if self.data['_type'] == 'cmd' and self.data['action'] == 'reportLocation':
+        if self._is_report_location_cmd(self.data):
             return self.success(status=200)
 
         if self.data['_type'] != 'location':
             return self.error(status=400, message='Not a location publish.')
 
-        if self.data.get('topic'):
-            _, user, device = self.data.get('topic').split('/')
-        else:
-            user = request.headers.get('X-Limit-U')
-            device = request.headers.get('X-Limit-D')
+        location = self._parse_location(self.data)
 
-        lat = self.data.get('lat')
-        lon = self.data.get('lon')
-        address = self._extract_address(lat, lon)
+        # When asynchronous geocoding is enabled, the location is persisted with a null address and
+        # handed off to the geocoding workers once committed, so that publish latency is independent
+        # of the geocoding API.
+        on_commit = None
+        if self.ctx.geocode_worker.enabled:
+            on_commit = self.ctx.geocode_worker.submit
+        else:
+            location.address = self._extract_device_address(location)
+
+        if self.ctx.write_behind.enabled:
+            # Hand the location off to the background writer, which group-commits it with other
+            # queued locations.
+            try:
+                self.ctx.write_behind.write(location, on_commit=on_commit)
+            except WriteBehindException:
+                return self.error(status=503, message='Unable to accept location publish.')
+        else:
+            with self.ctx.metrics_latency.profile('db.write_ms'):
+                self.ctx.db.session.add(location)
+                self.ctx.db.session.commit()
 
-        location = Location(
-            timestamp=self.data.get('tst'),
-            user=user,
-            device=device,
-            latitude=lat,
-            longitude=lon,
-            accuracy=self.data.get('acc'),
-            battery=self.data.get('batt'),
-            trigger=self.data.get('t'),
-            connection=self.data.get('conn'),
-            tracker_id=self.data.get('tid'),
-            address=address,
-        )
+            if self.ctx.response_cache.enabled:
+                self.ctx.response_cache.invalidate(location.user, location.device)
 
-        with self.ctx.metrics_latency.profile('db.write_ms'):
-            self.ctx.db.session.add(location)
-            self.ctx.db.session.commit()
+            if on_commit:
+                on_commit(location)
 
         self.ctx.stream.emit_location(location)
 
-        self.ctx.metrics_event.emit_event('publish_location', {'user': user, 'device': device})
+        self.ctx.metrics_event.emit_event('publish_location', {
+            'user': location.user,
+            'device': location.device,
+        })
 
         return self.success(status=201)
 
-    @cached_reverse_geocode
-    def _extract_address(self, lat, lon):
+    @staticmethod
+    def _is_report_location_cmd(payload):
+        """
+        Check if a payload is a reportLocation cmd sent by the client, which should be acknowledged
+        without being persisted.
+
+        :param payload: Client JSON payload.
+        :return: True if the payload is a reportLocation cmd; False otherwise.
+        """
+        return payload.get('_type') == 'cmd' and payload.get('action') == 'reportLocation'
+
+    @staticmethod
+    def _parse_location(payload):
+        """
+        Create an unpersisted Location from a client location payload. The user and device are read
+        from the payload's topic if available, and otherwise from the request headers. The address
+        is left unset for the caller to resolve.
+
+        :param payload: Client JSON payload of type location.
+        :return: Location model instance describing the payload.
+        :raises ValueError: If the payload's topic is malformed.
+        """
+        if payload.get('topic'):
+            if not isinstance(payload['topic'], basestring):
+                raise ValueError('Location topic must be a string')
+
+            _, user, device = payload['topic'].split('/')
+        else:
+            user = request.headers.get('X-Limit-U')
+            device = request.headers.get('X-Limit-D')
+
+        return Location(
+            timestamp=payload.get('tst'),
+            user=user,
+            device=device,
+            latitude=payload.get('lat'),
+            longitude=payload.get('lon'),
+            accuracy=payload.get('acc'),
+            battery=payload.get('batt'),
+            trigger=payload.get('t'),
+            connection=payload.get('conn'),
+            tracker_id=payload.get('tid'),
+            address=None,
+        )
+
+    def _extract_device_address(self, location):
+        """
+        Extract the reverse geocoded address of a location. If the location's device has not moved
+        meaningfully since its last geocoded point, the address of that point is reused without
+        going through the geocoding cache or API.
+
+        :param location: Location model instance.
+        :return: String representation of the location's address.
+        """
+        if not self.ctx.movement.enabled:
+            return self._extract_address(location.latitude, location.longitude)
+
+        address = self.ctx.movement.last_address(
+            location.user,
+            location.device,
+            location.latitude,
+            location.longitude,
+            location.accuracy,
+        )
+        if address is not None:
+            return address
+
+        address = self._extract_address(location.latitude, location.longitude)
+        if address is not None:
+            self.ctx.movement.record(
+                location.user,
+                location.device,
+                location.latitude,
+                location.longitude,
+                address,
+            )
+
+        return address
+
+    def _extract_address(self, lat, lon, priority=PRIORITY_LIVE):
         """
         Extract a reverse geocoded address from a (latitude, longitude) coordinate, fronted by a
         cache keyed by the coordinate itself.
 
         :param lat: Latitude of the coordinate.
         :param lon: Longitude of the coordinate.
+        :param priority: Priority class of the lookup, with respect to the API rate limiter.
         :return: String representation of the coordinate's address.
         """
-        self.ctx.metrics_event.emit_event('geocode.api_request')
-        feature = self.ctx.geocode.reverse_geocode(lat, lon)
-        if not feature:
-            self.ctx.metrics_event.emit_event('geocode.api_failure')
-            return
-
-        return feature.get('place_name')
+        return self.ctx.address_resolver.resolve(lat, lon, priority=priority)
@@ -13,7 +13,26 @@ class Location(BaseModel):
     """
 
     __tablename__ = 'location'
-    __table_args__ = (Index('user_device_idx', 'user', 'device'),)
+    __table_args__ = (
+        Index('user_device_idx', 'user', 'device'),
+        # Serves keyset pagination of a device's locations in (timestamp, location_id) order
+        Index('user_device_timestamp_idx', 'user', 'device', 'timestamp', 'location_id'),
+    )
+
+    # Fields included in the serialization of a location, in order.
+    SERIALIZED_FIELDS = (
+        'location_id',
+        'timestamp',
+        'user',
+        'device',
+        'latitude',
+        'longitude',
+        'accuracy',
+        'battery',
+        'connection',
+        'tracker_id',
+        'address',
+    )
 
     location_id = Column(Integer, primary_key=True, autoincrement=True)
     timestamp = Column(Integer)
@@ -79,22 +98,31 @@ class Location(BaseModel):
                        otherwise falsey, all fields are included.
         :return: A JSON payload representing the location entry.
         """
-        full_serialization = {
-            'location_id': self.location_id,
-            'timestamp': self.timestamp,
-            'user': self.user,
-            'device': self.device,
-            'latitude': self.latitude,
-            'longitude': self.longitude,
-            'accuracy': self.accuracy,
-            'battery': self.battery,
-            'connection': self.connection,
-            'tracker_id': self.tracker_id,
-            'address': self.address,
+        return {
+            field: getattr(self, field)
+            for field in self.projected_fields(fields)
         }
 
+    @classmethod
+    def projected_fields(cls, fields=()):
+        """
+        Determine the fields included in a serialization. Unrecognized fields are ignored.
+
+        :param fields: Optional list of fields (keys) to include in the serialization. If empty or
+                       otherwise falsey, all fields are included.
+        :return: List of included fields, in serialization order.
+        """
+        return [field for field in cls.SERIALIZED_FIELDS if not fields or field in fields]
+
+    def column_values(self):
+        """
+        Retrieve the values of all columns populated by the client, suitable for use as the
+        parameters of a Core insert statement.
+
+        :return: Dictionary mapping column names to values, excluding the primary key.
+        """
         return {
-            key: value
-            for key, value in full_serialization.items()
-            if not fields or key in fields
+            column.name: getattr(self, column.name)
+            for column in self.__table__.columns
+            if not column.primary_key
         }
@@ -0,0 +1,67 @@
+"""
+This script reverse geocodes all persisted locations that do not have an address, such as those
+published while the background geocoding queue was full or abandoned by the workers on shutdown.
+"""
+
+from orion.clients.rate_limit import PRIORITY_BULK
+from orion.models.location import Location
+from orion.server import create_app
+
+# Number of locations read and updated per transaction.
+BATCH_SIZE = 100
+
+
+def backfill_addresses():
+    """
+    Create an Orion application instance and resolve the address of every location that lacks one
+    but has coordinates, in batches ordered by primary key.
+    """
+    app = create_app()
+    resolver = app.ctx.address_resolver
+    session = app.ctx.db.session
+    last_location_id = 0
+    num_updated = 0
+
+    with app.app_context():
+        while True:
+            locations = session.query(
+                Location.location_id,
+                Location.latitude,
+                Location.longitude,
+            ).filter(
+                Location.address.is_(None),
+                # Locations without coordinates cannot be reverse geocoded
+                Location.latitude.isnot(None),
+                Location.longitude.isnot(None),
+                Location.location_id > last_location_id,
+            ).order_by(
+                Location.location_id,
+            ).limit(
+                BATCH_SIZE
+            ).all()
+
+            if not locations:
+                break
+
+            addresses = resolver.resolve_many(
+                list({(lat, lon) for _, lat, lon in locations}),
+                priority=PRIORITY_BULK,
+            )
+
+            for location_id, lat, lon in locations:
+                address = addresses[(lat, lon)]
+                if address is not None:
+                    session.query(Location).filter_by(location_id=location_id).update(
+                        {'address': address},
+                        synchronize_session=False,
+                    )
+                    num_updated += 1
+
+            session.commit()
+            last_location_id = locations[-1].location_id
+
+    print 'Backfilled {} addresses.'.format(num_updated)
+
+
+if __name__ == '__main__':
+    backfill_addresses()
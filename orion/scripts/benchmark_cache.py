@@ -0,0 +1,76 @@
+"""
+This script is a microbenchmark of lock contention in the in-memory caches. It measures the
+throughput of a mix of reads and writes issued concurrently by an increasing number of threads,
+against both a single-lock MemoryTTLCache and a lock-striped ShardedMemoryTTLCache.
+"""
+
+import random
+import threading
+import time
+
+from orion.clients.cache import MemoryTTLCache
+from orion.clients.cache import ShardedMemoryTTLCache
+
+# Duration of each benchmark run, in seconds.
+DURATION_S = 2
+# Number of distinct keys accessed by the benchmark.
+NUM_KEYS = 10000
+# Fraction of operations that are writes.
+WRITE_RATIO = 0.2
+# Numbers of concurrent threads to benchmark.
+THREAD_COUNTS = (1, 2, 4, 8, 16)
+
+
+def run(cache, num_threads):
+    """
+    Issue a random mix of reads and writes against a cache from multiple threads.
+
+    :param cache: Cache instance under test.
+    :param num_threads: Number of concurrent threads.
+    :return: Total throughput across all threads, in operations per second.
+    """
+    keys = ['orion:benchmark:key:id={}'.format(idx) for idx in range(NUM_KEYS)]
+    counts = [0] * num_threads
+    stop = threading.Event()
+
+    def worker(idx):
+        rand = random.Random(idx)
+        num_ops = 0
+
+        while not stop.is_set():
+            key = keys[rand.randrange(NUM_KEYS)]
+            if rand.random() < WRITE_RATIO:
+                cache.set(key, 'value', 60000)
+            else:
+                cache.get(key)
+            num_ops += 1
+
+        counts[idx] = num_ops
+
+    threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(num_threads)]
+    for thread in threads:
+        thread.start()
+
+    time.sleep(DURATION_S)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return sum(counts) / float(DURATION_S)
+
+
+def benchmark_cache():
+    """
+    Run the benchmark for every cache implementation and thread count, and print the results.
+    """
+    print '{:>8} {:>16} {:>16}'.format('threads', 'single (ops/s)', 'sharded (ops/s)')
+
+    for num_threads in THREAD_COUNTS:
+        single = run(MemoryTTLCache(max_entries=NUM_KEYS), num_threads)
+        sharded = run(ShardedMemoryTTLCache(max_entries=NUM_KEYS), num_threads)
+
+        print '{:>8} {:>16.0f} {:>16.0f}'.format(num_threads, single, sharded)
+
+
+if __name__ == '__main__':
+    benchmark_cache()
@@ -0,0 +1,128 @@
+"""
+This script is a microbenchmark of serving a large page of locations. It compares loading full
+Location ORM instances and serializing them with Location.serialize(), against selecting only the
+requested columns and serializing straight from the result rows, as LocationsHandler does. The
+benchmark runs against an in-memory SQLite database, so it measures the cost of row transfer,
+hydration, and serialization within the process, not that of the network round trip to MySQL.
+"""
+
+import random
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from orion.models import BaseModel
+from orion.models.location import Location
+
+# Number of locations in each response.
+NUM_ROWS = 10000
+# Number of times each query is run.
+NUM_RUNS = 10
+# Field projections to benchmark; empty requests all fields.
+PROJECTIONS = (
+    ('latitude', 'longitude', 'timestamp'),
+    (),
+)
+
+
+def populate(session):
+    """
+    Insert locations with random coordinates and addresses into the database.
+
+    :param session: SQLAlchemy session.
+    """
+    rand = random.Random(0)
+
+    session.add_all(
+        Location(
+            timestamp=1500000000 + idx,
+            user='user',
+            device='device',
+            latitude=rand.uniform(-90, 90),
+            longitude=rand.uniform(-180, 180),
+            accuracy=10,
+            battery=100,
+            trigger='u',
+            connection='m',
+            tracker_id='tr',
+            address='{} Main Street, San Francisco, California 94103, United States'.format(idx),
+        )
+        for idx in range(NUM_ROWS)
+    )
+    session.commit()
+
+
+def query_orm(session, fields):
+    """
+    Load full ORM instances and serialize them.
+
+    :param session: SQLAlchemy session.
+    :param fields: Fields to include in the serialization.
+    :return: List of serialized locations.
+    """
+    locations = session.query(Location).filter_by(user='user', device='device').all()
+    serialized = [location.serialize(fields) for location in locations]
+
+    # Discard the identity map, as it would be at the end of a request
+    session.expunge_all()
+
+    return serialized
+
+
+def query_projection(session, fields):
+    """
+    Select only the requested columns and serialize the result rows.
+
+    :param session: SQLAlchemy session.
+    :param fields: Fields to include in the serialization.
+    :return: List of serialized locations.
+    """
+    projected_fields = Location.projected_fields(fields)
+    rows = session.query(
+        *[getattr(Location, field) for field in projected_fields]
+    ).filter_by(user='user', device='device').all()
+
+    return [dict(zip(projected_fields, row)) for row in rows]
+
+
+def run(func, session, fields):
+    """
+    Time repeated runs of a query.
+
+    :param func: Query function under test.
+    :param session: SQLAlchemy session.
+    :param fields: Fields to include in the serialization.
+    :return: Median duration of a run, in milliseconds.
+    """
+    durations = []
+
+    for _ in range(NUM_RUNS):
+        start = time.time()
+        func(session, fields)
+        durations.append(1000 * (time.time() - start))
+
+    return sorted(durations)[len(durations) // 2]
+
+
+def benchmark_locations():
+    """
+    Run the benchmark for every projection, and print the results.
+    """
+    engine = create_engine('sqlite://')
+    BaseModel.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    populate(session)
+    session.expunge_all()
+
+    print '{:>40} {:>12} {:>16}'.format('fields', 'orm (ms)', 'projection (ms)')
+
+    for fields in PROJECTIONS:
+        orm = run(query_orm, session, fields)
+        projection = run(query_projection, session, fields)
+
+        print '{:>40} {:>12.1f} {:>16.1f}'.format(','.join(fields) or '(all)', orm, projection)
+
+
+if __name__ == '__main__':
+    benchmark_locations()
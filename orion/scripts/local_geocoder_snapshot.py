@@ -0,0 +1,37 @@
+"""
+This script writes a snapshot of all locations with a known address to the configured local reverse
+geocoder snapshot path, so that server instances can load the local reverse geocoding index from
+the snapshot at startup instead of scanning the location table.
+"""
+
+import sys
+
+from orion.clients.local_geocoder import LocalGeocoderClient
+from orion.server import create_app
+
+
+def local_geocoder_snapshot():
+    """
+    Create an Orion application instance, build the local reverse geocoding index from the database,
+    and write it to the snapshot path.
+    """
+    app = create_app()
+    snapshot_path = app.ctx.config.get_value('geocode.local.snapshot_path')
+
+    if not snapshot_path:
+        print 'geocode.local.snapshot_path is not configured.'
+        sys.exit(1)
+
+    local_geocoder = LocalGeocoderClient(
+        db=app.ctx.db,
+        metrics_event=app.ctx.metrics_event,
+        metrics_gauge=app.ctx.metrics_gauge,
+    )
+    local_geocoder.load()
+    local_geocoder.save_snapshot(snapshot_path)
+
+    print 'Wrote {} addresses to {}.'.format(len(local_geocoder.tree), snapshot_path)
+
+
+if __name__ == '__main__':
+    local_geocoder_snapshot()
@@ -0,0 +1,38 @@
+import Queue
+import time
+
+
+def collect_batch(queue, max_size, timeout_ms, block=True):
+    """
+    Collect a batch of items from a queue. The first item is awaited for at most the timeout;
+    subsequent items are collected until either the batch is full or the timeout since the first
+    item has elapsed. This bounds both the size of a batch and the time an item spends waiting for
+    its batch to fill.
+
+    :param queue: Queue.Queue instance from which items are consumed.
+    :param max_size: Maximum number of items in the batch.
+    :param timeout_ms: Maximum time to wait for the batch to fill, in milliseconds.
+    :param block: False to return only items that are already queued, without waiting.
+    :return: List of collected items; possibly empty.
+    """
+    timeout = timeout_ms / 1000.0
+    batch = []
+
+    try:
+        batch.append(queue.get(block=block, timeout=timeout))
+    except Queue.Empty:
+        return batch
+
+    deadline = time.time() + timeout
+    while len(batch) < max_size:
+        remaining = deadline - time.time()
+
+        try:
+            if block and remaining > 0:
+                batch.append(queue.get(timeout=remaining))
+            else:
+                batch.append(queue.get_nowait())
+        except Queue.Empty:
+            break
+
+    return batch
@@ -0,0 +1,107 @@
+import threading
+import time
+
+# Requests are permitted.
+STATE_CLOSED = 'closed'
+# Requests are rejected until the cooldown window elapses.
+STATE_OPEN = 'open'
+# The cooldown window has elapsed, and a single probe request is permitted at a time.
+STATE_HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker(object):
+    """
+    Thread-safe circuit breaker for calls to an unreliable dependency. The breaker opens after a
+    number of consecutive failures, rejecting all calls for a cooldown window. Once the window
+    elapses, a single probe call is permitted; its success closes the breaker, and its failure opens
+    it for another cooldown window. If the outcome of a probe is never recorded, another probe is
+    permitted once a further cooldown window elapses, so that the breaker cannot stay half-open.
+    """
+
+    def __init__(self, failure_threshold=5, cooldown_ms=30000, on_state_change=None):
+        """
+        Create a circuit breaker in the closed state.
+
+        :param failure_threshold: Number of consecutive failures after which the breaker opens.
+        :param cooldown_ms: Time, in milliseconds, that the breaker stays open before a probe.
+        :param on_state_change: Optional unary function invoked with the new state on every state
+                                transition.
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown_ms = cooldown_ms
+        self.on_state_change = on_state_change
+
+        self.lock = threading.Lock()
+        self.state = STATE_CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.probed_at = None
+
+    def allow(self):
+        """
+        Check whether a call should be attempted. While half-open, only the first caller is
+        permitted, as the probe, until the probe's outcome is recorded or the cooldown window
+        elapses again.
+
+        :return: True if the call should be attempted; False if it should be short-circuited.
+        """
+        with self.lock:
+            if self.state == STATE_CLOSED:
+                return True
+
+            now = self._epoch()
+
+            if self.state == STATE_OPEN and now - self.opened_at >= self.cooldown_ms:
+                self.probed_at = now
+                self._transition(STATE_HALF_OPEN)
+                return True
+
+            if self.state == STATE_HALF_OPEN and now - self.probed_at >= self.cooldown_ms:
+                self.probed_at = now
+                return True
+
+            return False
+
+    def record_success(self):
+        """
+        Record a successful call, closing the breaker.
+        """
+        with self.lock:
+            self.consecutive_failures = 0
+            if self.state != STATE_CLOSED:
+                self._transition(STATE_CLOSED)
+
+    def record_failure(self):
+        """
+        Record a failed call, opening the breaker if the failure threshold is reached or if the
+        failed call was the half-open probe.
+        """
+        with self.lock:
+            self.consecutive_failures += 1
+
+            if (
+                self.state == STATE_HALF_OPEN or
+                self.consecutive_failures >= self.failure_threshold
+            ):
+                self.opened_at = self._epoch()
+                if self.state != STATE_OPEN:
+                    self._transition(STATE_OPEN)
+
+    def _transition(self, state):
+        """
+        Transition to a new state. Must be called with the lock held.
+
+        :param state: New breaker state.
+        """
+        self.state = state
+        if self.on_state_change:
+            self.on_state_change(state)
+
+    @staticmethod
+    def _epoch():
+        """
+        Retrieve the current Unix timestamp in milliseconds.
+
+        :return: Epoch time as a float, in milliseconds.
+        """
+        return 1000 * time.time()
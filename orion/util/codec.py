@@ -0,0 +1,203 @@
+import json
+import zlib
+
+try:
+    import lz4.block
+except ImportError:  # pragma: no cover
+    lz4 = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover
+    msgpack = None
+
+# Serialization formats. Raw values are byte strings stored as-is.
+FORMAT_RAW = 'raw'
+FORMAT_JSON = 'json'
+FORMAT_MSGPACK = 'msgpack'
+
+# Compression algorithms applied to serialized values.
+COMPRESSION_NONE = 'none'
+COMPRESSION_ZLIB = 'zlib'
+COMPRESSION_LZ4 = 'lz4'
+
+# Identifiers of each format and compression algorithm within the header byte.
+FORMAT_IDS = {
+    FORMAT_RAW: 1,
+    FORMAT_JSON: 2,
+    FORMAT_MSGPACK: 3,
+}
+COMPRESSION_IDS = {
+    COMPRESSION_NONE: 0,
+    COMPRESSION_ZLIB: 1,
+    COMPRESSION_LZ4: 2,
+}
+
+# Every encoded value starts with a single header byte, 0b10ccffff, identifying its compression
+# algorithm (c) and format (f). No UTF-8 string starts with a byte in this range, so values written
+# before the codec was enabled are distinguishable from encoded values, and are read as raw values.
+HEADER_MASK = 0xC0
+HEADER_MARKER = 0x80
+
+# Errors raised while decoding a corrupt or truncated value, by any format or compression algorithm.
+DECODE_ERRORS = (ValueError, zlib.error)
+if msgpack:
+    DECODE_ERRORS += (msgpack.exceptions.UnpackException,)
+if lz4:
+    DECODE_ERRORS += (lz4.block.LZ4BlockError,)
+
+
+class CacheCodec(object):
+    """
+    Encodes cached values into compact byte strings, and decodes them back. Every encoded value is
+    self-describing, so values written with any format or compression algorithm, as well as values
+    written before the codec was enabled, can always be read regardless of the configured encoding.
+    """
+
+    def __init__(self, fmt=FORMAT_RAW, compression=COMPRESSION_NONE, compression_threshold=256):
+        """
+        Create a codec.
+
+        :param fmt: Serialization format of encoded values. Raw values must be strings; structured
+                    values are serialized as JSON if the format is raw.
+        :param compression: Compression algorithm of encoded values.
+        :param compression_threshold: Minimum size, in bytes, of a serialized value for it to be
+                                      compressed. Smaller values are stored uncompressed.
+        """
+        if fmt not in FORMAT_IDS:
+            raise ValueError('Unknown cache value format `{}`.'.format(fmt))
+        if compression not in COMPRESSION_IDS:
+            raise ValueError('Unknown cache value compression `{}`.'.format(compression))
+        if fmt == FORMAT_MSGPACK and not msgpack:
+            raise ValueError('The msgpack package is required for the msgpack format.')
+        if compression == COMPRESSION_LZ4 and not lz4:
+            raise ValueError('The lz4 package is required for lz4 compression.')
+
+        self.fmt = fmt
+        self.compression = compression
+        self.compression_threshold = compression_threshold
+
+    def encode(self, value):
+        """
+        Encode a value.
+
+        :param value: String, or JSON-serializable structured value.
+        :return: Encoded byte string.
+        """
+        fmt = self.fmt
+        if fmt == FORMAT_RAW and not isinstance(value, basestring):
+            fmt = FORMAT_JSON
+
+        serialized = _serialize(fmt, value)
+
+        compression = COMPRESSION_NONE
+        if self.compression != COMPRESSION_NONE and len(serialized) >= self.compression_threshold:
+            compressed = _compress(self.compression, serialized)
+            if len(compressed) < len(serialized):
+                compression = self.compression
+                serialized = compressed
+
+        header = HEADER_MARKER | (COMPRESSION_IDS[compression] << 4) | FORMAT_IDS[fmt]
+
+        return chr(header) + serialized
+
+    @staticmethod
+    def decode(encoded):
+        """
+        Decode a value encoded with any format and compression algorithm. Values without a header
+        byte are returned as-is.
+
+        :param encoded: Encoded byte string, or None.
+        :return: The decoded value, or None if the encoded value is None.
+        :raises: One of DECODE_ERRORS, if the encoded value is corrupt.
+        """
+        if not isinstance(encoded, str) or not encoded or \
+                ord(encoded[0]) & HEADER_MASK != HEADER_MARKER:
+            return encoded
+
+        header = ord(encoded[0])
+        fmt = _lookup(FORMAT_IDS, header & 0x0F)
+        compression = _lookup(COMPRESSION_IDS, (header >> 4) & 0x03)
+
+        return _deserialize(fmt, _decompress(compression, encoded[1:]))
+
+
+def _lookup(ids, value_id):
+    """
+    Find the name of a format or compression algorithm from its identifier.
+
+    :param ids: Dictionary of names to identifiers.
+    :param value_id: Identifier in the header byte.
+    :return: Name corresponding to the identifier.
+    """
+    for name, name_id in ids.iteritems():
+        if name_id == value_id:
+            return name
+
+    raise ValueError('Unknown cache value header identifier `{}`.'.format(value_id))
+
+
+def _serialize(fmt, value):
+    """
+    Serialize a value.
+
+    :param fmt: Serialization format.
+    :param value: Value to serialize.
+    :return: Serialized byte string.
+    """
+    if fmt == FORMAT_RAW:
+        return value.encode('utf-8') if isinstance(value, unicode) else value
+    if fmt == FORMAT_JSON:
+        return json.dumps(value, separators=(',', ':'))
+
+    return msgpack.packb(value, use_bin_type=True)
+
+
+def _deserialize(fmt, serialized):
+    """
+    Deserialize a value.
+
+    :param fmt: Serialization format.
+    :param serialized: Serialized byte string.
+    :return: Deserialized value.
+    """
+    if fmt == FORMAT_RAW:
+        return serialized
+    if fmt == FORMAT_JSON:
+        return json.loads(serialized)
+    if not msgpack:
+        raise ValueError('The msgpack package is required to read msgpack values.')
+
+    return msgpack.unpackb(serialized, raw=False)
+
+
+def _compress(compression, serialized):
+    """
+    Compress a serialized value.
+
+    :param compression: Compression algorithm.
+    :param serialized: Serialized byte string.
+    :return: Compressed byte string.
+    """
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(serialized)
+
+    return lz4.block.compress(serialized)
+
+
+def _decompress(compression, compressed):
+    """
+    Decompress a serialized value.
+
+    :param compression: Compression algorithm.
+    :param compressed: Compressed byte string.
+    :return: Serialized byte string.
+    """
+    if compression == COMPRESSION_NONE:
+        return compressed
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(compressed)
+    if not lz4:
+        raise ValueError('The lz4 package is required to read lz4-compressed values.')
+
+    return lz4.block.decompress(compressed)
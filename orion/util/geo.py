@@ -0,0 +1,276 @@
+import math
+
+# Mean radius of the Earth, in meters.
+EARTH_RADIUS_M = 6371008.8
+
+# Alphabet used for base-32 geohash encoding.
+GEOHASH_ALPHABET = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# Maximum supported geohash precision, in characters.
+MAX_GEOHASH_PRECISION = 12
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    """
+    Compute the great-circle distance between two coordinates.
+
+    :param lat1: Latitude of the first coordinate.
+    :param lon1: Longitude of the first coordinate.
+    :param lat2: Latitude of the second coordinate.
+    :param lon2: Longitude of the second coordinate.
+    :return: Distance between the coordinates, in meters.
+    """
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+
+    return 2 * EARTH_RADIUS_M * math.asin(min(1, math.sqrt(a)))
+
+
+def geohash_cell_size_deg(precision):
+    """
+    Compute the dimensions of a geohash cell of a given precision. Geohash bits alternate between
+    longitude and latitude, starting with longitude.
+
+    :param precision: Geohash precision, in characters.
+    :return: Tuple of (cell height, cell width), in degrees of latitude and longitude.
+    """
+    num_bits = 5 * precision
+    lat_bits = num_bits // 2
+    lon_bits = num_bits - lat_bits
+
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lon_bits
+
+
+def geohash_precision(lat, radius_m):
+    """
+    Choose the finest geohash precision whose cells, at a given latitude, are at least as tall and
+    as wide as a search radius. With such a precision, all points within the radius of a coordinate
+    lie in the coordinate's cell or one of its eight neighbors.
+
+    :param lat: Latitude at which the cells are measured. Cells narrow towards the poles.
+    :param radius_m: Search radius, in meters.
+    :return: Geohash precision, in characters.
+    """
+    m_per_deg_lat = math.pi * EARTH_RADIUS_M / 180
+    m_per_deg_lon = m_per_deg_lat * max(math.cos(math.radians(lat)), 1e-6)
+
+    for precision in range(MAX_GEOHASH_PRECISION, 0, -1):
+        height_deg, width_deg = geohash_cell_size_deg(precision)
+        if height_deg * m_per_deg_lat >= radius_m and width_deg * m_per_deg_lon >= radius_m:
+            return precision
+
+    return 1
+
+
+def geohash_encode(lat, lon, precision):
+    """
+    Encode a coordinate as a geohash.
+
+    :param lat: Latitude of the coordinate.
+    :param lon: Longitude of the coordinate.
+    :param precision: Geohash precision, in characters.
+    :return: Geohash string.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    num_bits = 0
+    is_lon = True
+
+    while len(chars) < precision:
+        value, value_range = (lon, lon_range) if is_lon else (lat, lat_range)
+        mid = (value_range[0] + value_range[1]) / 2
+
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            value_range[0] = mid
+        else:
+            value_range[1] = mid
+
+        is_lon = not is_lon
+        num_bits += 1
+
+        if num_bits == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits = 0
+            num_bits = 0
+
+    return ''.join(chars)
+
+
+def geohash_decode(geohash):
+    """
+    Decode a geohash into the center of its cell.
+
+    :param geohash: Geohash string.
+    :return: Tuple of (latitude, longitude) of the cell center.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    is_lon = True
+
+    for char in geohash:
+        bits = GEOHASH_ALPHABET.index(char)
+
+        for shift in range(4, -1, -1):
+            value_range = lon_range if is_lon else lat_range
+            mid = (value_range[0] + value_range[1]) / 2
+
+            if (bits >> shift) & 1:
+                value_range[0] = mid
+            else:
+                value_range[1] = mid
+
+            is_lon = not is_lon
+
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+def geohash_neighbors(geohash):
+    """
+    Compute the geohashes of a cell and its (up to) eight neighbors of the same precision.
+    Longitude wraps around the antimeridian; cells beyond the poles are omitted.
+
+    :param geohash: Geohash string.
+    :return: List of distinct geohash strings, including the input geohash.
+    """
+    precision = len(geohash)
+    height_deg, width_deg = geohash_cell_size_deg(precision)
+    lat, lon = geohash_decode(geohash)
+
+    neighbors = []
+    for d_lat in (-1, 0, 1):
+        neighbor_lat = lat + d_lat * height_deg
+        if not -90 < neighbor_lat < 90:
+            continue
+
+        for d_lon in (-1, 0, 1):
+            neighbor_lon = (lon + d_lon * width_deg + 180) % 360 - 180
+            neighbor = geohash_encode(neighbor_lat, neighbor_lon, precision)
+            if neighbor not in neighbors:
+                neighbors.append(neighbor)
+
+    return neighbors
+
+
+def unit_vector(lat, lon):
+    """
+    Project a coordinate onto the unit sphere. Euclidean (chord) distances between projected
+    coordinates increase monotonically with their great-circle distances, so the projection can be
+    indexed by ordinary Cartesian spatial structures.
+
+    :param lat: Latitude of the coordinate.
+    :param lon: Longitude of the coordinate.
+    :return: Tuple of (x, y, z) Cartesian coordinates.
+    """
+    phi = math.radians(lat)
+    lam = math.radians(lon)
+
+    return math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi)
+
+
+def chord_to_m(chord):
+    """
+    Convert a chord length between two points on the unit sphere into a great-circle distance.
+
+    :param chord: Chord length.
+    :return: Great-circle distance, in meters.
+    """
+    return 2 * EARTH_RADIUS_M * math.asin(min(1, chord / 2))
+
+
+def m_to_chord(distance_m):
+    """
+    Convert a great-circle distance into the chord length between two points on the unit sphere.
+
+    :param distance_m: Great-circle distance, in meters.
+    :return: Chord length.
+    """
+    return 2 * math.sin(min(math.pi, distance_m / EARTH_RADIUS_M) / 2)
+
+
+def simplify_track(points, max_points):
+    """
+    Downsample a track to a maximum number of points with the Largest-Triangle-Three-Buckets
+    algorithm. The first and last points are always kept. The points in between are divided into
+    equally sized buckets, in order, and the point kept from each bucket is the one forming the
+    largest triangle with the point kept from the previous bucket and the average of the next
+    bucket. This preserves the visual shape of the track, including sharp turns, in linear time.
+
+    :param points: List of (lat, lon) tuples, in track order.
+    :param max_points: Maximum number of points to keep, at least 3.
+    :return: List of indices of the kept points, in increasing order.
+    """
+    num_points = len(points)
+    if num_points <= max_points or max_points < 3:
+        return range(num_points)
+
+    bucket_size = (num_points - 2) / float(max_points - 2)
+    kept = [0]
+    prev_lat, prev_lon = points[0]
+
+    for bucket in range(max_points - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, num_points)
+
+        next_bucket = points[end:next_end]
+        avg_lat = sum(lat for lat, _ in next_bucket) / len(next_bucket)
+        avg_lon = sum(lon for _, lon in next_bucket) / len(next_bucket)
+
+        # Twice the area of the triangle formed with each candidate point; the constant factor
+        # does not affect which is largest.
+        max_area = -1
+        max_idx = start
+        for idx in range(start, end):
+            lat, lon = points[idx]
+            area = abs(
+                (prev_lon - avg_lon) * (lat - prev_lat) - (prev_lon - lon) * (avg_lat - prev_lat)
+            )
+            if area > max_area:
+                max_area = area
+                max_idx = idx
+
+        kept.append(max_idx)
+        prev_lat, prev_lon = points[max_idx]
+
+    kept.append(num_points - 1)
+
+    return kept
+
+
+def polyline_encode(points, precision=5):
+    """
+    Encode a sequence of coordinates with the Google encoded polyline algorithm. Each coordinate is
+    rounded to the given number of decimal places, and stored as the difference from the previous
+    coordinate in a variable-length sequence of printable ASCII characters.
+
+    :param points: Iterable of (lat, lon) tuples.
+    :param precision: Number of decimal places retained for each coordinate.
+    :return: Encoded polyline string.
+    """
+    factor = 10 ** precision
+    encoded = []
+    prev_lat = prev_lon = 0
+
+    for lat, lon in points:
+        lat = int(round(lat * factor))
+        lon = int(round(lon * factor))
+
+        for delta in (lat - prev_lat, lon - prev_lon):
+            value = ~(delta << 1) if delta < 0 else delta << 1
+
+            while value >= 0x20:
+                encoded.append(chr((0x20 | (value & 0x1F)) + 63))
+                value >>= 5
+            encoded.append(chr(value + 63))
+
+        prev_lat, prev_lon = lat, lon
+
+    return ''.join(encoded)
@@ -0,0 +1,269 @@
+import functools
+
+from orion.clients.geocode import RateLimitBudgetExhaustedException
+from orion.clients.geocode import ReverseGeocodingException
+from orion.clients.rate_limit import PRIORITY_LIVE
+
+# Cached in place of an address for coordinates that have no address feature.
+NEGATIVE_NOT_FOUND = '__orion_negative__:not_found'
+# Cached in place of an address for coordinates whose lookup failed.
+NEGATIVE_FAILURE = '__orion_negative__:failure'
+
+# Namespace of the spatial cache of reverse geocoded addresses.
+SPATIAL_NAMESPACE = 'reverse-geocode-spatial'
+
+# Metric tag values describing the reason for each negative cache entry.
+NEGATIVE_CACHE_REASONS = {
+    NEGATIVE_NOT_FOUND: 'not_found',
+    NEGATIVE_FAILURE: 'failure',
+}
+
+
+def is_negative(value):
+    """
+    Check whether a cached value is a negative cache entry. Cached values may be structured, so
+    only strings are compared against the negative sentinels.
+
+    :param value: Cached value.
+    :return: True if the value is a negative cache entry; False otherwise.
+    """
+    return isinstance(value, basestring) and value in NEGATIVE_CACHE_REASONS
+
+
+def reverse_geocode_cache_entry(lat, lon):
+    """
+    Identify the cache key holding the reverse geocoded address of a coordinate.
+
+    :param lat: Latitude of the coordinate.
+    :param lon: Longitude of the coordinate.
+    :return: Tuple of (namespace, key, tags) qualifying the cache key.
+    """
+    def approx_coord(coord):
+        # Reduce the precision of the coordinate for purposes of the cache key, in an effort to
+        # approximately cluster coordinates within a small area to the same reverse-geocoded
+        # address. This helps reduce API QPS to Mapbox, since coordinates within a few meters of
+        # one another will likely resolve to the same address anyway.
+        return int(round(coord / 10e-6))
+
+    return 'reverse-geocode', 'feature-place-name', {
+        'lat': approx_coord(lat),
+        'lon': approx_coord(lon),
+    }
+
+
+def serve_cache_hit(metrics_event, cached_value):
+    """
+    Serve a value found in the reverse geocoding cache, reporting whether it is a positive or a
+    negative cache hit.
+
+    :param metrics_event: Event metrics client.
+    :param cached_value: Cached value; must not be None.
+    :return: The cached address, or None for a negative cache entry.
+    """
+    if is_negative(cached_value):
+        metrics_event.emit_event('geocode.negative_cache_hit', {
+            'reason': NEGATIVE_CACHE_REASONS[cached_value],
+        })
+        return None
+
+    metrics_event.emit_event('geocode.cache_hit')
+    return cached_value
+
+
+def resolve_cache_miss(resolver, func, lat, lon, priority=PRIORITY_LIVE):
+    """
+    Resolve a coordinate that missed the reverse geocoding cache, without reading the cache again.
+    The nearest known address from the first nearby address stage that has one is served, and
+    promoted into the exact cache for subsequent lookups of this cell. Otherwise, the uncached
+    reverse geocoding function is called and its outcome is cached. Lookups that find no address,
+    or that fail, are cached as distinct negative entries with their own shorter TTLs; lookups
+    rejected by the rate limiter are not cached at all, so that the coordinate is looked up again
+    once budget is available.
+
+    :param resolver: AddressResolver instance.
+    :param func: Uncached reverse geocoding method. Takes four arguments: self, lat, lon, priority.
+    :param lat: Latitude of the coordinate.
+    :param lon: Longitude of the coordinate.
+    :param priority: Priority class of the lookup, with respect to the API rate limiter.
+    :return: The coordinate's address, or None if it has none or the lookup failed.
+    """
+    namespace, key, tags = reverse_geocode_cache_entry(lat, lon)
+    cache = resolver.ctx.cache.rw_client(namespace, key, tags)
+
+    stages = resolver.nearby_stages()
+    for name, nearest_func, _ in stages:
+        nearest = nearest_func(lat, lon)
+        if nearest:
+            value, _ = nearest
+            resolver.ctx.metrics_event.emit_event('geocode.{}_hit'.format(name))
+            cache.set(value, ttl=resolver.ttl_ms)
+            return value
+
+    resolver.ctx.metrics_event.emit_event('geocode.cache_miss')
+
+    def lookup():
+        try:
+            value = func(resolver, lat, lon, priority)
+        except RateLimitBudgetExhaustedException:
+            return None
+        except ReverseGeocodingException:
+            cache.set(NEGATIVE_FAILURE, ttl=resolver.failure_ttl_ms)
+            return None
+
+        if value is None:
+            cache.set(NEGATIVE_NOT_FOUND, ttl=resolver.not_found_ttl_ms)
+        else:
+            cache.set(value, ttl=resolver.ttl_ms)
+            for _, _, add_func in stages:
+                add_func(lat, lon, value)
+            if resolver.ctx.cache_warmer.enabled:
+                resolver.ctx.cache_warmer.record(lat, lon, value)
+
+        return value
+
+    # Concurrent misses for the same cache cell are coalesced into a single lookup
+    value = resolver.ctx.singleflight.do(namespace, key, tags, lookup)
+
+    # A coalesced caller may read a negative entry cached by the lookup of another process
+    return None if is_negative(value) else value
+
+
+def cached_reverse_geocode(func):
+    """
+    Decorator abstracting cache read and write semantics for the reverse geocoding method. The
+    wrapper function serves the cached value if available, but otherwise resolves the coordinate
+    with resolve_cache_miss(), calling the wrapped function if no nearby address is known. The
+    wrapped function remains available as the wrapper's __wrapped__ attribute.
+
+    :param func: Reverse geocoding method to wrap. Takes four arguments: self, lat, lon, priority.
+    :return: Wrapper function with the same API.
+    """
+    @functools.wraps(func)
+    def cache_frontend_func(self, lat, lon, priority=PRIORITY_LIVE):
+        self.ctx.metrics_event.emit_event('geocode.attempt')
+
+        cached_value = self.ctx.cache.get(*reverse_geocode_cache_entry(lat, lon))
+        if cached_value is not None:
+            return serve_cache_hit(self.ctx.metrics_event, cached_value)
+
+        return resolve_cache_miss(self, func, lat, lon, priority)
+
+    cache_frontend_func.__wrapped__ = func
+
+    return cache_frontend_func
+
+
+class AddressResolver(object):
+    """
+    Resolves coordinates to addresses through the reverse geocoding cache. This is shared by the
+    publish handlers and by the background geocoding workers, so that all lookups go through the
+    same cache regardless of where they originate.
+    """
+
+    def __init__(
+        self,
+        ctx,
+        ttl_ms=24 * 60 * 60 * 1000,
+        not_found_ttl_ms=60 * 60 * 1000,
+        failure_ttl_ms=60 * 1000,
+    ):
+        """
+        Create an address resolver.
+
+        :param ctx: Application context object.
+        :param ttl_ms: Cache TTL for resolved addresses, in milliseconds.
+        :param not_found_ttl_ms: Cache TTL for coordinates without an address, in milliseconds.
+        :param failure_ttl_ms: Cache TTL for coordinates whose lookup failed, in milliseconds.
+        """
+        self.ctx = ctx
+        self.ttl_ms = ttl_ms
+        self.not_found_ttl_ms = not_found_ttl_ms
+        self.failure_ttl_ms = failure_ttl_ms
+
+    def nearby_stages(self):
+        """
+        List the enabled stages consulted, in order, for the nearest known address of a coordinate
+        that misses the exact cache. Each stage is a tuple of (name, nearest, add), where nearest
+        takes a (lat, lon) and returns an (address, distance) tuple or None, and add takes a (lat,
+        lon, address) resolved by the API.
+
+        :return: List of stage tuples.
+        """
+        stages = []
+
+        if self.ctx.local_geocoder.enabled:
+            stages.append((
+                'local_geocoder',
+                self.ctx.local_geocoder.nearest,
+                self.ctx.local_geocoder.add,
+            ))
+
+        if self.ctx.spatial_cache.enabled:
+            stages.append((
+                'spatial_cache',
+                functools.partial(self.ctx.spatial_cache.nearest, SPATIAL_NAMESPACE),
+                functools.partial(self.ctx.spatial_cache.add, SPATIAL_NAMESPACE),
+            ))
+
+        return stages
+
+    def resolve_many(self, coords, priority=PRIORITY_LIVE):
+        """
+        Resolve the reverse geocoded addresses of many coordinates. The cache is read for all
+        coordinates at once; only coordinates that miss the cache are resolved individually,
+        without reading the cache again.
+
+        :param coords: List of distinct (latitude, longitude) tuples.
+        :param priority: Priority class of the lookups, with respect to the API rate limiter.
+        :return: Dictionary mapping each (latitude, longitude) tuple to its address, or None.
+        """
+        cache = self.ctx.cache.rw_batch_client([
+            reverse_geocode_cache_entry(lat, lon)
+            for lat, lon in coords
+        ])
+        addresses = {}
+
+        for (lat, lon), cached_value in zip(coords, cache.get()):
+            self.ctx.metrics_event.emit_event('geocode.attempt')
+
+            if cached_value is None:
+                addresses[(lat, lon)] = resolve_cache_miss(
+                    self,
+                    AddressResolver.resolve.__wrapped__,
+                    lat,
+                    lon,
+                    priority=priority,
+                )
+            else:
+                addresses[(lat, lon)] = serve_cache_hit(self.ctx.metrics_event, cached_value)
+
+        return addresses
+
+    @cached_reverse_geocode
+    def resolve(self, lat, lon, priority=PRIORITY_LIVE):
+        """
+        Resolve the reverse geocoded address of a (latitude, longitude) coordinate, fronted by a
+        cache keyed by the coordinate itself.
+
+        :param lat: Latitude of the coordinate.
+        :param lon: Longitude of the coordinate.
+        :param priority: Priority class of the lookup, with respect to the API rate limiter.
+        :return: String representation of the coordinate's address.
+        :raises RateLimitBudgetExhaustedException: If the lookup was rejected by the rate limiter.
+        :raises ReverseGeocodingException: If the lookup failed.
+        """
+        self.ctx.metrics_event.emit_event('geocode.api_request')
+
+        try:
+            feature = self.ctx.geocode.reverse_geocode(lat, lon, priority=priority)
+        except RateLimitBudgetExhaustedException:
+            raise
+        except ReverseGeocodingException:
+            self.ctx.metrics_event.emit_event('geocode.api_failure')
+            raise
+
+        if not feature:
+            self.ctx.metrics_event.emit_event('geocode.api_no_result')
+            return
+
+        return feature.get('place_name')
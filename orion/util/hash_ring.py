@@ -0,0 +1,52 @@
+import bisect
+import hashlib
+
+
+class HashRing(object):
+    """
+    Consistent hash ring mapping keys to nodes. Each node is placed on the ring at a number of
+    pseudorandom points (virtual nodes), and a key is owned by the node at the first point following
+    the key's hash. Adding or removing a node only moves the keys owned by that node, and virtual
+    nodes spread each node's share of the keys evenly around the ring.
+    """
+
+    def __init__(self, nodes, virtual_nodes=160):
+        """
+        Create a hash ring.
+
+        :param nodes: List of distinct node names.
+        :param virtual_nodes: Number of points on the ring per node.
+        """
+        if not nodes:
+            raise ValueError('A hash ring requires at least one node.')
+
+        self.nodes = list(nodes)
+
+        ring = sorted(
+            (self._hash('{}#{}'.format(node, idx)), node)
+            for node in self.nodes
+            for idx in range(virtual_nodes)
+        )
+        self.points = [point for point, _ in ring]
+        self.owners = [node for _, node in ring]
+
+    def get_node(self, key):
+        """
+        Find the node owning a key.
+
+        :param key: String key.
+        :return: Name of the node owning the key.
+        """
+        idx = bisect.bisect(self.points, self._hash(key)) % len(self.points)
+
+        return self.owners[idx]
+
+    @staticmethod
+    def _hash(key):
+        """
+        Hash a string onto the ring.
+
+        :param key: String to hash.
+        :return: Position on the ring, as a 32-bit integer.
+        """
+        return int(hashlib.md5(key).hexdigest()[:8], 16)
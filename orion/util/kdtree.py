@@ -0,0 +1,81 @@
+from array import array
+
+
+class KDTree(object):
+    """
+    Static, array-backed k-d tree supporting nearest neighbor queries. The tree is implicit: points
+    are stored in flat per-axis arrays, ordered such that the median of every index range is the
+    splitting node of that range, and its two halves are the node's subtrees.
+    """
+
+    def __init__(self, points, values, dimensions=3):
+        """
+        Build a tree over a set of points.
+
+        :param points: List of points, each a tuple of coordinates.
+        :param values: List of values associated with each point, in the same order.
+        :param dimensions: Number of coordinates per point.
+        """
+        self.dimensions = dimensions
+
+        order = range(len(points))
+        stack = [(0, len(order), 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo <= 1:
+                continue
+
+            order[lo:hi] = sorted(order[lo:hi], key=lambda idx: points[idx][axis])
+            mid = (lo + hi) // 2
+            next_axis = (axis + 1) % dimensions
+            stack.append((lo, mid, next_axis))
+            stack.append((mid + 1, hi, next_axis))
+
+        self.axes = [
+            array('d', (points[idx][dim] for idx in order))
+            for dim in range(dimensions)
+        ]
+        self.values = [values[idx] for idx in order]
+
+    def __len__(self):
+        return len(self.values)
+
+    def nearest(self, point, max_distance):
+        """
+        Find the stored point nearest to a query point, within a maximum Euclidean distance.
+
+        :param point: Query point, as a tuple of coordinates.
+        :param max_distance: Maximum Euclidean distance from the query point.
+        :return: Tuple of (value, distance) for the nearest point, or None if no point lies within
+                 the maximum distance.
+        """
+        best_idx = None
+        best_dist_sq = max_distance ** 2
+        stack = [(0, len(self.values), 0, 0)]
+
+        while stack:
+            lo, hi, axis, bound_sq = stack.pop()
+            if lo >= hi or bound_sq > best_dist_sq:
+                continue
+
+            mid = (lo + hi) // 2
+            dist_sq = sum(
+                (point[dim] - self.axes[dim][mid]) ** 2
+                for dim in range(self.dimensions)
+            )
+            if dist_sq <= best_dist_sq:
+                best_idx = mid
+                best_dist_sq = dist_sq
+
+            diff = point[axis] - self.axes[axis][mid]
+            next_axis = (axis + 1) % self.dimensions
+            near, far = ((mid + 1, hi), (lo, mid)) if diff > 0 else ((lo, mid), (mid + 1, hi))
+
+            # The far subtree is visited last, and only if it can contain a closer point
+            stack.append(far + (next_axis, diff ** 2))
+            stack.append(near + (next_axis, 0))
+
+        if best_idx is None:
+            return None
+
+        return self.values[best_idx], best_dist_sq ** 0.5
@@ -1,14 +1,20 @@
 import redis
 from redis.exceptions import ConnectionError
+from redis.exceptions import ResponseError
 from unittest import TestCase
 import mock
+import threading
 import time
 
 from orion.clients import cache
 from orion.clients.cache import CacheException
 from orion.clients.cache import MemoryTTLCache
 from orion.clients.cache import RedisProxyClient
+from orion.clients.cache import ShardedMemoryTTLCache
+from orion.clients.cache import ShardedRedisProxyClient
 from orion.clients.cache import CacheClient
+from orion.util.circuit_breaker import CircuitBreaker
+from orion.util.codec import CacheCodec
 
 
 class TestMemoryTTLCache(TestCase):
@@ -30,6 +36,16 @@ class TestMemoryTTLCache(TestCase):
         with self._patch_time(3):
             self.assertIsNone(self.cache.get('key'))
 
+    def test_add(self):
+        with self._patch_time(1):
+            self.assertTrue(self.cache.add('key', 'value', 1000))
+            self.assertFalse(self.cache.add('key', 'other', 1000))
+            self.assertEqual(self.cache.get('key'), 'value')
+
+        with self._patch_time(3):
+            self.assertTrue(self.cache.add('key', 'other', 1000))
+            self.assertEqual(self.cache.get('key'), 'other')
+
     def test_delete_within_ttl(self):
         with self._patch_time(1):
             self.cache.set('key', 'value', 1000)
@@ -45,11 +61,167 @@ class TestMemoryTTLCache(TestCase):
             self.cache.delete('key')
             self.assertIsNone(self.cache.get('key'))
 
+    def test_max_entries_lru(self):
+        cache = MemoryTTLCache(max_entries=2)
+        cache.set('a', 'value', 1000)
+        cache.set('b', 'value', 1000)
+        cache.get('a')
+        cache.set('c', 'value', 1000)
+
+        self.assertEqual(cache.get('a'), 'value')
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('c'), 'value')
+        self.assertEqual(cache.num_evictions, 1)
+
+    def test_max_bytes(self):
+        cache = MemoryTTLCache(max_bytes=1)
+        cache.set('a', 'value', 1000)
+        cache.set('b', 'value', 1000)
+
+        # The most recent entry is always retained
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.get('b'), 'value')
+        self.assertEqual(len(cache.store), 1)
+
+    def test_num_bytes(self):
+        self.cache.set('key', 'value', 1000)
+        num_bytes = self.cache.num_bytes
+        self.cache.set('key', 'value', 1000)
+
+        self.assertGreater(num_bytes, 0)
+        self.assertEqual(self.cache.num_bytes, num_bytes)
+        self.cache.delete('key')
+        self.assertEqual(self.cache.num_bytes, 0)
+
+    def test_sweep(self):
+        cache = MemoryTTLCache(sweep_chunk_size=2)
+
+        with self._patch_time(1):
+            for key in range(5):
+                cache.set(key, 'value', 1000)
+            cache.set('live', 'value', 5000)
+            # Overwritten entries are swept according to their latest expiry
+            cache.set(0, 'value', 5000)
+
+        with self._patch_time(3):
+            self.assertEqual(cache.sweep(), 4)
+
+        self.assertEqual(sorted(cache.store), [0, 'live'])
+        self.assertEqual(cache.num_expirations, 4)
+
+    def test_expiry_heap_compaction(self):
+        cache = MemoryTTLCache(sweep_chunk_size=1)
+        for _ in range(100):
+            cache.set('key', 'value', 1000)
+
+        self.assertLessEqual(len(cache.expiries), 3)
+
+    def test_sweeper_thread(self):
+        mock_metrics_gauge = mock.MagicMock()
+        cache = MemoryTTLCache(sweep_interval_ms=1, metrics_gauge=mock_metrics_gauge)
+        self.addCleanup(cache.close)
+        cache.set('key', 'value', 0)
+
+        while cache.store:
+            time.sleep(0.001)
+
+        self.assertEqual(cache.num_expirations, 1)
+
+    def test_clear(self):
+        memory = MemoryTTLCache()
+        memory.set('key', 'value', 1000)
+        memory.clear()
+        sharded = ShardedMemoryTTLCache()
+        sharded.set('key', 'value', 1000)
+        sharded.clear()
+
+        self.assertIsNone(memory.get('key'))
+        self.assertEqual(memory.num_bytes, 0)
+        self.assertIsNone(sharded.get('key'))
+
+    def test_get_set_delete_many(self):
+        self.cache.set_many({'a': 'x', 'b': 'y'}, 1000)
+
+        self.assertEqual(self.cache.get_many(['a', 'c', 'b']), ['x', None, 'y'])
+
+        self.cache.delete_many(['a', 'c'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), [None, 'y'])
+
+    def test_delete_if_equal(self):
+        with self._patch_time(1):
+            self.cache.set('key', 'value', 1000)
+
+            self.assertFalse(self.cache.delete_if_equal('key', 'other'))
+            self.assertEqual(self.cache.get('key'), 'value')
+
+            self.assertTrue(self.cache.delete_if_equal('key', 'value'))
+            self.assertIsNone(self.cache.get('key'))
+
+            self.assertFalse(self.cache.delete_if_equal('key', 'value'))
+
     @staticmethod
     def _patch_time(timestamp):
         return mock.patch.object(time, 'time', return_value=timestamp)
 
 
+class TestShardedMemoryTTLCache(TestCase):
+    def setUp(self):
+        self.cache = ShardedMemoryTTLCache(num_shards=4, max_entries=8)
+
+    def test_get_set_delete(self):
+        for key in range(8):
+            self.cache.set(key, 'value', 1000)
+
+        self.assertEqual([len(shard.store) for shard in self.cache.shards], [2, 2, 2, 2])
+        self.assertTrue(all(self.cache.get(key) == 'value' for key in range(8)))
+
+        self.cache.delete(0)
+        self.assertIsNone(self.cache.get(0))
+        self.assertEqual(self.cache.get(4), 'value')
+
+    def test_add(self):
+        self.assertTrue(self.cache.add('key', 'value', 1000))
+        self.assertFalse(self.cache.add('key', 'other', 1000))
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_get_set_delete_many(self):
+        self.cache.set_many({key: str(key) for key in range(8)}, 1000)
+
+        self.assertEqual([len(shard.store) for shard in self.cache.shards], [2, 2, 2, 2])
+        self.assertEqual(self.cache.get_many([7, 0, 9, 0]), ['7', '0', None, '0'])
+
+        self.cache.delete_many([0, 1, 4])
+        self.assertEqual(self.cache.get_many(range(6)), [None, None, '2', '3', None, '5'])
+
+    def test_max_entries(self):
+        for key in range(12):
+            self.cache.set(key, 'value', 1000)
+
+        self.assertEqual([shard.max_entries for shard in self.cache.shards], [2, 2, 2, 2])
+        self.assertEqual(sum(len(shard.store) for shard in self.cache.shards), 8)
+        self.assertIsNone(self.cache.get(0))
+        self.assertEqual(self.cache.get(11), 'value')
+
+    def test_sweep(self):
+        with mock.patch.object(time, 'time', return_value=1):
+            for key in range(8):
+                self.cache.set(key, 'value', 1000)
+
+        with mock.patch.object(time, 'time', return_value=3):
+            self.assertEqual(self.cache.sweep(), 8)
+
+    def test_sweeper_thread(self):
+        mock_metrics_gauge = mock.MagicMock()
+        cache = ShardedMemoryTTLCache(sweep_interval_ms=1, metrics_gauge=mock_metrics_gauge)
+        self.addCleanup(cache.close)
+        cache.set('key', 'value', 0)
+
+        while any(shard.store for shard in cache.shards):
+            time.sleep(0.001)
+
+        self.assertEqual(sum(shard.num_expirations for shard in cache.shards), 1)
+
+
 class TestRedisProxyClient(TestCase):
     @mock.patch.object(redis, 'Redis')
     def setUp(self, *args):
@@ -75,6 +247,37 @@ class TestRedisProxyClient(TestCase):
         self.cache.redis.set.side_effect = ConnectionError
         self.cache.set('key', 'value', 1000)
 
+    def test_add(self):
+        self.cache.redis.set.return_value = True
+        self.assertTrue(self.cache.add('key', 'value', 1000))
+        self.cache.redis.set.assert_called_with('key', 'value', px=1000, nx=True)
+
+        self.cache.redis.set.return_value = None
+        self.assertFalse(self.cache.add('key', 'value', 1000))
+
+    def test_add_failover(self):
+        self.cache.redis.set.side_effect = ConnectionError
+
+        self.assertTrue(self.cache.add('key', 'value', 1000))
+        self.assertFalse(self.cache.add('key', 'value', 1000))
+
+    def test_delete_if_equal(self):
+        self.cache.delete_if_equal_script.return_value = 1
+        self.assertTrue(self.cache.delete_if_equal('key', 'value'))
+        self.cache.delete_if_equal_script.assert_called_with(keys=['key'], args=['value'])
+
+        self.cache.delete_if_equal_script.return_value = 0
+        self.assertFalse(self.cache.delete_if_equal('key', 'value'))
+
+    def test_delete_if_equal_failover(self):
+        self.cache.redis.set.side_effect = ConnectionError
+        self.cache.delete_if_equal_script.side_effect = ConnectionError
+
+        self.assertTrue(self.cache.add('key', 'value', 1000))
+        self.assertFalse(self.cache.delete_if_equal('key', 'other'))
+        self.assertTrue(self.cache.delete_if_equal('key', 'value'))
+        self.assertTrue(self.cache.add('key', 'value', 1000))
+
     def test_delete_memory_dark_write(self):
         self.cache.delete('key')
         self.cache.redis.delete.assert_called_with('key')
@@ -82,6 +285,432 @@ class TestRedisProxyClient(TestCase):
         self.cache.redis.delete.side_effect = ConnectionError
         self.cache.delete('key')
 
+    def test_get_many_redis(self):
+        self.cache.redis.mget.return_value = ['a', None]
+
+        self.assertEqual(self.cache.get_many(['key1', 'key2']), ['a', None])
+        self.cache.redis.mget.assert_called_with(['key1', 'key2'])
+
+    def test_get_many_failover(self):
+        self.cache.memory.set('key1', 'memory', 1000)
+        self.cache.redis.mget.side_effect = ConnectionError
+
+        self.assertEqual(self.cache.get_many(['key1', 'key2']), ['memory', None])
+
+    def test_set_many_pipelined(self):
+        self.cache.set_many({'key1': 'a', 'key2': 'b'}, 1000)
+
+        self.cache.redis.pipeline.assert_called_with(transaction=False)
+        pipeline = self.cache.redis.pipeline.return_value
+        pipeline.set.assert_has_calls([
+            mock.call('key1', 'a', px=1000),
+            mock.call('key2', 'b', px=1000),
+        ], any_order=True)
+        pipeline.execute.assert_called_with()
+        self.assertEqual(self.cache.memory.get_many(['key1', 'key2']), ['a', 'b'])
+
+    def test_set_many_failover(self):
+        self.cache.redis.pipeline.return_value.execute.side_effect = ConnectionError
+        self.cache.set_many({'key1': 'a'}, 1000)
+
+        self.assertEqual(self.cache.memory.get('key1'), 'a')
+
+    def test_set_many_empty(self):
+        self.cache.set_many({}, 1000)
+
+        self.assertFalse(self.cache.redis.pipeline.called)
+
+    def test_delete_many(self):
+        self.cache.memory.set('key1', 'a', 1000)
+        self.cache.delete_many(['key1', 'key2'])
+
+        self.cache.redis.delete.assert_called_with('key1', 'key2')
+        self.assertIsNone(self.cache.memory.get('key1'))
+
+        self.cache.redis.delete.side_effect = ConnectionError
+        self.cache.delete_many(['key1'])
+
+
+class TestRedisProxyClientCircuitBreaker(TestCase):
+    @mock.patch.object(redis, 'Redis')
+    def setUp(self, mock_redis):
+        self.mock_redis = mock_redis
+        self.mock_metrics_event = mock.MagicMock()
+        self.cache = RedisProxyClient(
+            'localhost:6379',
+            metrics_event=self.mock_metrics_event,
+            connect_timeout_ms=100,
+            socket_timeout_ms=200,
+            breaker_failure_threshold=2,
+            breaker_cooldown_ms=1000,
+            resync_max_keys=2,
+        )
+
+    def test_timeouts(self):
+        self.mock_redis.assert_any_call(
+            host='localhost',
+            port='6379',
+            socket_connect_timeout=0.1,
+            socket_timeout=0.2,
+        )
+
+    def test_breaker_opens(self):
+        self.cache.redis.get.side_effect = ConnectionError
+        self.cache.memory.set('key', 'memory', 1000)
+
+        for _ in range(5):
+            self.assertEqual(self.cache.get('key'), 'memory')
+
+        # Redis is bypassed once the failure threshold is reached
+        self.assertEqual(self.cache.redis.get.call_count, 2)
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'cache.redis.breaker_transition',
+            {'node': 'localhost:6379', 'state': 'open'},
+        )
+
+    def test_breaker_half_open_probe(self):
+        self.cache.redis.get.side_effect = ConnectionError
+        with mock.patch.object(time, 'time', return_value=1):
+            self.cache.get('key')
+            self.cache.get('key')
+
+        self.cache.redis.get.side_effect = None
+        self.cache.redis.get.return_value = 'redis'
+        with mock.patch.object(time, 'time', return_value=1.5):
+            self.assertNotEqual(self.cache.get('key'), 'redis')
+        with mock.patch.object(time, 'time', return_value=2.5):
+            self.assertEqual(self.cache.get('key'), 'redis')
+
+        self.assertEqual(self.cache.breaker.state, 'closed')
+
+    def test_breaker_error_reply(self):
+        self.cache.redis.get.side_effect = ResponseError('LOADING Redis is loading the dataset')
+        self.cache.memory.set('key', 'memory', 1000)
+
+        with mock.patch.object(time, 'time', return_value=1):
+            self.assertEqual(self.cache.get('key'), 'memory')
+            self.assertEqual(self.cache.get('key'), 'memory')
+            self.assertEqual(self.cache.breaker.state, 'open')
+
+        # A half-open probe failing with an error reply reopens the breaker
+        with mock.patch.object(time, 'time', return_value=2.5):
+            self.assertEqual(self.cache.get('key'), 'memory')
+            self.assertEqual(self.cache.breaker.state, 'open')
+
+    def test_resync(self):
+        self.cache.redis.set.side_effect = ConnectionError
+        self.cache.redis.delete.side_effect = ConnectionError
+        self.cache.set('a', 'value', 60000)
+        self.cache.set('b', 'value', 60000)
+        self.cache.delete('c')
+        self.cache.set('b', 'new', 60000)
+
+        # The oldest key is dropped beyond the maximum
+        self.assertEqual(self.cache.resync_keys.keys(), ['c', 'b'])
+
+        self.cache.redis.set.side_effect = None
+        self.cache.redis.delete.side_effect = None
+        self.cache.breaker = CircuitBreaker()
+        self.assertEqual(self.cache.resync(), 2)
+
+        self.cache.redis.delete.assert_called_with('c')
+        key, value = self.cache.redis.set.call_args[0]
+        self.assertEqual((key, value), ('b', 'new'))
+        self.assertGreater(self.cache.redis.set.call_args[1]['px'], 59000)
+        self.assertFalse(self.cache.resync_keys)
+
+    def test_resync_on_recovery(self):
+        resynced = threading.Event()
+        self.cache.resync = mock.MagicMock(side_effect=lambda: resynced.set())
+        self.cache.redis.set.side_effect = ConnectionError
+        self.cache.set('a', 'value', 60000)
+        self.cache.set('b', 'value', 60000)
+
+        self.cache.breaker.record_success()
+
+        self.assertTrue(resynced.wait(5))
+
+    def test_resync_failure(self):
+        self.cache.redis.set.side_effect = ConnectionError
+        self.cache.set('a', 'value', 60000)
+        self.cache.set('b', 'value', 60000)
+
+        self.assertEqual(self.cache.resync(), 0)
+        self.assertEqual(self.cache.resync_keys.keys(), ['a', 'b'])
+
+    def test_resync_disabled(self):
+        with mock.patch.object(redis, 'Redis'):
+            cache = RedisProxyClient('localhost:6379')
+
+        cache.redis.set.side_effect = ConnectionError
+        cache.set('key', 'value', 1000)
+
+        self.assertFalse(cache.resync_keys)
+
+
+class TestRedisProxyClientNearCache(TestCase):
+    @mock.patch.object(redis, 'Redis')
+    def setUp(self, *args):
+        self.mock_metrics_event = mock.MagicMock()
+        self.cache = RedisProxyClient(
+            'localhost:6379',
+            near_cache=MemoryTTLCache(),
+            near_cache_ttl_ms=1000,
+            metrics_event=self.mock_metrics_event,
+        )
+
+    def test_get_read_through(self):
+        self.cache.redis.get.return_value = 'redis'
+
+        self.assertEqual(self.cache.get('key'), 'redis')
+        self.assertEqual(self.cache.get('key'), 'redis')
+        self.assertEqual(self.cache.redis.get.call_count, 1)
+        self.mock_metrics_event.emit_event.assert_has_calls([
+            mock.call('cache.lookup', {'tier': 'near', 'result': 'miss'}, sample_rate=1),
+            mock.call('cache.lookup', {'tier': 'redis', 'result': 'hit'}, sample_rate=1),
+            mock.call('cache.lookup', {'tier': 'near', 'result': 'hit'}, sample_rate=1),
+        ])
+
+    def test_get_miss_not_cached(self):
+        self.cache.redis.get.return_value = None
+
+        self.assertIsNone(self.cache.get('key'))
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.redis.get.call_count, 2)
+
+    def test_get_staleness(self):
+        self.cache.redis.get.return_value = 'old'
+        with mock.patch.object(time, 'time', return_value=1):
+            self.assertEqual(self.cache.get('key'), 'old')
+
+        self.cache.redis.get.return_value = 'new'
+        with mock.patch.object(time, 'time', return_value=1.5):
+            self.assertEqual(self.cache.get('key'), 'old')
+        with mock.patch.object(time, 'time', return_value=2.5):
+            self.assertEqual(self.cache.get('key'), 'new')
+
+    def test_set_delete(self):
+        self.cache.set('key', 'value', 500)
+
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertFalse(self.cache.redis.get.called)
+        self.assertFalse(self.cache.redis.publish.called)
+
+        self.cache.redis.get.return_value = None
+        self.cache.delete('key')
+        self.assertIsNone(self.cache.get('key'))
+
+    def test_add_bypasses_near_cache(self):
+        self.cache.redis.set.return_value = True
+        self.cache.add('key', 'value', 1000)
+
+        self.assertIsNone(self.cache.near_cache.get('key'))
+
+    @mock.patch.object(redis, 'Redis')
+    def test_invalidation(self, *args):
+        cache = RedisProxyClient('localhost:6379', near_cache=MemoryTTLCache())
+        cache.invalidation_channel = 'channel'
+        cache.near_cache.set('key', 'value', 1000)
+        cache.near_cache.set('other:key', 'value', 1000)
+
+        cache.delete('key')
+        cache.redis.publish.assert_called_with('channel', '{}:key'.format(cache.origin))
+
+        # Broadcasts from this process are ignored; those from other processes evict the key
+        cache.near_cache.set('key', 'value', 1000)
+        cache._handle_invalidation({'type': 'message', 'data': '{}:key'.format(cache.origin)})
+        self.assertEqual(cache.near_cache.get('key'), 'value')
+        cache._handle_invalidation({'type': 'message', 'data': 'origin:key'})
+        self.assertIsNone(cache.near_cache.get('key'))
+        cache._handle_invalidation({'type': 'message', 'data': 'origin:other:key'})
+        self.assertIsNone(cache.near_cache.get('other:key'))
+
+    @mock.patch.object(redis, 'Redis')
+    def test_invalidation_listener_resubscribe(self, *args):
+        cache = RedisProxyClient('localhost:6379', near_cache=MemoryTTLCache())
+        cache.invalidation_channel = 'channel'
+        mock_pubsub = cache.redis.pubsub()
+        mock_pubsub.listen.side_effect = ConnectionError
+        cache.near_cache.set('key', 'value', 1000)
+
+        # Run a single iteration of the listener, closing it instead of backing off
+        cache.closed.wait = lambda timeout: cache.closed.set()
+        cache._listen_invalidations()
+
+        mock_pubsub.subscribe.assert_called_with('channel')
+        self.assertIsNone(cache.near_cache.get('key'))
+
+
+class TestShardedRedisProxyClient(TestCase):
+    @mock.patch.object(redis, 'Redis')
+    def setUp(self, *args):
+        self.memory = MemoryTTLCache()
+        self.backends = {
+            addr: RedisProxyClient(addr, memory=self.memory)
+            for addr in ['node1:6379', 'node2:6379']
+        }
+        for backend in self.backends.values():
+            backend.redis = mock.MagicMock()
+        self.cache = ShardedRedisProxyClient(self.backends)
+        self.keys = ['key{}'.format(idx) for idx in range(20)]
+
+    def test_routing(self):
+        for key in self.keys:
+            self.cache.set(key, 'value', 1000)
+
+        for addr, backend in self.backends.items():
+            routed = [args[0] for args, _ in backend.redis.set.call_args_list]
+            self.assertTrue(routed)
+            self.assertTrue(all(self.cache.ring.get_node(key) == addr for key in routed))
+
+    def test_get_many(self):
+        for backend in self.backends.values():
+            backend.redis.mget.side_effect = lambda keys: [key.upper() for key in keys]
+
+        self.assertEqual(self.cache.get_many(self.keys), [key.upper() for key in self.keys])
+        self.assertTrue(all(
+            backend.redis.mget.call_count == 1
+            for backend in self.backends.values()
+        ))
+
+    def test_node_failure(self):
+        failed = self.backends['node1:6379']
+        failed.redis.get.side_effect = ConnectionError
+        failed.redis.set.side_effect = ConnectionError
+        self.backends['node2:6379'].redis.get.return_value = 'redis'
+
+        for key in self.keys:
+            self.cache.set(key, 'memory', 1000)
+
+        for key in self.keys:
+            expected = 'memory' if self.cache.ring.get_node(key) == 'node1:6379' else 'redis'
+            self.assertEqual(self.cache.get(key), expected)
+
+    def test_last_tier(self):
+        self.backends['node1:6379'].redis.mget.side_effect = ConnectionError
+
+        self.cache.get_many(self.keys)
+        self.assertEqual(self.cache.last_tier(), 'memory')
+
+        key = next(key for key in self.keys if self.cache.ring.get_node(key) == 'node2:6379')
+        self.cache.get(key)
+        self.assertEqual(self.cache.last_tier(), 'redis')
+
+    def test_delete_many(self):
+        self.cache.delete_many(self.keys)
+
+        deleted = [
+            key
+            for backend in self.backends.values()
+            for args, _ in backend.redis.delete.call_args_list
+            for key in args
+        ]
+        self.assertEqual(sorted(deleted), sorted(self.keys))
+
+
+class TestCacheClientInstrumentation(TestCase):
+    @mock.patch.object(redis, 'Redis')
+    def setUp(self, *args):
+        self.mock_metrics_event = mock.MagicMock()
+        self.mock_metrics_latency = mock.MagicMock()
+        self.client = CacheClient(
+            'localhost:6379',
+            'prefix',
+            metrics_event=self.mock_metrics_event,
+            metrics_latency=self.mock_metrics_latency,
+            metrics_sample_rate=0.5,
+        )
+        self.redis = self.client.backend.redis
+
+    def _events(self, metric):
+        return [
+            (args[1], kwargs['count'])
+            for args, kwargs in self.mock_metrics_event.emit_event.call_args_list
+            if args[0] == metric
+        ]
+
+    def test_get(self):
+        self.redis.get.return_value = 'value'
+        self.client.get('namespace', 'key')
+
+        self.assertEqual(self._events('cache.operation'), [({
+            'namespace': 'namespace',
+            'operation': 'get',
+            'backend': 'redis',
+            'result': 'hit',
+        }, 1)])
+        self.assertEqual(self._events('cache.bytes'), [
+            ({'namespace': 'namespace', 'operation': 'get'}, 5),
+        ])
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'cache.bytes',
+            mock.ANY,
+            count=5,
+            sample_rate=0.5,
+        )
+        _, _, tags = self.mock_metrics_latency.emit_timing.call_args[0]
+        self.assertEqual(tags, {'namespace': 'namespace', 'operation': 'get', 'backend': 'redis'})
+
+    def test_get_fallback(self):
+        self.redis.get.side_effect = ConnectionError
+        self.client.get('namespace', 'key')
+
+        self.assertEqual(self._events('cache.operation'), [({
+            'namespace': 'namespace',
+            'operation': 'get',
+            'backend': 'memory',
+            'result': 'miss',
+        }, 1)])
+        self.assertEqual(self._events('cache.bytes'), [])
+
+    def test_get_many(self):
+        self.redis.mget.return_value = ['a', None, 'bc']
+        self.client.get_many([
+            ('namespace', 'key', {'a': 1}),
+            ('namespace', 'key', {'a': 2}),
+            ('other', 'key', {}),
+        ])
+
+        self.assertEqual(sorted(self._events('cache.operation')), sorted([
+            ({'namespace': 'namespace', 'operation': 'get_many', 'backend': 'redis',
+              'result': 'hit'}, 1),
+            ({'namespace': 'namespace', 'operation': 'get_many', 'backend': 'redis',
+              'result': 'miss'}, 1),
+            ({'namespace': 'other', 'operation': 'get_many', 'backend': 'redis',
+              'result': 'hit'}, 1),
+        ]))
+        self.assertEqual(self.mock_metrics_latency.emit_timing.call_count, 2)
+
+    def test_set(self):
+        self.client.set('namespace', 'key', {}, 'value', 1000)
+
+        self.assertEqual(self._events('cache.operation'), [({
+            'namespace': 'namespace',
+            'operation': 'set',
+            'backend': 'redis',
+            'result': 'write',
+        }, 1)])
+        self.assertEqual(self._events('cache.bytes'), [
+            ({'namespace': 'namespace', 'operation': 'set'}, 5),
+        ])
+
+    def test_memory_backend(self):
+        client = CacheClient(None, 'prefix', metrics_event=self.mock_metrics_event)
+        client.delete('namespace', 'key', {})
+
+        self.assertEqual(self._events('cache.operation'), [({
+            'namespace': 'namespace',
+            'operation': 'delete',
+            'backend': 'memory',
+            'result': 'write',
+        }, 1)])
+
+    def test_disabled(self):
+        client = CacheClient(None, 'prefix')
+        client.get('namespace', 'key')
+
+        self.assertFalse(self.mock_metrics_event.emit_event.called)
+
 
 class TestCacheClient(TestCase):
     @mock.patch.object(cache, 'MemoryTTLCache')
@@ -106,6 +735,71 @@ class TestCacheClient(TestCase):
         rw_client.delete()
         self.redis_client.backend.delete.assert_called_with(key='prefix:namespace:key:')
 
+        rw_client.add('value', 1000)
+        self.redis_client.backend.add.assert_called_with(
+            key='prefix:namespace:key:',
+            value='value',
+            ttl=1000,
+        )
+
+        rw_client.delete_if_equal('value')
+        self.redis_client.backend.delete_if_equal.assert_called_with(
+            key='prefix:namespace:key:',
+            value='value',
+        )
+
+    def test_rw_batch_client(self):
+        rw_client = self.redis_client.rw_batch_client([
+            ('namespace', 'key', {'a': 1}),
+            ('namespace', 'key', {'a': 2}),
+        ])
+        keys = ['prefix:namespace:key:a=1', 'prefix:namespace:key:a=2']
+
+        rw_client.get()
+        self.redis_client.backend.get_many.assert_called_with(keys=keys)
+
+        rw_client.set(['x', 'y'], 1000)
+        self.redis_client.backend.set_many.assert_called_with(
+            mapping={keys[0]: 'x', keys[1]: 'y'},
+            ttl=1000,
+        )
+
+        rw_client.delete()
+        self.redis_client.backend.delete_many.assert_called_with(keys=keys)
+
+    @mock.patch.object(cache, 'RedisProxyClient')
+    def test_sharded_backend(self, *args):
+        client = CacheClient(['node1:6379', 'node2:6379'], 'prefix')
+
+        self.assertIsInstance(client.backend, ShardedRedisProxyClient)
+        self.assertEqual(sorted(client.backend.backends.keys()), ['node1:6379', 'node2:6379'])
+
+    def test_codec(self):
+        client = CacheClient(None, 'prefix', memory=MemoryTTLCache(), codec=CacheCodec())
+        client.set('namespace', 'key', {}, {'place_name': 'address'}, 1000)
+        client.set_many([(('namespace', 'other', {}), 'address')], 1000)
+
+        self.assertEqual(client.backend.get('prefix:namespace:other:'), '\x81address')
+        self.assertEqual(client.get('namespace', 'key'), {'place_name': 'address'})
+        self.assertEqual(
+            client.get_many([('namespace', 'key', {}), ('namespace', 'other', {})]),
+            [{'place_name': 'address'}, 'address'],
+        )
+
+    def test_codec_mixed_formats(self):
+        client = CacheClient(None, 'prefix', memory=MemoryTTLCache())
+        client.backend.set('prefix:namespace:legacy:', 'address', 1000)
+        client.backend.set('prefix:namespace:encoded:', '\x81address', 1000)
+        client.backend.set('prefix:namespace:corrupt:', '\x91address', 1000)
+        client.backend.set('prefix:namespace:msgpack:', '\x83\x92\xa1', 1000)
+        client.backend.set('prefix:namespace:lz4:', '\xa1\xff\xff\xff\x7faddress', 1000)
+
+        self.assertEqual(client.get('namespace', 'legacy'), 'address')
+        self.assertEqual(client.get('namespace', 'encoded'), 'address')
+        self.assertIsNone(client.get('namespace', 'corrupt'))
+        self.assertIsNone(client.get('namespace', 'msgpack'))
+        self.assertIsNone(client.get('namespace', 'lz4'))
+
     def test_format_key_valid(self):
         self.assertEqual(
             self.redis_client._format_key('namespace', 'key', {'a': 'b', 'c': 4}),
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import tempfile
+from unittest import TestCase
+
+import mock
+from sqlalchemy.exc import OperationalError
+
+from orion.clients.cache import CacheClient
+from orion.clients.cache_warmer import CacheWarmerClient
+from orion.util.geocode import reverse_geocode_cache_entry
+
+
+class TestCacheWarmerClient(TestCase):
+    def setUp(self):
+        self.cache = CacheClient(addr=None, prefix='prefix')
+        self.mock_db = mock.MagicMock()
+        self.mock_execute = self.mock_db.engine.connect().__enter__().execute
+        self.mock_execute().fetchall.side_effect = [
+            [(4, 1.0, 2.0, 'address 1'), (3, 1.0000001, 2.0, 'stale address 1')],
+            [(2, 3.0, 4.0, 'address 2'), (1, 5.0, 6.0, 'address 3')],
+            [],
+        ]
+        self.mock_execute.reset_mock()
+        self.mock_metrics_event = mock.MagicMock()
+        self.mock_metrics_gauge = mock.MagicMock()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _client(self, max_entries=100, **kwargs):
+        client = CacheWarmerClient(
+            cache=self.cache,
+            db=self.mock_db,
+            metrics_event=self.mock_metrics_event,
+            metrics_gauge=self.mock_metrics_gauge,
+            batch_interval_ms=0,
+            **kwargs
+        )
+        # Enable the client only once constructed, so that it is warmed synchronously
+        client.max_entries = max_entries
+
+        return client
+
+    def _cached(self, lat, lon):
+        return self.cache.get(*reverse_geocode_cache_entry(lat, lon))
+
+    def test_disabled(self):
+        client = CacheWarmerClient(
+            cache=self.cache,
+            db=self.mock_db,
+            metrics_event=self.mock_metrics_event,
+            metrics_gauge=self.mock_metrics_gauge,
+        )
+
+        self.assertFalse(client.enabled)
+        self.assertFalse(self.mock_execute.called)
+
+    def test_warm_db(self):
+        client = self._client()
+
+        self.assertEqual(client.warm(), 3)
+        self.assertEqual(self._cached(1.0, 2.0), 'address 1')
+        self.assertEqual(self._cached(3.0, 4.0), 'address 2')
+        self.assertEqual(self._cached(5.0, 6.0), 'address 3')
+        self.assertEqual(self.mock_execute.call_count, 3)
+        self.mock_metrics_gauge.emit_gauge.assert_any_call(
+            'cache.warmup.loaded',
+            3,
+            {'source': 'database'},
+        )
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'cache.warmup',
+            {'source': 'database', 'outcome': 'success'},
+        )
+
+    def test_warm_max_entries(self):
+        client = self._client(max_entries=2)
+
+        self.assertEqual(client.warm(), 2)
+        self.assertIsNone(self._cached(5.0, 6.0))
+        self.assertEqual(self.mock_execute.call_count, 2)
+
+    def test_warm_existing_entries(self):
+        self.cache.set(*reverse_geocode_cache_entry(1.0, 2.0), value='fresh address', ttl=1000)
+        client = self._client()
+
+        self.assertEqual(client.warm(), 2)
+        self.assertEqual(self._cached(1.0, 2.0), 'fresh address')
+
+    def test_warm_db_error(self):
+        self.mock_execute.side_effect = OperationalError('statement', {}, 'orig')
+        client = self._client()
+
+        self.assertEqual(client.warm(), 0)
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'cache.warmup',
+            {'source': 'database', 'outcome': 'error'},
+        )
+
+    def test_snapshot(self):
+        path = os.path.join(self.tmpdir, 'snapshot')
+        client = self._client(max_entries=2, snapshot_path=path)
+        client.warm()
+        client.record(7.0, 8.0, 'address 4')
+        client.save_snapshot()
+
+        with open(path) as snapshot:
+            self.assertEqual(
+                [json.loads(line) for line in snapshot],
+                [[7.0, 8.0, 'address 4'], [3.0, 4.0, 'address 2']],
+            )
+
+        self.cache = CacheClient(addr=None, prefix='prefix')
+        self.mock_execute.reset_mock()
+        client = self._client(snapshot_path=path)
+
+        self.assertEqual(client.warm(), 2)
+        self.assertEqual(self._cached(7.0, 8.0), 'address 4')
+        self.assertFalse(self.mock_execute.called)
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'cache.warmup',
+            {'source': 'snapshot', 'outcome': 'success'},
+        )
+
+    def test_close(self):
+        path = os.path.join(self.tmpdir, 'snapshot')
+        client = self._client(snapshot_path=path)
+        client.record(1.0, 2.0, 'address 1')
+        client.close()
+        client.close()
+
+        self.assertTrue(client.shutdown.is_set())
+        self.assertTrue(os.path.exists(path))
@@ -7,7 +7,9 @@ import mock
 from orion.clients.config import ConfigClient
 from orion.clients.config import ConfigParam
 from orion.clients.config import _get_recursive_config_key
+from orion.clients.config import _parse_bool
 from orion.clients.config import _parse_config_json
+from orion.clients.config import _parse_list
 
 mock_required_config = {
     'config': {
@@ -47,6 +49,19 @@ class TestConfigUtils(TestCase):
         )
         self.assertIsNone(_get_recursive_config_key({}, ['unknown']))
 
+    def test_parse_bool(self):
+        self.assertTrue(_parse_bool(True))
+        self.assertTrue(_parse_bool('true'))
+        self.assertTrue(_parse_bool('1'))
+        self.assertFalse(_parse_bool(False))
+        self.assertFalse(_parse_bool('false'))
+        self.assertFalse(_parse_bool('0'))
+
+    def test_parse_list(self):
+        self.assertEqual(_parse_list('a:1'), ['a:1'])
+        self.assertEqual(_parse_list('a:1, b:2,'), ['a:1', 'b:2'])
+        self.assertEqual(_parse_list(['a:1', 'b:2']), ['a:1', 'b:2'])
+
     @mock.patch(
         '__builtin__.open'.format(__name__),
         mock.mock_open(read_data=json.dumps(mock_required_config)),
@@ -1,55 +1,158 @@
 from unittest import TestCase
 
-import requests
 import mock
+import requests
 
+from orion.clients import geocode
 from orion.clients.geocode import ReverseGeocodingClient
+from orion.clients.geocode import RateLimitBudgetExhaustedException
+from orion.clients.geocode import ReverseGeocodingException
+
+MOCK_URL = 'https://api.mapbox.com/geocoding/v5/mapbox.places/lon,lat.json' \
+    '?access_token=token&types=address'
 
 
 class TestReverseGeocodingClient(TestCase):
     def setUp(self):
-        self.auth_client = ReverseGeocodingClient('token')
+        self.auth_client = ReverseGeocodingClient('token', retry_backoff_ms=0)
         self.unauth_client = ReverseGeocodingClient()
 
-    @mock.patch.object(requests, 'get', return_value=mock.MagicMock(
-        status_code=200,
-        json=lambda: {'features': [{'place_name': 'address'}]},
-    ))
-    def test_reverse_geocode_valid(self, mock_request):
-        result = self.auth_client.reverse_geocode('lat', 'lon')
+        self.auth_client.session = mock.MagicMock()
+        self.unauth_client.session = mock.MagicMock()
 
-        mock_request.assert_called_with(
-            url='https://api.mapbox.com/geocoding/v5/mapbox.places/lon,lat.json'
-                '?access_token=token&types=address',
+    def test_reverse_geocode_valid(self):
+        self.auth_client.session.get.return_value = mock.MagicMock(
+            status_code=200,
+            json=lambda: {'features': [{'place_name': 'address'}]},
         )
-        self.assertEqual(result, {'place_name': 'address'})
 
-    @mock.patch.object(requests, 'get', return_value=mock.MagicMock(
-        status_code=200,
-        json=lambda: {'features': []},
-    ))
-    def test_reverse_geocode_no_results(self, mock_request):
         result = self.auth_client.reverse_geocode('lat', 'lon')
 
-        mock_request.assert_called_with(
-            url='https://api.mapbox.com/geocoding/v5/mapbox.places/lon,lat.json'
-                '?access_token=token&types=address',
+        self.auth_client.session.get.assert_called_with(url=MOCK_URL, timeout=(1.0, 2.0))
+        self.assertEqual(result, {'place_name': 'address'})
+
+    def test_reverse_geocode_no_results(self):
+        self.auth_client.session.get.return_value = mock.MagicMock(
+            status_code=200,
+            json=lambda: {'features': []},
         )
+
+        result = self.auth_client.reverse_geocode('lat', 'lon')
+
+        self.auth_client.session.get.assert_called_with(url=MOCK_URL, timeout=(1.0, 2.0))
         self.assertIsNone(result)
 
-    @mock.patch.object(requests, 'get')
-    def test_reverse_geocode_no_access_token(self, mock_request):
+    def test_reverse_geocode_no_access_token(self):
         result = self.unauth_client.reverse_geocode('lat', 'lon')
 
-        self.assertFalse(mock_request.called)
+        self.assertFalse(self.unauth_client.session.get.called)
         self.assertIsNone(result)
 
-    @mock.patch.object(requests, 'get', return_value=mock.MagicMock(status_code=401))
-    def test_reverse_geocode_api_failure(self, mock_request):
+    def test_reverse_geocode_api_failure(self):
+        self.auth_client.session.get.return_value = mock.MagicMock(status_code=401)
+
+        self.assertRaises(
+            ReverseGeocodingException,
+            self.auth_client.reverse_geocode,
+            'lat',
+            'lon',
+        )
+        self.auth_client.session.get.assert_called_once_with(url=MOCK_URL, timeout=(1.0, 2.0))
+
+    def test_reverse_geocode_retry(self):
+        self.auth_client.session.get.side_effect = [
+            requests.Timeout,
+            mock.MagicMock(status_code=503),
+            mock.MagicMock(status_code=200, json=lambda: {'features': [{'place_name': 'a'}]}),
+        ]
+
         result = self.auth_client.reverse_geocode('lat', 'lon')
 
-        mock_request.assert_called_with(
-            url='https://api.mapbox.com/geocoding/v5/mapbox.places/lon,lat.json'
-                '?access_token=token&types=address',
+        self.assertEqual(self.auth_client.session.get.call_count, 3)
+        self.assertEqual(result, {'place_name': 'a'})
+
+    def test_reverse_geocode_retries_exhausted(self):
+        self.auth_client.session.get.side_effect = requests.ConnectionError
+
+        self.assertRaises(
+            ReverseGeocodingException,
+            self.auth_client.reverse_geocode,
+            'lat',
+            'lon',
         )
-        self.assertIsNone(result)
+        self.assertEqual(self.auth_client.session.get.call_count, 3)
+
+    def test_reverse_geocode_transport_error(self):
+        self.auth_client.session.get.side_effect = requests.exceptions.ChunkedEncodingError
+        self.auth_client.breaker = mock.MagicMock()
+        self.auth_client.breaker.allow.return_value = True
+
+        self.assertRaises(
+            ReverseGeocodingException,
+            self.auth_client.reverse_geocode,
+            'lat',
+            'lon',
+        )
+        self.assertEqual(self.auth_client.breaker.record_failure.call_count, 3)
+
+    def test_reverse_geocode_malformed_response(self):
+        self.auth_client.session.get.return_value = mock.MagicMock(status_code=200)
+        self.auth_client.session.get.return_value.json.side_effect = ValueError
+        self.auth_client.breaker = mock.MagicMock()
+        self.auth_client.breaker.allow.return_value = True
+
+        self.assertRaises(
+            ReverseGeocodingException,
+            self.auth_client.reverse_geocode,
+            'lat',
+            'lon',
+        )
+        self.assertEqual(self.auth_client.breaker.record_failure.call_count, 1)
+        self.assertFalse(self.auth_client.breaker.record_success.called)
+
+    def test_reverse_geocode_rate_limited_no_retry(self):
+        self.auth_client.session.get.return_value = mock.MagicMock(status_code=429)
+
+        self.assertRaises(
+            ReverseGeocodingException,
+            self.auth_client.reverse_geocode,
+            'lat',
+            'lon',
+        )
+        self.assertEqual(self.auth_client.session.get.call_count, 1)
+
+    def test_reverse_geocode_breaker_open(self):
+        client = ReverseGeocodingClient(
+            'token',
+            metrics_gauge=mock.MagicMock(),
+            max_retries=0,
+            breaker_failure_threshold=2,
+        )
+        client.session = mock.MagicMock()
+        client.session.get.return_value = mock.MagicMock(status_code=429)
+
+        for _ in range(5):
+            self.assertRaises(ReverseGeocodingException, client.reverse_geocode, 'lat', 'lon')
+
+        # Calls are short-circuited once the failure threshold is reached
+        self.assertEqual(client.session.get.call_count, 2)
+        client.metrics_gauge.emit_gauge.assert_called_with(
+            'geocode.breaker_state',
+            geocode.BREAKER_STATE_GAUGE_VALUES['open'],
+        )
+
+    def test_session_pool(self):
+        client = ReverseGeocodingClient('token', pool_size=3)
+
+        self.assertEqual(client.session.get_adapter('https://api.mapbox.com')._pool_maxsize, 3)
+
+    def test_reverse_geocode_rate_limited(self):
+        self.auth_client.rate_limiter = mock.MagicMock()
+        self.auth_client.rate_limiter.acquire.return_value = False
+
+        with self.assertRaises(RateLimitBudgetExhaustedException):
+            self.auth_client.reverse_geocode('lat', 'lon', priority='bulk')
+
+        self.auth_client.rate_limiter.acquire.assert_called_once_with('bulk')
+        self.assertFalse(self.auth_client.session.get.called)
+        self.assertEqual(self.auth_client.breaker.state, 'closed')
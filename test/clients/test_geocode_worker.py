@@ -0,0 +1,90 @@
+import time
+from unittest import TestCase
+
+import mock
+
+from orion.clients.geocode_worker import GeocodeWorkerPool
+from test.fixtures.location import location_factory
+
+
+class TestGeocodeWorkerPool(TestCase):
+    def setUp(self):
+        self.mock_db = mock.MagicMock()
+        self.mock_conn = self.mock_db.engine.begin().__enter__()
+        self.mock_resolver = mock.MagicMock()
+        self.mock_metrics_event = mock.MagicMock()
+
+    def _pool(self, **kwargs):
+        pool = GeocodeWorkerPool(
+            db=self.mock_db,
+            resolver=self.mock_resolver,
+            metrics_event=self.mock_metrics_event,
+            metrics_gauge=mock.MagicMock(),
+            metrics_latency=mock.MagicMock(),
+            **kwargs
+        )
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_disabled(self):
+        pool = self._pool(enabled=False)
+
+        self.assertFalse(pool.enabled)
+        self.assertFalse(any(thread.is_alive() for thread in pool.workers))
+
+    def test_submit_queue_full(self):
+        pool = self._pool(enabled=False, queue_size=1)
+
+        self.assertTrue(pool.submit(location_factory()))
+        self.assertFalse(pool.submit(location_factory()))
+        self.mock_metrics_event.emit_event.assert_called_with('geocode_worker.rejected')
+
+    def test_resolve_and_update(self):
+        self.mock_resolver.resolve.side_effect = lambda lat, lon: 'address' if lat else None
+        pool = self._pool(enabled=True, num_workers=2, flush_interval_ms=1)
+
+        committed = location_factory(latitude=1.0, longitude=2.0)
+        committed.location_id = 5
+        buffered = location_factory(timestamp=10, latitude=3.0, longitude=4.0)
+        unresolved = location_factory(latitude=0, longitude=0)
+
+        for location in (committed, buffered, unresolved):
+            pool.submit(location)
+
+        # Wait for the workers to dequeue all locations; close() then waits for in-flight lookups
+        # and writes all resolved addresses.
+        while not pool.pending.empty():
+            time.sleep(0.001)
+        pool.close()
+
+        params = [
+            row
+            for (_, rows), _ in self.mock_conn.execute.call_args_list
+            for row in rows
+        ]
+        self.assertEqual(self.mock_resolver.resolve.call_count, 3)
+        self.assertIn({'_location_id': 5, '_address': 'address'}, params)
+        self.assertIn(
+            {'_user': 'user', '_device': 'device', '_timestamp': 10, '_address': 'address'},
+            params,
+        )
+        self.assertEqual(len(params), 2)
+
+    def test_update_invalidates_response_cache(self):
+        mock_response_cache = mock.MagicMock()
+        pool = self._pool(enabled=False, response_cache=mock_response_cache)
+
+        pool.resolved.put((location_factory(), 'address'))
+        pool.resolved.put((location_factory(), 'address'))
+        pool.close()
+
+        mock_response_cache.invalidate.assert_called_once_with('user', 'device')
+
+    def test_update_failure(self):
+        self.mock_conn.execute.side_effect = RuntimeError
+        pool = self._pool(enabled=False)
+
+        pool.resolved.put((location_factory(), 'address'))
+        pool.close()
+
+        self.mock_metrics_event.emit_event.assert_called_with('geocode_worker.update_failure')
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import TestCase
+
+import mock
+
+from orion.clients.local_geocoder import LocalGeocoderClient
+
+
+class TestLocalGeocoderClient(TestCase):
+    def setUp(self):
+        self.mock_db = mock.MagicMock()
+        self.mock_conn = self.mock_db.engine.connect().__enter__()
+        self.mock_result = self.mock_conn.execution_options().execute
+        self.mock_result.return_value = [
+            (37.7749, -122.4194, 'address 1'),
+            (37.7849, -122.4194, 'address 2'),
+        ]
+        self.mock_metrics_gauge = mock.MagicMock()
+        self.loaded = threading.Event()
+        self.mock_metrics_gauge.emit_gauge.side_effect = lambda *args: self.loaded.set()
+
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+
+    def _client(self, **kwargs):
+        return LocalGeocoderClient(
+            db=self.mock_db,
+            metrics_event=mock.MagicMock(),
+            metrics_gauge=self.mock_metrics_gauge,
+            **kwargs
+        )
+
+    def test_disabled(self):
+        client = self._client()
+
+        self.assertFalse(client.enabled)
+        self.assertEqual(len(client.tree), 0)
+        self.assertFalse(self.mock_result.called)
+
+    def test_load_db(self):
+        client = self._client(radius_m=50)
+        self.loaded.wait()
+
+        self.mock_metrics_gauge.emit_gauge.assert_called_with('local_geocoder.size', 2)
+        address, distance = client.nearest(37.7750, -122.4194)
+        self.assertEqual(address, 'address 1')
+        self.assertLess(distance, 20)
+        self.assertIsNone(client.nearest(37.7800, -122.4194))
+
+    def test_load_snapshot(self):
+        path = os.path.join(self.tmpdir, 'snapshot')
+        client = self._client(snapshot_path=path)
+        client.load()
+        client.add(37.8000, -122.4194, 'address 3')
+        client.save_snapshot(path)
+        self.mock_result.reset_mock()
+
+        client = self._client(snapshot_path=path)
+        client.load()
+
+        self.assertFalse(self.mock_result.called)
+        self.assertEqual(len(client.tree), 3)
+
+    def test_add(self):
+        client = self._client(radius_m=50, rebuild_threshold=2)
+        # Wait for the background load, which would otherwise replace the index built below
+        self.loaded.wait()
+
+        client.add(37.8000, -122.4194, 'address 3')
+        self.assertEqual(len(client.pending), 1)
+        self.assertEqual(client.nearest(37.8000, -122.4194), ('address 3', 0))
+
+        # Reaching the threshold folds pending addresses into the index
+        client.add(37.8100, -122.4194, 'address 4')
+        while client.pending:
+            time.sleep(0.001)
+
+        self.assertEqual(len(client.tree), 4)
+        self.assertEqual(client.nearest(37.8100, -122.4194), ('address 4', 0))
+
+    def test_add_duplicate_coordinate(self):
+        client = self._client(radius_m=50)
+        # Wait for the background load, which would otherwise replace the index built below
+        self.loaded.wait()
+        client.add(37.7749, -122.4194, 'new address')
+        client.rebuild()
+
+        self.assertEqual(len(client.tree), 2)
+        self.assertEqual(client.nearest(37.7749, -122.4194), ('new address', 0))
@@ -0,0 +1,51 @@
+from unittest import TestCase
+
+import mock
+
+from orion.clients.metrics import EventMetricsClient
+from orion.clients.metrics import LatencyMetricsClient
+
+
+class TestEventMetricsClient(TestCase):
+    def setUp(self):
+        self.client = EventMetricsClient(addr=None, prefix='orion')
+        self.client.hostname = 'host'
+        self.client.backend = mock.MagicMock()
+
+    def test_emit_event(self):
+        self.client.emit_event('metric', {'tag': 'value'})
+
+        self.client.backend.incr.assert_called_with(mock.ANY, 1, rate=1)
+        stat = self.client.backend.incr.call_args[0][0]
+        self.assertTrue(stat.startswith('event.metric,'))
+        self.assertIn('tag=value', stat)
+        self.assertIn('host=host', stat)
+
+    def test_emit_event_sampled(self):
+        self.client.emit_event('metric', count=5, sample_rate=0.1)
+
+        self.client.backend.incr.assert_called_with('event.metric,host=host', 5, rate=0.1)
+
+
+class TestLatencyMetricsClient(TestCase):
+    def setUp(self):
+        self.client = LatencyMetricsClient(addr=None, prefix='orion')
+        self.client.hostname = 'host'
+        self.client.backend = mock.MagicMock()
+
+    def test_emit_timing(self):
+        self.client.emit_timing('metric', 12.5, sample_rate=0.1)
+
+        self.client.backend.timing.assert_called_with(
+            stat='latency.metric,host=host',
+            delta=12.5,
+            rate=0.1,
+        )
+
+    def test_profile(self):
+        with self.client.profile('metric'):
+            pass
+
+        _, kwargs = self.client.backend.timing.call_args
+        self.assertEqual(kwargs['stat'], 'latency.metric,host=host')
+        self.assertEqual(kwargs['rate'], 1)
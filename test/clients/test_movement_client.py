@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import mock
+
+from orion.clients.cache import CacheClient
+from orion.clients.movement import MovementSuppressionClient
+
+
+class TestMovementSuppressionClient(TestCase):
+    def setUp(self):
+        self.cache = CacheClient(addr=None, prefix='prefix')
+        self.mock_metrics_event = mock.MagicMock()
+        self.client = MovementSuppressionClient(
+            cache=self.cache,
+            metrics_event=self.mock_metrics_event,
+            distance_m=50,
+        )
+
+    def test_enabled(self):
+        self.assertTrue(self.client.enabled)
+        self.assertFalse(MovementSuppressionClient(self.cache, self.mock_metrics_event).enabled)
+
+    def test_last_address_no_state(self):
+        self.assertIsNone(self.client.last_address('user', 'device', 37.7749, -122.4194))
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'geocode.suppression',
+            {'outcome': 'no_state'},
+        )
+
+    def test_last_address_suppressed(self):
+        self.client.record('user', 'device', 37.7749, -122.4194, 'address')
+
+        self.assertEqual(
+            self.client.last_address('user', 'device', 37.7750, -122.4194, 20),
+            'address',
+        )
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'geocode.suppression',
+            {'outcome': 'suppressed'},
+        )
+
+    def test_last_address_moved(self):
+        self.client.record('user', 'device', 37.7749, -122.4194, 'address')
+
+        self.assertIsNone(self.client.last_address('user', 'device', 37.7760, -122.4194))
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'geocode.suppression',
+            {'outcome': 'moved'},
+        )
+
+    def test_last_address_outside_accuracy(self):
+        self.client.record('user', 'device', 37.7749, -122.4194, 'address')
+
+        self.assertIsNone(self.client.last_address('user', 'device', 37.7751, -122.4194, 5))
+        self.mock_metrics_event.emit_event.assert_called_with(
+            'geocode.suppression',
+            {'outcome': 'outside_accuracy'},
+        )
+
+    def test_last_address_per_device(self):
+        self.client.record('user', 'device', 37.7749, -122.4194, 'address')
+
+        self.assertIsNone(self.client.last_address('user', 'other', 37.7749, -122.4194))
+        self.assertIsNone(self.client.last_address(None, None, 37.7749, -122.4194))
+
+    def test_shared(self):
+        writer = MovementSuppressionClient(
+            cache=self.cache,
+            metrics_event=self.mock_metrics_event,
+            distance_m=50,
+            shared=True,
+        )
+        writer.record('user', 'device', 37.7749, -122.4194, 'address')
+        reader = MovementSuppressionClient(
+            cache=self.cache,
+            metrics_event=self.mock_metrics_event,
+            distance_m=50,
+            shared=True,
+        )
+
+        self.assertIsNone(self.client.last_address('user', 'device', 37.7749, -122.4194))
+        self.assertEqual(reader.last_address('user', 'device', 37.7749, -122.4194), 'address')
+
+    def test_shared_illegal_tags(self):
+        client = MovementSuppressionClient(
+            cache=self.cache,
+            metrics_event=self.mock_metrics_event,
+            distance_m=50,
+            shared=True,
+        )
+        client.record('user=', 'device', 37.7749, -122.4194, 'address')
+
+        self.assertEqual(client.last_address('user=', 'device', 37.7749, -122.4194), 'address')
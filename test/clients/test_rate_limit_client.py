@@ -0,0 +1,134 @@
+from unittest import TestCase
+
+import mock
+from redis.exceptions import ConnectionError
+from redis.exceptions import ResponseError
+
+from orion.clients.rate_limit import LocalTokenBucket
+from orion.clients.rate_limit import PRIORITY_BULK
+from orion.clients.rate_limit import PRIORITY_LIVE
+from orion.clients.rate_limit import RateLimiterClient
+from orion.clients.rate_limit import RedisTokenBucket
+
+
+class TestLocalTokenBucket(TestCase):
+    @mock.patch.object(LocalTokenBucket, '_epoch')
+    def test_take(self, mock_epoch):
+        mock_epoch.return_value = 0
+        bucket = LocalTokenBucket(capacity=2, rate=0.001)
+
+        self.assertEqual(bucket.take(1), (True, 1))
+        self.assertEqual(bucket.take(1), (True, 0))
+        self.assertEqual(bucket.take(1), (False, 0))
+
+        # One token is added per second, up to the capacity
+        mock_epoch.return_value = 1000
+        self.assertEqual(bucket.take(1), (True, 0))
+        mock_epoch.return_value = 10000
+        self.assertEqual(bucket.take(3), (False, 2))
+
+
+class TestRedisTokenBucket(TestCase):
+    @mock.patch('orion.clients.rate_limit.redis')
+    def test_take(self, mock_redis):
+        mock_script = mock_redis.Redis().register_script()
+        mock_script.return_value = [1, '4.5']
+        bucket = RedisTokenBucket(addr='localhost:6379', key='key', capacity=5, rate=0.001)
+
+        self.assertEqual(bucket.take(1), (True, 4.5))
+        _, kwargs = mock_script.call_args
+        self.assertEqual(kwargs['keys'], ['key'])
+        self.assertEqual(kwargs['args'][3], 1)
+
+    @mock.patch('orion.clients.rate_limit.redis')
+    def test_take_failover(self, mock_redis):
+        mock_redis.Redis().register_script().side_effect = ConnectionError
+        bucket = RedisTokenBucket(addr='localhost:6379', key='key', capacity=5, rate=0.001)
+
+        self.assertEqual(bucket.take(1), (True, 4))
+
+    @mock.patch('orion.clients.rate_limit.redis')
+    def test_take_error_reply(self, mock_redis):
+        mock_redis.Redis().register_script().side_effect = ResponseError('OOM')
+        bucket = RedisTokenBucket(addr='localhost:6379', key='key', capacity=5, rate=0.001)
+
+        self.assertEqual(bucket.take(1), (True, 4))
+
+    @mock.patch('orion.clients.rate_limit.redis')
+    def test_timeouts(self, mock_redis):
+        RedisTokenBucket(
+            addr='localhost:6379',
+            key='key',
+            capacity=5,
+            rate=0.001,
+            connect_timeout_ms=100,
+            socket_timeout_ms=200,
+        )
+
+        mock_redis.Redis.assert_called_with(
+            host='localhost',
+            port='6379',
+            socket_connect_timeout=0.1,
+            socket_timeout=0.2,
+        )
+
+
+class TestRateLimiterClient(TestCase):
+    def setUp(self):
+        self.mock_metrics_event = mock.MagicMock()
+
+    def _client(self, **kwargs):
+        return RateLimiterClient(
+            addr=None,
+            prefix='prefix',
+            metrics_event=self.mock_metrics_event,
+            metrics_gauge=mock.MagicMock(),
+            **kwargs
+        )
+
+    def test_disabled(self):
+        client = self._client()
+
+        self.assertFalse(client.enabled)
+        self.assertTrue(all(client.acquire() for _ in range(100)))
+        self.assertFalse(self.mock_metrics_event.emit_event.called)
+
+    def test_acquire_live(self):
+        client = self._client(qps=0.001, burst=2)
+
+        self.assertTrue(client.acquire(PRIORITY_LIVE))
+        self.assertTrue(client.acquire(PRIORITY_LIVE))
+        self.assertFalse(client.acquire(PRIORITY_LIVE))
+        self.mock_metrics_event.emit_event.assert_called_with('geocode.rate_limit', {
+            'priority': 'live',
+            'outcome': 'rejected',
+        })
+
+    def test_acquire_bulk_reserve(self):
+        client = self._client(qps=0.001, burst=4, live_reserve=0.5, bulk_wait_ms=1)
+
+        # Bulk requests may not use the half of the bucket reserved for live requests
+        self.assertTrue(client.acquire(PRIORITY_BULK))
+        self.assertTrue(client.acquire(PRIORITY_BULK))
+        self.assertFalse(client.acquire(PRIORITY_BULK))
+        self.mock_metrics_event.emit_event.assert_called_with('geocode.rate_limit', {
+            'priority': 'bulk',
+            'outcome': 'rejected',
+        })
+
+        self.assertTrue(client.acquire(PRIORITY_LIVE))
+        self.assertTrue(client.acquire(PRIORITY_LIVE))
+
+    @mock.patch('orion.clients.rate_limit.time.sleep')
+    @mock.patch.object(LocalTokenBucket, '_epoch')
+    def test_acquire_bulk_queued(self, mock_epoch, mock_sleep):
+        mock_epoch.side_effect = [0, 0, 0, 1000]
+        client = self._client(qps=1, burst=2, live_reserve=0.5, bulk_wait_ms=10000)
+
+        self.assertTrue(client.acquire(PRIORITY_LIVE))
+        self.assertTrue(client.acquire(PRIORITY_BULK))
+        mock_sleep.assert_called_once_with(1.0)
+        self.mock_metrics_event.emit_event.assert_called_with('geocode.rate_limit', {
+            'priority': 'bulk',
+            'outcome': 'queued',
+        })
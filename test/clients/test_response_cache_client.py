@@ -0,0 +1,58 @@
+from unittest import TestCase
+
+import mock
+
+from orion.clients.cache import CacheClient
+from orion.clients.response_cache import ResponseCacheClient
+
+
+class TestResponseCacheClient(TestCase):
+    def setUp(self):
+        self.cache = CacheClient(addr=None, prefix='prefix')
+        self.client = ResponseCacheClient(self.cache, ttl_ms=1000, historical_ttl_ms=10000)
+
+    def test_enabled(self):
+        self.assertTrue(self.client.enabled)
+        self.assertFalse(ResponseCacheClient(self.cache).enabled)
+
+    def test_version(self):
+        version = self.client.version('user', 'device')
+
+        self.assertEqual(self.client.version('user', 'device'), version)
+        self.assertNotEqual(self.client.version('user', 'other'), version)
+        self.assertNotEqual(self.client.version('user=&', 'device'), version)
+
+    def test_invalidate(self):
+        version = self.client.version('user', 'device')
+        self.client.set(version, {'user': 'user'}, [{'location_id': 1}])
+
+        new_version = self.client.invalidate('user', 'device')
+
+        self.assertNotEqual(new_version, version)
+        self.assertEqual(self.client.version('user', 'device'), new_version)
+        self.assertIsNone(self.client.get(new_version, {'user': 'user'}))
+
+    def test_get_set(self):
+        version = self.client.version('user', 'device')
+        self.client.set(version, {'user': 'user', 'limit': 10}, {'locations': []})
+
+        self.assertEqual(self.client.get(version, {'limit': 10, 'user': 'user'}), {'locations': []})
+        self.assertIsNone(self.client.get(version, {'user': 'user', 'limit': 20}))
+
+    def test_set_ttl(self):
+        mock_cache = mock.MagicMock()
+        client = ResponseCacheClient(mock_cache, ttl_ms=1000, historical_ttl_ms=10000)
+
+        client.set('version', {}, [])
+        _, set_kwargs = mock_cache.set.call_args
+        self.assertEqual(set_kwargs['ttl'], 1000)
+
+        client.set('version', {}, [], historical=True)
+        _, set_kwargs = mock_cache.set.call_args
+        self.assertEqual(set_kwargs['ttl'], 10000)
+
+    def test_get_malformed(self):
+        mock_cache = mock.MagicMock()
+        mock_cache.get.return_value = 'malformed'
+
+        self.assertIsNone(ResponseCacheClient(mock_cache, ttl_ms=1000).get('version', {}))
@@ -0,0 +1,123 @@
+import threading
+from unittest import TestCase
+
+import mock
+
+from orion.clients.cache import CacheClient
+from orion.clients.singleflight import SingleFlightClient
+
+
+class TestSingleFlightClient(TestCase):
+    def setUp(self):
+        self.cache = CacheClient(addr=None, prefix='prefix')
+        self.mock_metrics_event = mock.MagicMock()
+        self.client = SingleFlightClient(self.cache, self.mock_metrics_event)
+
+    def test_do_single(self):
+        self.assertEqual(self.client.do('namespace', 'key', {'a': 1}, lambda: 'value'), 'value')
+        self.assertEqual(self.client.calls, {})
+        self.assertFalse(self.mock_metrics_event.emit_event.called)
+
+    def test_do_coalesced(self):
+        started = threading.Event()
+        release = threading.Event()
+        mock_func = mock.MagicMock(return_value='value')
+        results = []
+
+        def leader_func():
+            started.set()
+            release.wait()
+            return mock_func()
+
+        def call(func):
+            results.append(self.client.do('namespace', 'key', {'a': 1}, func))
+
+        leader = threading.Thread(target=call, args=(leader_func,))
+        leader.start()
+        started.wait()
+
+        # Each follower emits a metric before it waits on the leader's result
+        coalesced = threading.Semaphore(0)
+        self.mock_metrics_event.emit_event.side_effect = lambda *args: coalesced.release()
+
+        followers = [threading.Thread(target=call, args=(mock_func,)) for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        for _ in followers:
+            coalesced.acquire()
+
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        self.assertEqual(results, ['value'] * 4)
+        self.assertEqual(mock_func.call_count, 1)
+        self.mock_metrics_event.emit_event.assert_any_call('singleflight.coalesced', {
+            'namespace': 'namespace',
+            'scope': 'local',
+        })
+
+    def test_do_error(self):
+        def func():
+            raise ValueError
+
+        self.assertRaises(ValueError, self.client.do, 'namespace', 'key', {}, func)
+        self.assertEqual(self.client.calls, {})
+
+    def test_do_distributed_unlocked(self):
+        client = SingleFlightClient(self.cache, self.mock_metrics_event, distributed=True)
+
+        self.assertEqual(client.do('namespace', 'key', {}, lambda: 'value'), 'value')
+        # The lock is released after the computation
+        self.assertTrue(self.cache.add('namespace-lock', 'key', {}, 'token', 1000))
+
+    def test_do_distributed_remote_result(self):
+        client = SingleFlightClient(
+            self.cache,
+            self.mock_metrics_event,
+            distributed=True,
+            poll_interval_ms=1,
+        )
+        mock_func = mock.MagicMock()
+
+        # Simulate a lock held by another process, which caches its result
+        self.cache.add('namespace-lock', 'key', {}, 'token', 1000)
+        self.cache.set('namespace', 'key', {}, 'remote', 1000)
+
+        self.assertEqual(client.do('namespace', 'key', {}, mock_func), 'remote')
+        self.assertFalse(mock_func.called)
+        self.mock_metrics_event.emit_event.assert_called_with('singleflight.coalesced', {
+            'namespace': 'namespace',
+            'scope': 'remote',
+        })
+
+    def test_do_distributed_lock_timeout(self):
+        client = SingleFlightClient(
+            self.cache,
+            self.mock_metrics_event,
+            distributed=True,
+            lock_ttl_ms=5,
+            poll_interval_ms=1,
+        )
+
+        self.cache.add('namespace-lock', 'key', {}, 'token', 60000)
+
+        self.assertEqual(client.do('namespace', 'key', {}, lambda: 'value'), 'value')
+
+    def test_do_distributed_lock_taken_over(self):
+        client = SingleFlightClient(
+            self.cache,
+            self.mock_metrics_event,
+            distributed=True,
+            lock_ttl_ms=1000,
+        )
+
+        def func():
+            # Simulate the lock expiring and being taken by another process during the computation
+            self.cache.delete('namespace-lock', 'key', {})
+            self.cache.add('namespace-lock', 'key', {}, 'token', 1000)
+            return 'value'
+
+        self.assertEqual(client.do('namespace', 'key', {}, func), 'value')
+        # The other process's lock is not released
+        self.assertEqual(self.cache.get('namespace-lock', 'key', {}), 'token')
@@ -0,0 +1,99 @@
+import json
+import threading
+from unittest import TestCase
+
+import mock
+
+from orion.clients import spatial_cache
+from orion.clients.cache import CacheClient
+from orion.clients.spatial_cache import SpatialCacheClient
+from orion.util.geo import geohash_encode
+from orion.util.geo import geohash_precision
+
+
+class TestSpatialCacheClient(TestCase):
+    def setUp(self):
+        self.cache = CacheClient(addr=None, prefix='prefix')
+        self.client = SpatialCacheClient(self.cache, radius_m=50, max_cell_entries=2)
+
+    def test_enabled(self):
+        self.assertTrue(self.client.enabled)
+        self.assertFalse(SpatialCacheClient(self.cache).enabled)
+
+    def test_nearest_empty(self):
+        self.assertIsNone(self.client.nearest('namespace', 37.7749, -122.4194))
+
+    def test_nearest_within_radius(self):
+        self.client.add('namespace', 37.7749, -122.4194, 'near')
+        self.client.add('namespace', 37.7752, -122.4194, 'nearer')
+
+        value, distance = self.client.nearest('namespace', 37.7751, -122.4194)
+
+        self.assertEqual(value, 'nearer')
+        self.assertLess(distance, 20)
+
+    def test_nearest_outside_radius(self):
+        self.client.add('namespace', 37.7749, -122.4194, 'far')
+
+        self.assertIsNone(self.client.nearest('namespace', 37.7759, -122.4194))
+
+    def test_nearest_neighboring_cell(self):
+        # A short distance across a geohash cell boundary
+        self.client.add('namespace', 0.00001, 0.00001, 'value')
+
+        value, _ = self.client.nearest('namespace', -0.00001, -0.00001)
+
+        self.assertEqual(value, 'value')
+
+    def test_nearest_namespace(self):
+        self.client.add('namespace', 37.7749, -122.4194, 'value')
+
+        self.assertIsNone(self.client.nearest('other', 37.7749, -122.4194))
+
+    def test_add_replaces_coordinate(self):
+        self.client.add('namespace', 37.7749, -122.4194, 'old')
+        self.client.add('namespace', 37.7749, -122.4194, 'new')
+
+        self.assertEqual(self.client.nearest('namespace', 37.7749, -122.4194), ('new', 0))
+
+    def test_add_max_cell_entries(self):
+        self.client.add('namespace', 37.77490, -122.4194, 'a')
+        self.client.add('namespace', 37.77491, -122.4194, 'b')
+        self.client.add('namespace', 37.77492, -122.4194, 'c')
+
+        self.assertEqual(self.client.nearest('namespace', 37.77490, -122.4194)[0], 'b')
+
+    def test_nearest_single_read(self):
+        with mock.patch.object(self.cache, 'get_many', wraps=self.cache.get_many) as get_many:
+            self.client.nearest('namespace', 37.7749, -122.4194)
+
+        self.assertEqual(get_many.call_count, 1)
+        self.assertEqual(len(get_many.call_args[0][0]), 9)
+
+    def test_add_concurrent(self):
+        client = SpatialCacheClient(self.cache, radius_m=50)
+        threads = [
+            threading.Thread(
+                target=client.add,
+                args=('namespace', 37.7749 + idx * 1e-6, -122.4194, str(idx)),
+            )
+            for idx in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        geohash = geohash_encode(37.7749, -122.4194, geohash_precision(37.7749, 50))
+        bucket = json.loads(self.cache.get('namespace', 'geohash-cell', {'geohash': geohash}))
+
+        self.assertEqual(sorted(value for _, _, value in bucket), [str(idx) for idx in range(8)])
+
+    def test_add_lock_held(self):
+        geohash = geohash_encode(37.7749, -122.4194, geohash_precision(37.7749, 50))
+        self.cache.add('namespace-lock', 'geohash-cell', {'geohash': geohash}, 'token', 60000)
+
+        with mock.patch.object(spatial_cache, 'CELL_LOCK_TTL_MS', 5):
+            self.assertFalse(self.client.add('namespace', 37.7749, -122.4194, 'value'))
+
+        self.assertIsNone(self.client.nearest('namespace', 37.7749, -122.4194))
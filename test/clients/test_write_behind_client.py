@@ -0,0 +1,122 @@
+import threading
+from unittest import TestCase
+
+import mock
+
+from orion.clients.write_behind import DURABILITY_ENQUEUE
+from orion.clients.write_behind import DURABILITY_FLUSH
+from orion.clients.write_behind import WriteBehindClient
+from orion.clients.write_behind import WriteBehindException
+from test.fixtures.location import location_factory
+
+
+class TestWriteBehindClient(TestCase):
+    def setUp(self):
+        self.mock_db = mock.MagicMock()
+        self.mock_conn = self.mock_db.engine.begin().__enter__()
+        self.mock_metrics_event = mock.MagicMock()
+        self.mock_metrics_gauge = mock.MagicMock()
+
+    def _client(self, **kwargs):
+        client = WriteBehindClient(
+            db=self.mock_db,
+            metrics_event=self.mock_metrics_event,
+            metrics_gauge=self.mock_metrics_gauge,
+            metrics_latency=mock.MagicMock(),
+            **kwargs
+        )
+        self.addCleanup(client.close)
+        return client
+
+    def test_invalid_durability(self):
+        self.assertRaises(ValueError, self._client, durability='invalid')
+
+    def test_disabled(self):
+        client = self._client(enabled=False)
+
+        self.assertFalse(client.enabled)
+        self.assertFalse(client.writer.is_alive())
+
+    def test_flush_on_close(self):
+        client = self._client(enabled=False, durability=DURABILITY_ENQUEUE)
+        client.write(location_factory(timestamp=1))
+        client.write(location_factory(timestamp=2))
+
+        self.assertFalse(self.mock_conn.execute.called)
+        client.close()
+
+        (_, rows), _ = self.mock_conn.execute.call_args
+        self.assertEqual(self.mock_conn.execute.call_count, 1)
+        self.assertEqual([row['timestamp'] for row in rows], [1, 2])
+        self.assertRaises(WriteBehindException, client.write, location_factory())
+
+    def test_flush_invalidates_response_cache(self):
+        mock_response_cache = mock.MagicMock()
+        client = self._client(enabled=False, response_cache=mock_response_cache)
+        client.write(location_factory(timestamp=1))
+        client.write(location_factory(timestamp=2))
+        client.close()
+
+        mock_response_cache.invalidate.assert_called_once_with('user', 'device')
+
+    def test_batch_size_threshold(self):
+        client = self._client(enabled=False, batch_size=2)
+        for timestamp in range(5):
+            client.write(location_factory(timestamp=timestamp))
+        client.close()
+
+        batches = [
+            [row['timestamp'] for row in rows]
+            for (_, rows), _ in self.mock_conn.execute.call_args_list
+        ]
+        self.assertEqual(batches, [[0, 1], [2, 3], [4]])
+        self.mock_metrics_gauge.emit_gauge.assert_any_call('write_behind.batch_size', 2)
+        self.mock_metrics_gauge.emit_gauge.assert_any_call('write_behind.batch_size', 1)
+
+    def test_backpressure(self):
+        client = self._client(enabled=False, queue_size=1, enqueue_timeout_ms=1)
+        client.write(location_factory())
+
+        self.assertRaises(WriteBehindException, client.write, location_factory())
+        self.mock_metrics_event.emit_event.assert_called_with('write_behind.rejected')
+
+    def test_durability_flush(self):
+        client = self._client(enabled=True, durability=DURABILITY_FLUSH, flush_interval_ms=1)
+        client.write(location_factory(timestamp=1))
+
+        # The write only returns after the batch is committed.
+        (_, rows), _ = self.mock_conn.execute.call_args
+        self.assertEqual([row['timestamp'] for row in rows], [1])
+
+    def test_durability_flush_failure(self):
+        self.mock_conn.execute.side_effect = RuntimeError
+        client = self._client(enabled=True, durability=DURABILITY_FLUSH, flush_interval_ms=1)
+
+        self.assertRaises(WriteBehindException, client.write, location_factory())
+        self.mock_metrics_event.emit_event.assert_called_with('write_behind.flush_failure')
+
+    def test_durability_flush_timeout(self):
+        client = self._client(enabled=False, durability=DURABILITY_FLUSH, flush_timeout_ms=1)
+
+        self.assertRaises(WriteBehindException, client.write, location_factory())
+        self.mock_metrics_event.emit_event.assert_called_with('write_behind.flush_timeout')
+
+    def test_write_after_stop(self):
+        client = self._client(enabled=True, flush_interval_ms=1)
+        client.close()
+        self.mock_conn.execute.reset_mock()
+
+        # Simulate a write that passed the shutdown check before the buffer was closed
+        client.shutdown.clear()
+        client.write(location_factory(timestamp=1))
+
+        (_, rows), _ = self.mock_conn.execute.call_args
+        self.assertEqual([row['timestamp'] for row in rows], [1])
+
+    def test_background_flush(self):
+        flushed = threading.Event()
+        self.mock_conn.execute.side_effect = lambda *args: flushed.set()
+        client = self._client(enabled=True, flush_interval_ms=1)
+        client.write(location_factory())
+
+        self.assertTrue(flushed.wait(5))
@@ -0,0 +1,29 @@
+import mock
+
+from orion.clients.cache import CacheClient
+from orion.clients.singleflight import SingleFlightClient
+from orion.clients.spatial_cache import SpatialCacheClient
+from orion.util.geocode import AddressResolver
+
+
+def context_factory():
+    """
+    Factory function for generating a mock application context. Clients on the reverse geocoding
+    path are real instances backed by an in-memory cache; all optional background features are
+    disabled.
+
+    :return: A mock.MagicMock standing in for an orion.context.Context instance.
+    """
+    ctx = mock.MagicMock()
+    ctx.cache = CacheClient(addr=None, prefix='prefix')
+    ctx.singleflight = SingleFlightClient(cache=ctx.cache, metrics_event=ctx.metrics_event)
+    ctx.address_resolver = AddressResolver(ctx)
+    ctx.local_geocoder.enabled = False
+    ctx.spatial_cache = SpatialCacheClient(cache=ctx.cache)
+    ctx.movement.enabled = False
+    ctx.geocode_worker.enabled = False
+    ctx.write_behind.enabled = False
+    ctx.cache_warmer.enabled = False
+    ctx.response_cache.enabled = False
+
+    return ctx
@@ -14,13 +14,14 @@ def location_factory(
     connection='m',
     tracker_id='tr',
     address='address',
+    location_id=None,
 ):
     """
     Factory function for generating a Location instance with mock data.
 
     :return: An instance of models.Location with the supplied mock data.
     """
-    return Location(
+    location = Location(
         timestamp=timestamp,
         user=user,
         device=device,
@@ -33,3 +34,6 @@ def location_factory(
         tracker_id=tracker_id,
         address=address,
     )
+    location.location_id = location_id
+
+    return location
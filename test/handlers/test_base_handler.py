@@ -25,6 +25,22 @@ class TestBaseHandler(TestCase):
             ({'success': False, 'message': 'oh noes', 'data': {'data': True}}, 502),
         )
 
+    def test_stream(self):
+        resp, status = self.instance.stream(iter(['a\n', 'b\n']), 'application/x-ndjson', 206)
+
+        self.assertEqual(status, 206)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        self.assertTrue(resp.is_streamed)
+        self.assertEqual(list(resp.response), ['a\n', 'b\n'])
+
+    def test_raw(self):
+        resp, status = self.instance.raw('\x81\xa1a\x01', 'application/x-msgpack')
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp.mimetype, 'application/x-msgpack')
+        self.assertFalse(resp.is_streamed)
+        self.assertEqual(resp.get_data(), '\x81\xa1a\x01')
+
     def test_run(self):
         self.assertRaises(
             NotImplementedError,
@@ -0,0 +1,217 @@
+from unittest import TestCase
+
+import flask
+import mock
+
+from orion.handlers.batch_publish_handler import BatchPublishHandler
+from orion.handlers.batch_publish_handler import MAX_BATCH_SIZE
+from test.fixtures.context import context_factory
+
+
+def inserted_rows(ctx):
+    """
+    Read the rows written by the multi-row insert of a batch.
+
+    :param ctx: Mock application context.
+    :return: List of dictionaries of the inserted column values.
+    """
+    (statement,), _ = ctx.db.session.execute.call_args
+
+    return statement.parameters
+
+
+class TestBatchPublishHandler(TestCase):
+    def setUp(self):
+        self.mock_app = flask.Flask(__name__)
+        self.mock_ctx = context_factory()
+
+    def test_metadata(self):
+        handler = BatchPublishHandler(ctx=self.mock_ctx)
+
+        self.assertEqual(handler.methods, ['POST'])
+        self.assertEqual(handler.path, '/api/publish/batch')
+
+    def test_not_array(self):
+        handler = BatchPublishHandler(ctx=self.mock_ctx, data={'_type': 'location'})
+        resp, status = handler.run()
+
+        self.assertFalse(resp['success'])
+        self.assertEqual(status, 400)
+        self.assertFalse(self.mock_ctx.db.session.execute.called)
+
+    def test_too_large(self):
+        handler = BatchPublishHandler(ctx=self.mock_ctx, data=[{}] * (MAX_BATCH_SIZE + 1))
+        resp, status = handler.run()
+
+        self.assertFalse(resp['success'])
+        self.assertEqual(status, 413)
+        self.assertFalse(self.mock_ctx.db.session.execute.called)
+
+    def test_per_item_status(self):
+        mock_data = [
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 'owntracks/u/d'},
+            {'_type': 'cmd', 'action': 'reportLocation'},
+            {'_type': 'lwt'},
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 2, 'topic': 'malformed'},
+            'not an object',
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 3, 'topic': 'owntracks/u/d'},
+        ]
+
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+            rows = inserted_rows(self.mock_ctx)
+
+            self.assertTrue(resp['success'])
+            self.assertEqual(status, 200)
+            self.assertEqual(
+                [item['status'] for item in resp['data']],
+                [201, 200, 400, 400, 400, 201],
+            )
+            self.assertEqual(self.mock_ctx.db.session.execute.call_count, 1)
+            self.assertEqual(self.mock_ctx.db.session.commit.call_count, 1)
+            self.assertFalse(self.mock_ctx.db.session.add.called)
+            self.assertEqual([row['timestamp'] for row in rows], [1, 3])
+            self.assertEqual([row['user'] for row in rows], ['u', 'u'])
+            self.assertEqual([row['address'] for row in rows], ['address', 'address'])
+            # Identical coordinates within the batch are only geocoded once, at bulk priority
+            self.mock_ctx.geocode.reverse_geocode.assert_called_once_with(
+                1.0,
+                2.0,
+                priority='bulk',
+            )
+            self.assertEqual(self.mock_ctx.stream.emit_location.call_count, 2)
+
+    def test_headers_fallback(self):
+        mock_headers = {
+            'X-Limit-U': 'user',
+            'X-Limit-D': 'device',
+        }
+        mock_data = [
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0},
+            {'_type': 'location', 'lat': 3.0, 'lon': 4.0},
+        ]
+
+        self.mock_ctx.geocode.reverse_geocode.return_value = None
+
+        with self.mock_app.test_request_context(headers=mock_headers):
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+            rows = inserted_rows(self.mock_ctx)
+
+            self.assertTrue(resp['success'])
+            self.assertEqual([row['user'] for row in rows], ['user', 'user'])
+            self.assertEqual([row['device'] for row in rows], ['device', 'device'])
+            self.assertEqual([row['address'] for row in rows], [None, None])
+            self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 2)
+
+    def test_empty(self):
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=[])
+            resp, status = handler.run()
+
+            self.assertTrue(resp['success'])
+            self.assertEqual(status, 200)
+            self.assertEqual(resp['data'], [])
+            self.assertFalse(self.mock_ctx.db.session.execute.called)
+
+    def test_non_string_topic(self):
+        mock_data = [{'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 5}]
+
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+
+            self.assertEqual(status, 200)
+            self.assertEqual(resp['data'], [
+                {'status': 400, 'message': 'Malformed location topic.'},
+            ])
+
+    def test_location_ids(self):
+        mock_data = [
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 2, 'topic': 'owntracks/u/d'},
+        ]
+        self.mock_ctx.db.session.execute.return_value.lastrowid = 10
+
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            handler.run()
+
+            emitted = [
+                location
+                for (location,), _ in self.mock_ctx.stream.emit_location.call_args_list
+            ]
+            self.assertEqual([location.location_id for location in emitted], [10, 11, 12])
+
+    def test_invalid_coordinates(self):
+        mock_data = [
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lon': 2.0, 'tst': 2, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lat': '1.0', 'lon': 2.0, 'tst': 3, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lat': True, 'lon': None, 'tst': 4, 'topic': 'owntracks/u/d'},
+        ]
+
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+
+            self.assertEqual(status, 200)
+            self.assertEqual(
+                [item['status'] for item in resp['data']],
+                [201, 400, 400, 400],
+            )
+            self.assertEqual(resp['data'][1]['message'], 'Malformed location coordinates.')
+            self.assertEqual([row['timestamp'] for row in inserted_rows(self.mock_ctx)], [1])
+            self.mock_ctx.geocode.reverse_geocode.assert_called_once_with(
+                1.0,
+                2.0,
+                priority='bulk',
+            )
+
+    def test_no_valid_items(self):
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=[{'_type': 'lwt'}])
+            resp, status = handler.run()
+
+            self.assertTrue(resp['success'])
+            self.assertEqual(resp['data'], [{'status': 400, 'message': 'Not a location publish.'}])
+            self.assertFalse(self.mock_ctx.db.session.execute.called)
+
+    def test_response_cache(self):
+        mock_data = [
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lat': 3.0, 'lon': 4.0, 'tst': 2, 'topic': 'owntracks/u/d'},
+        ]
+
+        self.mock_ctx.response_cache = mock.MagicMock()
+
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+
+            self.assertTrue(resp['success'])
+            self.mock_ctx.response_cache.invalidate.assert_called_once_with('u', 'd')
+
+    def test_async_geocode(self):
+        mock_data = [
+            {'_type': 'location', 'lat': 1.0, 'lon': 2.0, 'tst': 1, 'topic': 'owntracks/u/d'},
+            {'_type': 'location', 'lat': 3.0, 'lon': 4.0, 'tst': 2, 'topic': 'owntracks/u/d'},
+        ]
+
+        self.mock_ctx.geocode_worker.enabled = True
+
+        with self.mock_app.test_request_context():
+            handler = BatchPublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+            rows = inserted_rows(self.mock_ctx)
+
+            self.assertTrue(resp['success'])
+            self.assertFalse(self.mock_ctx.geocode.reverse_geocode.called)
+            self.assertEqual([row['address'] for row in rows], [None, None])
+            self.assertEqual(self.mock_ctx.geocode_worker.submit.call_count, 2)
@@ -1,16 +1,38 @@
+import collections
+import json
 import time
 from unittest import TestCase
 
+import flask
 import mock
+import msgpack
 
+from orion.clients.cache import CacheClient
+from orion.clients.response_cache import ResponseCacheClient
+from orion.handlers import locations_handler
 from orion.handlers.locations_handler import LocationsHandler
 from orion.handlers.locations_handler import NUM_SEC_MONTH
+from orion.handlers.locations_handler import decode_cursor
+from orion.handlers.locations_handler import encode_cursor
+from orion.models.location import Location
 from test.fixtures.location import location_factory
 
 
+def location_row(location, columns=Location.SERIALIZED_FIELDS):
+    """
+    Build the result row of a query selecting some columns of a location.
+
+    :param location: Location instance.
+    :param columns: Selected columns, in order.
+    :return: Named tuple of the location's values for the columns.
+    """
+    return collections.namedtuple('Row', columns)(*[getattr(location, col) for col in columns])
+
+
 class TestLocationsHandler(TestCase):
     def setUp(self):
         self.mock_ctx = mock.MagicMock()
+        self.mock_ctx.response_cache.enabled = False
 
     def test_metadata(self):
         handler = LocationsHandler(ctx=self.mock_ctx)
@@ -26,7 +48,7 @@ class TestLocationsHandler(TestCase):
             location_factory(latitude=5.0, longitude=6.0),
         ]
         query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
-        query_chain.return_value = mock_locations
+        query_chain.return_value = [location_row(location) for location in mock_locations]
 
         mock_data = {
             'user': 'user',
@@ -43,3 +65,462 @@ class TestLocationsHandler(TestCase):
         self.assertEqual(query_filter_by_kwargs['device'], 'device')
         self.assertTrue(mock_time.called)
         self.assertEqual(resp['data'], [location.serialize() for location in mock_locations])
+
+    def test_locations_query_keyset_first_page(self):
+        mock_locations = [
+            location_factory(location_id=idx, timestamp=100 + idx)
+            for idx in range(3)
+        ]
+        query = self.mock_ctx.db.session.query().filter_by().filter()
+        query.order_by().limit().all.return_value = [
+            location_row(location)
+            for location in mock_locations
+        ]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'limit': 2,
+            'cursor': None,
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertFalse(query.offset.called)
+        query.order_by().limit.assert_called_with(3)
+        self.assertEqual(
+            resp['data']['locations'],
+            [location.serialize() for location in mock_locations[:2]],
+        )
+        self.assertEqual(decode_cursor(resp['data']['next_cursor']), (101, 1))
+
+    def test_locations_query_keyset_next_page(self):
+        mock_locations = [location_factory(location_id=2, timestamp=102)]
+        query = self.mock_ctx.db.session.query().filter_by().filter()
+        query.filter().order_by().limit().all.return_value = [
+            location_row(location, ('latitude', 'timestamp', 'location_id'))
+            for location in mock_locations
+        ]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'limit': 2,
+            'fields': ['latitude'],
+            'cursor': encode_cursor(location_factory(location_id=1, timestamp=101)),
+        })
+        resp, status = handler.run()
+        seek, = query.filter.call_args[0]
+
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            str(seek.compile(compile_kwargs={'literal_binds': True})),
+            'location.timestamp > 101 OR '
+            'location.timestamp = 101 AND location.location_id > 1',
+        )
+        self.assertEqual(resp['data']['locations'], [{'latitude': 1.0}])
+        self.assertIsNone(resp['data']['next_cursor'])
+        self.mock_ctx.db.session.query.assert_called_with(
+            Location.latitude,
+            Location.timestamp,
+            Location.location_id,
+        )
+
+    def test_locations_query_projection(self):
+        mock_location = location_factory(location_id=1)
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [location_row(mock_location, ('timestamp', 'latitude'))]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['latitude', 'timestamp', 'unknown'],
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp['data'], [mock_location.serialize(['latitude', 'timestamp'])])
+        self.mock_ctx.db.session.query.assert_called_with(Location.timestamp, Location.latitude)
+
+    def test_locations_query_projection_unknown_fields(self):
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [(1,)]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['unknown'],
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(resp['data'], [{}])
+        self.mock_ctx.db.session.query.assert_called_with(Location.location_id)
+
+    def test_locations_query_keyset_malformed_cursor(self):
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'cursor': 'malformed',
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 400)
+        self.assertFalse(resp['success'])
+
+    def test_locations_query_keyset_invalid_limit(self):
+        for limit in (None, 0, '10'):
+            handler = LocationsHandler(ctx=self.mock_ctx, data={
+                'user': 'user',
+                'device': 'device',
+                'cursor': None,
+                'limit': limit,
+            })
+            resp, status = handler.run()
+
+            self.assertEqual(status, 400)
+            self.assertFalse(resp['success'])
+        self.assertFalse(self.mock_ctx.db.session.query.called)
+
+    def test_locations_query_stream(self):
+        mock_locations = [
+            location_factory(location_id=idx, latitude=float(idx))
+            for idx in range(3)
+        ]
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit()
+        query_chain.yield_per.return_value = iter([
+            location_row(location, ('location_id', 'latitude'))
+            for location in mock_locations
+        ])
+        self.mock_ctx.config.get_value.return_value = 2
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id', 'latitude'],
+            'format': 'ndjson',
+        })
+        resp, status = handler.run()
+        chunks = list(resp.response)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp.mimetype, 'application/x-ndjson')
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(
+            [json.loads(line) for line in ''.join(chunks).splitlines()],
+            [location.serialize(['location_id', 'latitude']) for location in mock_locations],
+        )
+        query_chain.yield_per.assert_called_with(2)
+        self.mock_ctx.config.get_value.assert_called_with('database.stream_batch_size')
+
+    def test_locations_query_stream_invalid(self):
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'format': 'ndjson',
+            'cursor': None,
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 400)
+        self.assertFalse(resp['success'])
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'format': 'xml',
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 400)
+        self.assertFalse(resp['success'])
+
+    def test_locations_query_downsample(self):
+        mock_locations = [
+            location_factory(location_id=idx, latitude=0.0, longitude=float(idx))
+            for idx in range(10)
+        ]
+        mock_locations[5].latitude = 10.0
+        mock_locations[7].latitude = None
+        query = self.mock_ctx.db.session.query().filter_by().filter()
+        query.order_by().offset().limit().all.return_value = [
+            location_row(location, ('location_id', 'latitude', 'longitude'))
+            for location in mock_locations
+        ]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id'],
+            'limit': None,
+            'max_points': 3,
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp['data'], [{'location_id': 0}, {'location_id': 5}, {'location_id': 9}])
+        self.mock_ctx.db.session.query.assert_called_with(
+            Location.location_id,
+            Location.latitude,
+            Location.longitude,
+        )
+        query.order_by.assert_called_with(Location.timestamp, Location.location_id)
+
+    def test_locations_query_downsample_invalid(self):
+        for data in ({'max_points': 2}, {'max_points': 'many'}, {'max_points': 10, 'cursor': None}):
+            handler = LocationsHandler(ctx=self.mock_ctx, data=dict(data, user='u', device='d'))
+            resp, status = handler.run()
+
+            self.assertEqual(status, 400)
+            self.assertFalse(resp['success'])
+
+    def test_locations_query_columnar(self):
+        mock_locations = [
+            location_factory(location_id=idx, latitude=float(idx))
+            for idx in range(3)
+        ]
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [
+            location_row(location, ('location_id', 'latitude'))
+            for location in mock_locations
+        ]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id', 'latitude'],
+            'format': 'columnar',
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp['data'], {'location_id': [0, 1, 2], 'latitude': [0.0, 1.0, 2.0]})
+
+    def test_locations_query_polyline(self):
+        mock_locations = [
+            location_factory(location_id=0, timestamp=1000, latitude=38.5, longitude=-120.2),
+            location_factory(location_id=1, timestamp=1010, latitude=40.7, longitude=-120.95),
+            location_factory(location_id=2, timestamp=1030, latitude=43.252, longitude=-126.453),
+        ]
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [
+            location_row(location, ('location_id', 'timestamp', 'latitude', 'longitude'))
+            for location in mock_locations
+        ]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id', 'timestamp'],
+            'format': 'polyline',
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp['data'], {
+            'location_id': [0, 1, 2],
+            'polyline': '_p~iF~ps|U_ulLnnqC_mqNvxq`@',
+            'timestamp_deltas': [1000, 10, 20],
+        })
+        self.mock_ctx.db.session.query.assert_called_with(
+            Location.location_id,
+            Location.timestamp,
+            Location.latitude,
+            Location.longitude,
+        )
+
+    def test_locations_query_polyline_null_values(self):
+        mock_locations = [
+            location_factory(location_id=0, timestamp=1000, latitude=38.5, longitude=-120.2),
+            location_factory(location_id=1, timestamp=1005, latitude=None, longitude=-120.5),
+            location_factory(location_id=2, timestamp=None, latitude=39.0, longitude=-120.5),
+            location_factory(location_id=3, timestamp=1010, latitude=40.7, longitude=-120.95),
+        ]
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [
+            location_row(location, ('location_id', 'timestamp', 'latitude', 'longitude'))
+            for location in mock_locations
+        ]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id', 'timestamp'],
+            'format': 'polyline',
+        })
+        resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp['data'], {
+            'location_id': [0, 3],
+            'polyline': '_p~iF~ps|U_ulLnnqC',
+            'timestamp_deltas': [1000, 10],
+        })
+
+    def test_locations_query_msgpack(self):
+        mock_location = location_factory(location_id=1)
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [location_row(mock_location, ('location_id',))]
+
+        handler = LocationsHandler(ctx=self.mock_ctx, data={
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id'],
+            'format': 'msgpack',
+        })
+
+        with mock.patch.object(locations_handler, 'msgpack') as mock_msgpack:
+            mock_msgpack.packb.return_value = 'packed'
+            resp, status = handler.run()
+
+        self.assertEqual(status, 200)
+        self.assertEqual(resp.mimetype, 'application/x-msgpack')
+        self.assertEqual(resp.get_data(), 'packed')
+        mock_msgpack.packb.assert_called_with(
+            {'success': True, 'message': None, 'data': [{'location_id': 1}]},
+            use_bin_type=True,
+        )
+
+    def test_locations_query_accept(self):
+        mock_location = location_factory(location_id=1)
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [location_row(mock_location, ('location_id',))]
+        data = {'user': 'user', 'device': 'device', 'fields': ['location_id']}
+        mock_app = flask.Flask(__name__)
+
+        for accept, data_format, mimetype in (
+            ('application/x-msgpack', None, 'application/x-msgpack'),
+            ('application/json;q=0.5, application/x-msgpack', None, 'application/x-msgpack'),
+            ('application/x-msgpack', 'json', None),
+            ('text/html', None, None),
+            ('*/*', None, None),
+            (None, None, None),
+        ):
+            headers = {'Accept': accept} if accept else {}
+            with mock_app.test_request_context(headers=headers):
+                handler = LocationsHandler(
+                    ctx=self.mock_ctx,
+                    data=dict(data, format=data_format) if data_format else dict(data),
+                )
+                resp, status = handler.run()
+
+            self.assertEqual(status, 200)
+            if mimetype:
+                self.assertEqual(resp.mimetype, mimetype)
+                self.assertEqual(msgpack.unpackb(resp.get_data(), raw=False)['data'], [
+                    {'location_id': 1},
+                ])
+            else:
+                self.assertEqual(resp['data'], [{'location_id': 1}])
+
+    def test_locations_query_accept_response_cache(self):
+        self.mock_ctx.response_cache.enabled = True
+        self.mock_ctx.response_cache.get.return_value = None
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = []
+        data = {'user': 'user', 'device': 'device', 'timestamp_start': 1, 'timestamp_end': 2}
+
+        with flask.Flask(__name__).test_request_context(headers={
+            'Accept': 'application/x-msgpack',
+        }):
+            LocationsHandler(ctx=self.mock_ctx, data=data).run()
+
+        (_, params), _ = self.mock_ctx.response_cache.get.call_args
+        self.assertEqual(params['format'], 'msgpack')
+
+    @mock.patch.object(time, 'time', return_value=NUM_SEC_MONTH)
+    def test_locations_query_response_cache(self, mock_time):
+        self.mock_ctx.response_cache = ResponseCacheClient(
+            cache=CacheClient(addr=None, prefix='prefix'),
+            ttl_ms=1000,
+            historical_ttl_ms=10000,
+        )
+        mock_location = location_factory(location_id=1)
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = [location_row(mock_location, ('location_id',))]
+        data = {
+            'user': 'user',
+            'device': 'device',
+            'fields': ['location_id'],
+            'timestamp_start': 1000,
+            'timestamp_end': None,
+        }
+
+        for _ in range(2):
+            resp, status = LocationsHandler(ctx=self.mock_ctx, data=dict(data)).run()
+
+            self.assertEqual(status, 200)
+            self.assertEqual(resp['data'], [{'location_id': 1}])
+        self.assertEqual(query_chain.call_count, 1)
+
+        # Parameters are keyed by their resolved values
+        resp, status = LocationsHandler(ctx=self.mock_ctx, data=dict(
+            data,
+            fields=['unknown', 'location_id'],
+            offset=0,
+            format='json',
+        )).run()
+
+        self.assertEqual(resp['data'], [{'location_id': 1}])
+        self.assertEqual(query_chain.call_count, 1)
+
+        # A write for the device invalidates the cached response
+        self.mock_ctx.response_cache.invalidate('user', 'device')
+        resp, status = LocationsHandler(ctx=self.mock_ctx, data=dict(data)).run()
+
+        self.assertEqual(resp['data'], [{'location_id': 1}])
+        self.assertEqual(query_chain.call_count, 2)
+
+    def test_locations_query_response_cache_sliding_window(self):
+        self.mock_ctx.response_cache.enabled = True
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = []
+
+        for data in ({'timestamp_start': 1000}, {'timestamp_end': 2000}, {}):
+            resp, status = LocationsHandler(
+                ctx=self.mock_ctx,
+                data=dict(data, user='user', device='device'),
+            ).run()
+
+            self.assertEqual(status, 200)
+        self.assertFalse(self.mock_ctx.response_cache.get.called)
+        self.assertFalse(self.mock_ctx.response_cache.set.called)
+
+    def test_locations_query_response_cache_historical(self):
+        self.mock_ctx.response_cache.get.return_value = None
+        query_chain = self.mock_ctx.db.session.query().filter_by().filter().offset().limit().all
+        query_chain.return_value = []
+
+        for timestamp_end, historical in ((1000, True), (None, False)):
+            data = {
+                'user': 'user',
+                'device': 'device',
+                'timestamp_start': None,
+                'timestamp_end': timestamp_end,
+            }
+            self.mock_ctx.response_cache.enabled = True
+            resp, status = LocationsHandler(ctx=self.mock_ctx, data=data).run()
+
+            self.assertEqual(status, 200)
+            self.mock_ctx.response_cache.version.assert_called_with('user', 'device')
+            self.mock_ctx.response_cache.set.assert_called_with(
+                self.mock_ctx.response_cache.version(),
+                {
+                    'user': 'user',
+                    'device': 'device',
+                    'offset': 0,
+                    'limit': 10,
+                    'timestamp_start': None,
+                    'timestamp_end': timestamp_end,
+                    'fields': list(Location.SERIALIZED_FIELDS),
+                    'format': 'json',
+                    'max_points': None,
+                },
+                [],
+                historical=historical,
+            )
+
+    def test_cursor_round_trip(self):
+        location = location_factory(location_id=5, timestamp=1500000000)
+
+        self.assertEqual(decode_cursor(encode_cursor(location)), (1500000000, 5))
+        self.assertRaises(ValueError, decode_cursor, encode_cursor(location_factory()))
@@ -3,15 +3,16 @@ from unittest import TestCase
 import flask
 import mock
 
-from orion.clients.cache import CacheClient
+from orion.clients.movement import MovementSuppressionClient
+from orion.clients.write_behind import WriteBehindException
 from orion.handlers.publish_handler import PublishHandler
+from test.fixtures.context import context_factory
 
 
 class TestPublishHandler(TestCase):
     def setUp(self):
         self.mock_app = flask.Flask(__name__)
-        self.mock_ctx = mock.MagicMock()
-        self.mock_ctx.cache = CacheClient(addr=None, prefix='prefix')
+        self.mock_ctx = context_factory()
 
     def test_metadata(self):
         handler = PublishHandler(ctx=self.mock_ctx)
@@ -81,6 +82,23 @@ class TestPublishHandler(TestCase):
             self.assertEqual(location.longitude, 2.0)
             self.assertEqual(location.address, 'address')
 
+    def test_location_report_response_cache(self):
+        mock_data = {
+            '_type': 'location',
+            'lat': 1.0,
+            'lon': 2.0,
+            'topic': 'owntracks/user/device'
+        }
+
+        self.mock_ctx.response_cache = mock.MagicMock()
+
+        with self.mock_app.test_request_context():
+            handler = PublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+
+            self.assertEqual(status, 201)
+            self.mock_ctx.response_cache.invalidate.assert_called_once_with('user', 'device')
+
     def test_location_report_reverse_geocode_failure(self):
         mock_data = {
             '_type': 'location',
@@ -119,3 +137,119 @@ class TestPublishHandler(TestCase):
 
             self.assertTrue(resp['success'])
             self.assertEqual(status, 200)
+
+    def test_location_report_write_behind(self):
+        mock_data = {
+            '_type': 'location',
+            'lat': 1.0,
+            'lon': 2.0,
+            'topic': 'owntracks/user/device'
+        }
+
+        self.mock_ctx.write_behind.enabled = True
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        with self.mock_app.test_request_context():
+            handler = PublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+            (location,), _ = self.mock_ctx.write_behind.write.call_args
+
+            self.assertTrue(resp['success'])
+            self.assertEqual(status, 201)
+            self.assertFalse(self.mock_ctx.db.session.add.called)
+            self.assertFalse(self.mock_ctx.db.session.commit.called)
+            self.assertEqual(location.user, 'user')
+            self.assertEqual(location.address, 'address')
+            self.assertTrue(self.mock_ctx.stream.emit_location.called)
+
+    def test_location_report_write_behind_rejected(self):
+        mock_data = {
+            '_type': 'location',
+            'lat': 1.0,
+            'lon': 2.0,
+            'topic': 'owntracks/user/device'
+        }
+
+        self.mock_ctx.write_behind.enabled = True
+        self.mock_ctx.write_behind.write.side_effect = WriteBehindException
+
+        with self.mock_app.test_request_context():
+            handler = PublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+
+            self.assertFalse(resp['success'])
+            self.assertEqual(status, 503)
+            self.assertFalse(self.mock_ctx.stream.emit_location.called)
+
+    def test_location_report_async_geocode(self):
+        mock_data = {
+            '_type': 'location',
+            'lat': 1.0,
+            'lon': 2.0,
+            'topic': 'owntracks/user/device'
+        }
+
+        self.mock_ctx.geocode_worker.enabled = True
+
+        with self.mock_app.test_request_context():
+            handler = PublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+            (location,), _ = self.mock_ctx.db.session.add.call_args
+            (submitted,), _ = self.mock_ctx.geocode_worker.submit.call_args
+
+            self.assertTrue(resp['success'])
+            self.assertEqual(status, 201)
+            self.assertFalse(self.mock_ctx.geocode.reverse_geocode.called)
+            self.assertIsNone(location.address)
+            self.assertIs(submitted, location)
+
+    def test_location_report_async_geocode_write_behind(self):
+        mock_data = {
+            '_type': 'location',
+            'lat': 1.0,
+            'lon': 2.0,
+            'topic': 'owntracks/user/device'
+        }
+
+        self.mock_ctx.geocode_worker.enabled = True
+        self.mock_ctx.write_behind.enabled = True
+
+        with self.mock_app.test_request_context():
+            handler = PublishHandler(ctx=self.mock_ctx, data=mock_data)
+            resp, status = handler.run()
+            _, write_kwargs = self.mock_ctx.write_behind.write.call_args
+
+            self.assertTrue(resp['success'])
+            self.assertFalse(self.mock_ctx.geocode.reverse_geocode.called)
+            # Geocoding is deferred until the background writer commits the location
+            self.assertFalse(self.mock_ctx.geocode_worker.submit.called)
+            self.assertEqual(write_kwargs['on_commit'], self.mock_ctx.geocode_worker.submit)
+
+    def test_location_report_movement_suppression(self):
+        self.mock_ctx.movement = MovementSuppressionClient(
+            cache=self.mock_ctx.cache,
+            metrics_event=self.mock_ctx.metrics_event,
+            distance_m=50,
+        )
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        with self.mock_app.test_request_context():
+            for lat, lon in ((37.7749, -122.4194), (37.7750, -122.4195), (37.7760, -122.4194)):
+                handler = PublishHandler(ctx=self.mock_ctx, data={
+                    '_type': 'location',
+                    'lat': lat,
+                    'lon': lon,
+                    'acc': 30,
+                    'topic': 'owntracks/user/device',
+                })
+                handler.run()
+
+                (location,), _ = self.mock_ctx.db.session.add.call_args
+                self.assertEqual(location.address, 'address')
+
+        # The second publish is suppressed; the third has moved too far
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 2)
+        self.mock_ctx.metrics_event.emit_event.assert_any_call(
+            'geocode.suppression',
+            {'outcome': 'suppressed'},
+        )
@@ -52,3 +52,18 @@ class TestLocation(TestCase):
             'timestamp': 1,
             'latitude': 1.0,
         })
+
+    def test_column_values(self):
+        self.assertEqual(self.instance.column_values(), {
+            'timestamp': 1,
+            'user': 'user',
+            'device': 'device',
+            'latitude': 1.0,
+            'longitude': 2.0,
+            'accuracy': 10,
+            'battery': 100,
+            'trigger': 'u',
+            'connection': 'm',
+            'tracker_id': 'tr',
+            'address': '12345 Orion Rd',
+        })
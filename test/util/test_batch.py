@@ -0,0 +1,21 @@
+import Queue
+from unittest import TestCase
+
+from orion.util.batch import collect_batch
+
+
+class TestBatch(TestCase):
+    def setUp(self):
+        self.queue = Queue.Queue()
+
+    def test_collect_batch_empty(self):
+        self.assertEqual(collect_batch(self.queue, 10, 1), [])
+        self.assertEqual(collect_batch(self.queue, 10, 1, block=False), [])
+
+    def test_collect_batch_max_size(self):
+        for item in range(5):
+            self.queue.put(item)
+
+        self.assertEqual(collect_batch(self.queue, 2, 1), [0, 1])
+        self.assertEqual(collect_batch(self.queue, 2, 1, block=False), [2, 3])
+        self.assertEqual(collect_batch(self.queue, 2, 1), [4])
@@ -0,0 +1,91 @@
+import time
+from unittest import TestCase
+
+import mock
+
+from orion.util.circuit_breaker import CircuitBreaker
+from orion.util.circuit_breaker import STATE_CLOSED
+from orion.util.circuit_breaker import STATE_HALF_OPEN
+from orion.util.circuit_breaker import STATE_OPEN
+
+
+class TestCircuitBreaker(TestCase):
+    def setUp(self):
+        self.on_state_change = mock.MagicMock()
+        self.breaker = CircuitBreaker(
+            failure_threshold=2,
+            cooldown_ms=1000,
+            on_state_change=self.on_state_change,
+        )
+
+    def test_closed(self):
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+        self.assertTrue(self.breaker.allow())
+
+    def test_failure_threshold(self):
+        with self._patch_time(1):
+            self.breaker.record_failure()
+            self.assertTrue(self.breaker.allow())
+
+            self.breaker.record_failure()
+            self.assertFalse(self.breaker.allow())
+            self.assertEqual(self.breaker.state, STATE_OPEN)
+            self.on_state_change.assert_called_with(STATE_OPEN)
+
+    def test_success_resets_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, STATE_CLOSED)
+
+    def test_half_open_probe_success(self):
+        with self._patch_time(1):
+            self.breaker.record_failure()
+            self.breaker.record_failure()
+
+        with self._patch_time(3):
+            self.assertTrue(self.breaker.allow())
+            self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+            # Only a single probe is permitted
+            self.assertFalse(self.breaker.allow())
+
+            self.breaker.record_success()
+            self.assertEqual(self.breaker.state, STATE_CLOSED)
+            self.assertTrue(self.breaker.allow())
+
+    def test_half_open_probe_failure(self):
+        with self._patch_time(1):
+            self.breaker.record_failure()
+            self.breaker.record_failure()
+
+        with self._patch_time(3):
+            self.assertTrue(self.breaker.allow())
+            self.breaker.record_failure()
+            self.assertEqual(self.breaker.state, STATE_OPEN)
+            self.assertFalse(self.breaker.allow())
+
+        with self._patch_time(5):
+            self.assertTrue(self.breaker.allow())
+
+    def test_half_open_probe_unresolved(self):
+        with self._patch_time(1):
+            self.breaker.record_failure()
+            self.breaker.record_failure()
+
+        with self._patch_time(3):
+            self.assertTrue(self.breaker.allow())
+            self.assertFalse(self.breaker.allow())
+
+        # The probe's outcome was never recorded
+        with self._patch_time(3.5):
+            self.assertFalse(self.breaker.allow())
+
+        with self._patch_time(4):
+            self.assertTrue(self.breaker.allow())
+            self.assertFalse(self.breaker.allow())
+            self.assertEqual(self.breaker.state, STATE_HALF_OPEN)
+
+    @staticmethod
+    def _patch_time(timestamp):
+        return mock.patch.object(time, 'time', return_value=timestamp)
@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+from unittest import TestCase
+
+from orion.util import codec
+from orion.util.codec import CacheCodec
+from orion.util.codec import COMPRESSION_LZ4
+from orion.util.codec import COMPRESSION_ZLIB
+from orion.util.codec import FORMAT_JSON
+from orion.util.codec import FORMAT_MSGPACK
+from orion.util.codec import FORMAT_RAW
+
+
+class TestCacheCodec(TestCase):
+    def setUp(self):
+        self.address = u'1 Infinite Loop, Cupertino, California 95014, United States'
+        self.feature = {'place_name': self.address, 'relevance': 1, 'center': [1.5, 2.5]}
+
+    def test_raw(self):
+        cache_codec = CacheCodec(fmt=FORMAT_RAW)
+        encoded = cache_codec.encode(self.address)
+
+        self.assertEqual(encoded, '\x81' + self.address.encode('utf-8'))
+        self.assertEqual(CacheCodec.decode(encoded), self.address)
+
+    def test_raw_unicode(self):
+        cache_codec = CacheCodec(fmt=FORMAT_RAW)
+
+        self.assertEqual(
+            CacheCodec.decode(cache_codec.encode(u'Zürich')).decode('utf-8'),
+            u'Zürich',
+        )
+
+    def test_raw_structured(self):
+        cache_codec = CacheCodec(fmt=FORMAT_RAW)
+        encoded = cache_codec.encode(self.feature)
+
+        self.assertEqual(encoded[0], '\x82')
+        self.assertEqual(CacheCodec.decode(encoded), self.feature)
+
+    def test_json(self):
+        cache_codec = CacheCodec(fmt=FORMAT_JSON)
+
+        self.assertEqual(CacheCodec.decode(cache_codec.encode(self.feature)), self.feature)
+        self.assertEqual(CacheCodec.decode(cache_codec.encode(self.address)), self.address)
+
+    def test_compression_threshold(self):
+        cache_codec = CacheCodec(
+            fmt=FORMAT_RAW,
+            compression=COMPRESSION_ZLIB,
+            compression_threshold=100,
+        )
+        short = cache_codec.encode(self.address)
+        long = cache_codec.encode(self.address * 10)
+
+        self.assertEqual(short[0], '\x81')
+        self.assertEqual(long[0], '\x91')
+        self.assertLess(len(long), len(self.address * 10))
+        self.assertEqual(CacheCodec.decode(short), self.address)
+        self.assertEqual(CacheCodec.decode(long), self.address * 10)
+
+    def test_incompressible(self):
+        cache_codec = CacheCodec(
+            fmt=FORMAT_RAW,
+            compression=COMPRESSION_ZLIB,
+            compression_threshold=0,
+        )
+
+        self.assertEqual(cache_codec.encode('a'), '\x81a')
+
+    def test_decode_unencoded(self):
+        self.assertIsNone(CacheCodec.decode(None))
+        self.assertEqual(CacheCodec.decode(''), '')
+        self.assertEqual(CacheCodec.decode(self.address), self.address)
+        self.assertEqual(CacheCodec.decode(u'Zürich'.encode('utf-8')), u'Zürich'.encode('utf-8'))
+        self.assertEqual(CacheCodec.decode(u'Zürich'), u'Zürich')
+
+    def test_decode_unknown_header(self):
+        self.assertRaises(ValueError, CacheCodec.decode, '\x8fvalue')
+
+    def test_invalid_config(self):
+        self.assertRaises(ValueError, CacheCodec, fmt='xml')
+        self.assertRaises(ValueError, CacheCodec, compression='bz2')
+
+    def test_missing_optional_packages(self):
+        if not codec.msgpack:
+            self.assertRaises(ValueError, CacheCodec, fmt=FORMAT_MSGPACK)
+        if not codec.lz4:
+            self.assertRaises(ValueError, CacheCodec, compression=COMPRESSION_LZ4)
@@ -0,0 +1,90 @@
+from unittest import TestCase
+
+from orion.util.geo import chord_to_m
+from orion.util.geo import geohash_decode
+from orion.util.geo import geohash_encode
+from orion.util.geo import geohash_neighbors
+from orion.util.geo import geohash_precision
+from orion.util.geo import haversine_m
+from orion.util.geo import m_to_chord
+from orion.util.geo import polyline_encode
+from orion.util.geo import simplify_track
+from orion.util.geo import unit_vector
+
+
+class TestGeo(TestCase):
+    def test_haversine_m(self):
+        self.assertEqual(haversine_m(37.0, -122.0, 37.0, -122.0), 0)
+        self.assertAlmostEqual(haversine_m(0.0, 0.0, 1.0, 0.0), 111195, delta=1)
+        self.assertAlmostEqual(haversine_m(0.0, 179.5, 0.0, -179.5), 111195, delta=1)
+
+    def test_geohash_encode(self):
+        self.assertEqual(geohash_encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertEqual(geohash_encode(37.7749, -122.4194, 5), '9q8yy')
+
+    def test_geohash_decode(self):
+        lat, lon = geohash_decode('u4pruydqqvj')
+
+        self.assertAlmostEqual(lat, 57.64911, places=4)
+        self.assertAlmostEqual(lon, 10.40744, places=4)
+
+    def test_geohash_precision(self):
+        self.assertEqual(geohash_precision(0.0, 0), 12)
+        self.assertEqual(geohash_precision(0.0, 100), 7)
+        self.assertEqual(geohash_precision(0.0, 10000000), 1)
+        self.assertLessEqual(geohash_precision(80.0, 100), geohash_precision(0.0, 100))
+
+    def test_geohash_neighbors(self):
+        neighbors = geohash_neighbors('9q8yy')
+
+        self.assertEqual(len(neighbors), 9)
+        self.assertIn('9q8yy', neighbors)
+        self.assertIn('9q8yz', neighbors)
+        self.assertIn('9q8yw', neighbors)
+
+    def test_geohash_neighbors_edges(self):
+        # Longitude wraps around the antimeridian
+        self.assertIn(
+            geohash_encode(0.0, 179.99, 3),
+            geohash_neighbors(geohash_encode(0.0, -179.99, 3)),
+        )
+        # No cells beyond the poles
+        self.assertEqual(len(geohash_neighbors(geohash_encode(89.99, 0.0, 3))), 6)
+
+    def test_chord_conversion(self):
+        point1 = unit_vector(37.7749, -122.4194)
+        point2 = unit_vector(37.7849, -122.4094)
+        chord = sum((point1[dim] - point2[dim]) ** 2 for dim in range(3)) ** 0.5
+
+        self.assertAlmostEqual(
+            chord_to_m(chord),
+            haversine_m(37.7749, -122.4194, 37.7849, -122.4094),
+            places=3,
+        )
+        self.assertAlmostEqual(m_to_chord(chord_to_m(chord)), chord)
+
+    def test_simplify_track(self):
+        # A straight line with a single sharp detour
+        points = [(0.0, float(idx)) for idx in range(100)]
+        points[50] = (10.0, 50.0)
+
+        kept = simplify_track(points, 10)
+
+        self.assertEqual(len(kept), 10)
+        self.assertEqual(kept[0], 0)
+        self.assertEqual(kept[-1], 99)
+        self.assertIn(50, kept)
+        self.assertEqual(kept, sorted(kept))
+
+    def test_simplify_track_short(self):
+        points = [(0.0, 0.0), (1.0, 1.0), (2.0, 0.0)]
+
+        self.assertEqual(simplify_track(points, 3), [0, 1, 2])
+        self.assertEqual(simplify_track(points, 10), [0, 1, 2])
+        self.assertEqual(simplify_track([], 10), [])
+
+    def test_polyline_encode(self):
+        points = [(38.5, -120.2), (40.7, -120.95), (43.252, -126.453)]
+
+        self.assertEqual(polyline_encode(points), '_p~iF~ps|U_ulLnnqC_mqNvxq`@')
+        self.assertEqual(polyline_encode([]), '')
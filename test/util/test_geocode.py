@@ -0,0 +1,150 @@
+from unittest import TestCase
+
+import mock
+
+from orion.clients.geocode import RateLimitBudgetExhaustedException
+from orion.clients.geocode import ReverseGeocodingException
+from orion.util.geocode import AddressResolver
+from orion.util.geocode import NEGATIVE_FAILURE
+from orion.util.geocode import NEGATIVE_NOT_FOUND
+from test.fixtures.context import context_factory
+
+
+class TestAddressResolver(TestCase):
+    def setUp(self):
+        self.mock_ctx = context_factory()
+        self.mock_ctx.cache.backend = mock.MagicMock(wraps=self.mock_ctx.cache.backend)
+        self.resolver = AddressResolver(
+            self.mock_ctx,
+            ttl_ms=3000,
+            not_found_ttl_ms=2000,
+            failure_ttl_ms=1000,
+        )
+
+    def test_resolve_cache_hit(self):
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        self.assertEqual(self.resolver.resolve(1.0, 2.0), 'address')
+        self.assertEqual(self.resolver.resolve(1.0, 2.0), 'address')
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 1)
+        _, kwargs = self.mock_ctx.cache.backend.set.call_args
+        self.assertEqual(kwargs['ttl'], 3000)
+        self.mock_ctx.metrics_event.emit_event.assert_called_with('geocode.cache_hit')
+
+    def test_resolve_negative_not_found(self):
+        self.mock_ctx.geocode.reverse_geocode.return_value = None
+
+        self.assertIsNone(self.resolver.resolve(1.0, 2.0))
+        _, kwargs = self.mock_ctx.cache.backend.set.call_args
+        self.assertEqual(kwargs['value'], NEGATIVE_NOT_FOUND)
+        self.assertEqual(kwargs['ttl'], 2000)
+
+        self.assertIsNone(self.resolver.resolve(1.0, 2.0))
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 1)
+        self.mock_ctx.metrics_event.emit_event.assert_called_with(
+            'geocode.negative_cache_hit',
+            {'reason': 'not_found'},
+        )
+
+    def test_resolve_negative_failure(self):
+        self.mock_ctx.geocode.reverse_geocode.side_effect = ReverseGeocodingException
+
+        self.assertIsNone(self.resolver.resolve(1.0, 2.0))
+        _, kwargs = self.mock_ctx.cache.backend.set.call_args
+        self.assertEqual(kwargs['value'], NEGATIVE_FAILURE)
+        self.assertEqual(kwargs['ttl'], 1000)
+        self.mock_ctx.metrics_event.emit_event.assert_any_call('geocode.api_failure')
+
+        self.assertIsNone(self.resolver.resolve(1.0, 2.0))
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 1)
+        self.mock_ctx.metrics_event.emit_event.assert_called_with(
+            'geocode.negative_cache_hit',
+            {'reason': 'failure'},
+        )
+
+    def test_resolve_rate_limited_not_cached(self):
+        self.mock_ctx.geocode.reverse_geocode.side_effect = RateLimitBudgetExhaustedException
+
+        self.assertIsNone(self.resolver.resolve(1.0, 2.0))
+        self.assertFalse(self.mock_ctx.cache.backend.set.called)
+
+        self.mock_ctx.geocode.reverse_geocode.side_effect = None
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        self.assertEqual(self.resolver.resolve(1.0, 2.0), 'address')
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 2)
+
+    def test_resolve_spatial_cache_hit(self):
+        self.mock_ctx.spatial_cache.radius_m = 50
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        self.assertEqual(self.resolver.resolve(37.7749, -122.4194), 'address')
+        self.assertEqual(self.resolver.resolve(37.7750, -122.4194), 'address')
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 1)
+        self.mock_ctx.metrics_event.emit_event.assert_called_with('geocode.spatial_cache_hit')
+
+        # The spatial hit is promoted into the exact cache
+        self.assertEqual(self.resolver.resolve(37.7750, -122.4194), 'address')
+        self.mock_ctx.metrics_event.emit_event.assert_called_with('geocode.cache_hit')
+
+    def test_resolve_spatial_cache_disabled(self):
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        self.resolver.resolve(37.7749, -122.4194)
+        self.resolver.resolve(37.7750, -122.4194)
+
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 2)
+
+    def test_resolve_local_geocoder_hit(self):
+        self.mock_ctx.local_geocoder.enabled = True
+        self.mock_ctx.local_geocoder.nearest.return_value = ('local address', 5)
+
+        self.assertEqual(self.resolver.resolve(1.0, 2.0), 'local address')
+        self.assertFalse(self.mock_ctx.geocode.reverse_geocode.called)
+        self.mock_ctx.metrics_event.emit_event.assert_called_with('geocode.local_geocoder_hit')
+
+    def test_resolve_local_geocoder_add(self):
+        self.mock_ctx.local_geocoder.enabled = True
+        self.mock_ctx.local_geocoder.nearest.return_value = None
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        self.assertEqual(self.resolver.resolve(1.0, 2.0), 'address')
+        self.mock_ctx.local_geocoder.add.assert_called_once_with(1.0, 2.0, 'address')
+
+    def test_resolve_many(self):
+        self.mock_ctx.geocode.reverse_geocode.side_effect = [
+            {'place_name': 'cached'},
+            None,
+            {'place_name': 'miss'},
+        ]
+        self.resolver.resolve(1.0, 2.0)
+        self.resolver.resolve(3.0, 4.0)
+
+        self.assertEqual(self.resolver.resolve_many([(1.0, 2.0), (3.0, 4.0), (5.0, 6.0)]), {
+            (1.0, 2.0): 'cached',
+            (3.0, 4.0): None,
+            (5.0, 6.0): 'miss',
+        })
+        self.assertEqual(self.mock_ctx.cache.backend.get_many.call_count, 1)
+        # Misses are resolved without reading the cache again
+        self.assertEqual(self.mock_ctx.cache.backend.get.call_count, 2)
+        self.assertEqual(self.mock_ctx.geocode.reverse_geocode.call_count, 3)
+        self.mock_ctx.geocode.reverse_geocode.assert_called_with(5.0, 6.0, priority='live')
+
+    def test_resolve_structured_cache_value(self):
+        self.mock_ctx.cache.set(
+            namespace='reverse-geocode',
+            key='feature-place-name',
+            tags={'lat': 100000, 'lon': 200000},
+            value={'place_name': 'address'},
+            ttl=1000,
+        )
+
+        self.assertEqual(self.resolver.resolve(1.0, 2.0), {'place_name': 'address'})
+
+    def test_resolve_cache_warmer_record(self):
+        self.mock_ctx.cache_warmer.enabled = True
+        self.mock_ctx.geocode.reverse_geocode.return_value = {'place_name': 'address'}
+
+        self.resolver.resolve(1.0, 2.0)
+        self.mock_ctx.cache_warmer.record.assert_called_once_with(1.0, 2.0, 'address')
@@ -0,0 +1,35 @@
+from unittest import TestCase
+
+from orion.util.hash_ring import HashRing
+
+
+class TestHashRing(TestCase):
+    def setUp(self):
+        self.keys = ['key{}'.format(idx) for idx in range(3000)]
+
+    def test_no_nodes(self):
+        self.assertRaises(ValueError, HashRing, [])
+
+    def test_deterministic(self):
+        ring = HashRing(['a', 'b', 'c'])
+        other = HashRing(['c', 'b', 'a'])
+
+        self.assertTrue(all(ring.get_node(key) == other.get_node(key) for key in self.keys))
+
+    def test_balanced(self):
+        ring = HashRing(['a', 'b', 'c'])
+        counts = {node: 0 for node in ring.nodes}
+        for key in self.keys:
+            counts[ring.get_node(key)] += 1
+
+        self.assertTrue(all(700 < count < 1300 for count in counts.values()))
+
+    def test_remove_node_moves_only_its_keys(self):
+        ring = HashRing(['a', 'b', 'c'])
+        smaller = HashRing(['a', 'b'])
+
+        for key in self.keys:
+            if ring.get_node(key) != 'c':
+                self.assertEqual(smaller.get_node(key), ring.get_node(key))
+            else:
+                self.assertIn(smaller.get_node(key), ['a', 'b'])
@@ -0,0 +1,33 @@
+import random
+from unittest import TestCase
+
+from orion.util.kdtree import KDTree
+
+
+class TestKDTree(TestCase):
+    def test_nearest_empty(self):
+        self.assertIsNone(KDTree([], []).nearest((0, 0, 0), 1))
+
+    def test_nearest(self):
+        points = [(0, 0, 0), (1, 0, 0), (0, 2, 0), (0, 0, 3)]
+        tree = KDTree(points, ['a', 'b', 'c', 'd'])
+
+        self.assertEqual(len(tree), 4)
+        self.assertEqual(tree.nearest((0.9, 0, 0), 10), ('b', 0.09999999999999998))
+        self.assertEqual(tree.nearest((0, 0, 2.9), 10)[0], 'd')
+        self.assertIsNone(tree.nearest((5, 5, 5), 1))
+
+    def test_nearest_brute_force(self):
+        rand = random.Random(0)
+        points = [tuple(rand.uniform(-1, 1) for _ in range(3)) for _ in range(500)]
+        tree = KDTree(points, range(len(points)))
+
+        for _ in range(100):
+            query = tuple(rand.uniform(-1, 1) for _ in range(3))
+            distances = [
+                sum((query[dim] - point[dim]) ** 2 for dim in range(3)) ** 0.5
+                for point in points
+            ]
+            expected = min(range(len(points)), key=lambda idx: distances[idx])
+
+            self.assertEqual(tree.nearest(query, 4), (expected, distances[expected]))